@@ -0,0 +1,135 @@
+"""
+Benchmark backends pandas vs polars (étapes 07 -> 08 -> 09)
+===========================================================
+
+Réplique matches_unified_v3.csv à 1x, 10x, 100x (chaque copie reçoit des
+éditions décalées pour rester unique), puis enchaîne 07 -> 08 -> 09 avec
+chaque backend dans un répertoire temporaire. Les temps incluent lecture et
+écriture CSV de chaque étape ; les sorties des deux backends sont comparées.
+
+Usage:
+    python benchmarks/bench_backends.py
+    python benchmarks/bench_backends.py --scales 1 10 --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from pipeline.stages import load_stage  # noqa: E402
+from pipeline import polars_backend  # noqa: E402
+
+IN_V3 = ROOT / "data" / "processed" / "matches_unified_v3.csv"
+EDITION_SHIFT = 10_000
+
+
+def make_scaled_v3(scale: int, out_path: Path) -> int:
+    """Écrire un V3 répliqué `scale` fois (éditions décalées par copie)."""
+    base = pd.read_csv(IN_V3)
+    copies = []
+    for k in range(scale):
+        part = base.copy()
+        part["edition_year"] = part["edition_year"] + k * EDITION_SHIFT
+        part["edition"] = part["edition_year"].astype(str)
+        copies.append(part)
+    df = pd.concat(copies, ignore_index=True)
+    df.to_csv(out_path, index=False)
+    return len(df)
+
+
+def run_pandas(tmp: Path) -> dict[str, float]:
+    stage07, stage08, stage09 = load_stage("07_v3_to_v4"), load_stage("08_v4_to_db"), load_stage("09_tables_construction")
+    timings = {}
+
+    t0 = time.perf_counter()
+    df_out, teams, _ = stage07.build_v4(pd.read_csv(tmp / "v3.csv"))
+    df_out.to_csv(tmp / "pandas_v4.csv", index=False)
+    teams.to_csv(tmp / "pandas_teams.csv", index=False)
+    timings["07"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    kpi = stage08.build_final_kpi(pd.read_csv(tmp / "pandas_v4.csv"), pd.read_csv(tmp / "pandas_teams.csv"))
+    kpi.to_csv(tmp / "pandas_kpi.csv", index=False)
+    timings["08"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    tables = stage09.build_tables(pd.read_csv(tmp / "pandas_kpi.csv"))
+    for name, df in tables.items():
+        df.to_csv(tmp / f"pandas_{name}.csv", index=False)
+    timings["09"] = time.perf_counter() - t0
+    return timings
+
+
+def run_polars(tmp: Path) -> dict[str, float]:
+    timings = {}
+
+    t0 = time.perf_counter()
+    df_out, teams, _ = polars_backend.build_v4_lazy(tmp / "v3.csv")
+    df_out.to_csv(tmp / "polars_v4.csv", index=False)
+    teams.to_csv(tmp / "polars_teams.csv", index=False)
+    timings["07"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    kpi = polars_backend.build_final_kpi_lazy(tmp / "polars_v4.csv", tmp / "polars_teams.csv")
+    kpi.to_csv(tmp / "polars_kpi.csv", index=False)
+    timings["08"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    tables = polars_backend.build_tables_lazy(tmp / "polars_kpi.csv")
+    for name, df in tables.items():
+        df.to_csv(tmp / f"polars_{name}.csv", index=False)
+    timings["09"] = time.perf_counter() - t0
+    return timings
+
+
+def outputs_identical(tmp: Path) -> bool:
+    names = ["v4", "teams", "kpi", "teams_reference", "matches_normalized", "home_stats", "away_stats"]
+    return all(
+        (tmp / f"pandas_{n}.csv").read_bytes() == (tmp / f"polars_{n}.csv").read_bytes() for n in names
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark backends pandas vs polars")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=1, help="Meilleur temps sur N essais")
+    args = parser.parse_args()
+
+    polars_backend.require_polars()
+
+    rows = []
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory() as d:
+            tmp = Path(d)
+            n_rows = make_scaled_v3(scale, tmp / "v3.csv")
+            for backend, runner in [("pandas", run_pandas), ("polars", run_polars)]:
+                best = None
+                for _ in range(args.repeat):
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        timings = runner(tmp)
+                    if best is None or sum(timings.values()) < sum(best.values()):
+                        best = timings
+                rows.append({"scale": f"{scale}x", "rows": n_rows, "backend": backend,
+                             **{f"stage_{k}_s": round(v, 3) for k, v in best.items()},
+                             "total_s": round(sum(best.values()), 3)})
+            rows[-1]["identical"] = rows[-2]["identical"] = outputs_identical(tmp)
+            print(pd.DataFrame(rows[-2:]).to_string(index=False), flush=True)
+
+    print("\n RÉSUMÉ")
+    print("=" * 60)
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark chargement PostgreSQL : to_sql vs to_sql multi vs COPY
+================================================================
+
+Réplique home_stats_normalized.csv à 10k, 100k et 1M lignes (id_match
+décalés par copie), puis charge chaque volume dans une table typée
+pré-créée (même schéma que home_stats) avec :
+  - to_sql          : to_sql(if_exists='append') par défaut (executemany)
+  - to_sql_multi    : to_sql(method='multi', chunksize=1000)
+  - copy            : DatabaseManager.bulk_load (COPY FROM STDIN)
+
+La table de benchmark est supprimée à la fin ; les tables du projet ne sont
+pas touchées. Base cible : RENDER_DATABASE_URL (.env ou environnement),
+à pointer de préférence vers un PostgreSQL local.
+
+Usage:
+    python benchmarks/bench_db_load.py
+    python benchmarks/bench_db_load.py --rows 10000 100000 --repeat 3
+    python benchmarks/bench_db_load.py --methods copy to_sql_multi
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import text
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from database.setup_database import TABLE_DEFINITIONS, DatabaseManager  # noqa: E402
+
+IN_HOME_STATS = ROOT / "data" / "clean" / "home_stats_normalized.csv"
+BENCH_TABLE = "bench_load_home_stats"
+
+
+def make_rows(n_rows: int) -> pd.DataFrame:
+    """home_stats répliqué jusqu'à `n_rows` lignes (id_match uniques)."""
+    base = pd.read_csv(IN_HOME_STATS)
+    copies = -(-n_rows // len(base))
+    frames = []
+    for k in range(copies):
+        part = base.copy()
+        part["id_match"] = part["id_match"] + k * len(base)
+        frames.append(part)
+    return pd.concat(frames, ignore_index=True).iloc[:n_rows]
+
+
+def reset_table(db: DatabaseManager) -> None:
+    with db.engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {BENCH_TABLE}"))
+        conn.execute(text(f"CREATE TABLE {BENCH_TABLE} ({TABLE_DEFINITIONS['home_stats']})"))
+
+
+def load(db: DatabaseManager, method: str, df: pd.DataFrame) -> None:
+    if method == "to_sql":
+        df.to_sql(BENCH_TABLE, db.engine, if_exists="append", index=False)
+    elif method == "to_sql_multi":
+        df.to_sql(BENCH_TABLE, db.engine, if_exists="append", index=False, method="multi", chunksize=1000)
+    else:
+        db.bulk_load(BENCH_TABLE, df)
+
+
+def count_rows(db: DatabaseManager) -> int:
+    with db.engine.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {BENCH_TABLE}")).scalar()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark chargement PostgreSQL (to_sql / multi / COPY)")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--methods", nargs="+", choices=["to_sql", "to_sql_multi", "copy"],
+                        default=["to_sql", "to_sql_multi", "copy"])
+    parser.add_argument("--repeat", type=int, default=1, help="Meilleur temps sur N essais")
+    args = parser.parse_args()
+
+    db = DatabaseManager()
+    with contextlib.redirect_stdout(io.StringIO()):
+        db.connect_database()
+
+    rows = []
+    try:
+        for n_rows in args.rows:
+            df = make_rows(n_rows)
+            for method in args.methods:
+                best = None
+                for _ in range(args.repeat):
+                    reset_table(db)
+                    t0 = time.perf_counter()
+                    load(db, method, df)
+                    elapsed = time.perf_counter() - t0
+                    best = elapsed if best is None else min(best, elapsed)
+                loaded = count_rows(db)
+                rows.append({"rows": n_rows, "method": method, "seconds": round(best, 3),
+                             "rows_per_s": int(n_rows / best), "loaded_ok": loaded == n_rows})
+                print(pd.DataFrame(rows[-1:]).to_string(index=False, header=len(rows) == 1), flush=True)
+    finally:
+        with db.engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {BENCH_TABLE}"))
+
+    print("\n RÉSUMÉ")
+    print("=" * 60)
+    summary = pd.DataFrame(rows)
+    print(summary.to_string(index=False))
+    copy_s = summary[summary["method"] == "copy"].set_index("rows")["seconds"]
+    for method in [m for m in args.methods if m != "copy"]:
+        other = summary[summary["method"] == method].set_index("rows")["seconds"]
+        speedup = (other / copy_s).dropna().round(1)
+        if len(speedup):
+            print(f" COPY vs {method}: " + ", ".join(f"{n}: x{v}" for n, v in speedup.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark cube KPI vs SQL (requêtes de db/kpi.sql)
+==================================================
+
+Répond à chaque requête de db/kpi.sql couverte par le cube
+(pipeline.kpi_cube.KPI_ANSWERS) et compare résultat et durée avec la même
+requête exécutée par la base embarquée (DuckDB, sinon SQLite) chargée avec
+les tables normalisées de la partition :
+  - cube froid : premier roll-up (parcours du tableau dense),
+  - cube chaud : roll-ups mémorisés (appels suivants),
+  - SQL        : requête sur la base embarquée en mémoire.
+
+Les lignes sont comparées sans tenir compte de l'ordre des ex æquo.
+
+Usage:
+    python benchmarks/bench_kpi_cube.py
+    python benchmarks/bench_kpi_cube.py --competition wc_men --repeat 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import math
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from database.embedded import EmbeddedDatabaseManager, default_backend  # noqa: E402
+from database.kpi_queries import load_kpi_queries  # noqa: E402
+from pipeline.kpi_cube import CUBE_FILE, KPI_ANSWERS, KpiCube  # noqa: E402
+from pipeline.paths import DEFAULT_COMPETITION, check_competition, competition_dir  # noqa: E402
+
+
+def normalized(rows) -> list[tuple]:
+    """Lignes -> tuples comparables (types numpy / Decimal -> int, float), triés"""
+    def value(v):
+        if v is None or (isinstance(v, float) and math.isnan(v)):
+            return None
+        if isinstance(v, str):
+            return v
+        f = float(v)
+        return int(f) if f.is_integer() else round(f, 2)
+    return sorted((tuple(value(v) for v in row) for row in rows), key=repr)
+
+
+def main(competition: str, repeat: int) -> bool:
+    cube_path = competition_dir(competition) / "clean" / CUBE_FILE
+    if not cube_path.exists():
+        print(f" {cube_path} absent : lancer d'abord python src/10_kpi_aggregates.py")
+        return False
+
+    start = time.perf_counter()
+    cube = KpiCube.load(cube_path)
+    print(f" Cube chargé en {(time.perf_counter() - start) * 1000:.1f} ms ({cube_path.name}, {cube.shape})")
+
+    db = EmbeddedDatabaseManager(":memory:", default_backend())
+    with contextlib.redirect_stdout(io.StringIO()):
+        db.connect_database()
+        db.create_simple_tables()
+        db.load_clean_tables([competition])
+        db.build_post_load_objects()
+    sql = db.run_kpi_queries()
+
+    print(f"\n {'Requête':<72} {'froid µs':>9} {'chaud µs':>9} {'SQL ms':>8}  identique")
+    print(" " + "-" * 110)
+    ok = True
+    for name, _ in load_kpi_queries():
+        answer = KPI_ANSWERS.get(name)
+        if answer is None:
+            print(f" {name[:72]:<72} {'-':>9} {'-':>9} {'-':>8}  non couverte (dimension absente du cube)")
+            continue
+        t0 = time.perf_counter()
+        rows = answer(cube)
+        cold = (time.perf_counter() - t0) * 1e6
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            answer(cube)
+        warm = (time.perf_counter() - t0) / repeat * 1e6
+
+        if isinstance(sql[name], str):
+            print(f" {name[:72]:<72} {cold:>9.1f} {warm:>9.1f} {'-':>8}  SQL {sql[name]}")
+            continue
+        df, seconds = sql[name]
+        same = normalized(rows) == normalized(df.itertuples(index=False))
+        ok &= same
+        print(f" {name[:72]:<72} {cold:>9.1f} {warm:>9.1f} {seconds * 1000:>8.2f}  {'oui' if same else 'NON'}")
+    db.close()
+    return ok
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Requêtes kpi.sql : cube KPI vs base embarquée")
+    parser.add_argument("--competition", type=check_competition, default=DEFAULT_COMPETITION, metavar="KEY",
+                        help="Partition dont le cube est lu (défaut: wc_men)")
+    parser.add_argument("--repeat", type=int, default=1000, help="Appels mesurés par requête (cube chaud)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    sys.exit(0 if main(args.competition, args.repeat) else 1)
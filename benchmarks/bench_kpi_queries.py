@@ -0,0 +1,154 @@
+"""
+Rapport KPI : durée et plan de chaque requête de db/kpi.sql
+===========================================================
+
+Découpe db/kpi.sql en requêtes nommées (commentaires `--` / sections `#`),
+les exécute en parallèle sur les connexions du pool et relève pour chacune :
+  - wall_ms      : durée réelle côté client (exécution + lecture des lignes),
+  - planning_ms / execution_ms : temps du serveur (EXPLAIN ANALYZE),
+  - shared_hit / shared_read   : blocs lus en cache / sur disque (BUFFERS),
+  - nœuds d'accès (Seq Scan, Index Scan...) et de jointure du plan
+    (partitions regroupées par table : « Seq Scan(team_match) x38 »).
+
+Rapport écrit en JSON (comparable d'un run à l'autre) et en Markdown. Avec
+--baseline, chaque requête est comparée au rapport JSON précédent : une
+requête plus lente de --threshold % ou dont le plan change est signalée
+(régression après un changement de schéma ou d'index).
+
+Base cible : RENDER_DATABASE_URL (.env ou environnement).
+
+Usage:
+    python benchmarks/bench_kpi_queries.py
+    python benchmarks/bench_kpi_queries.py --workers 8 --repeat 3
+    python benchmarks/bench_kpi_queries.py --out benchmarks/avant_index
+    python benchmarks/bench_kpi_queries.py --baseline benchmarks/avant_index.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from database.kpi_queries import KPI_SQL, analyze_queries, load_kpi_queries  # noqa: E402
+from database.setup_database import PARTITIONED_TABLES, DatabaseManager, pool_settings  # noqa: E402
+
+DEFAULT_OUT = ROOT / "benchmarks" / "kpi_report"
+
+
+def run(db: DatabaseManager, queries: list, workers: int, repeat: int) -> dict:
+    """Meilleure mesure (wall_ms) de chaque requête sur `repeat` passes."""
+    best = {}
+    for _ in range(repeat):
+        for name, result in analyze_queries(db.engine, queries, workers=workers, parents=PARTITIONED_TABLES).items():
+            previous = best.get(name)
+            if isinstance(result, str) or previous is None or isinstance(previous, str) \
+                    or result["wall_ms"] < previous["wall_ms"]:
+                best[name] = result
+    return best
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> dict:
+    """Requêtes plus lentes que la référence de plus de `threshold` %, ou au plan modifié."""
+    regressions = {}
+    for name, result in results.items():
+        before = baseline.get(name)
+        if isinstance(result, str) or not isinstance(before, dict):
+            continue
+        notes = []
+        ratio = result["execution_ms"] / before["execution_ms"] if before["execution_ms"] else 1.0
+        if ratio > 1 + threshold / 100:
+            notes.append(f"x{ratio:.2f} ({before['execution_ms']:.2f} -> {result['execution_ms']:.2f} ms)")
+        if result["nodes"] != before["nodes"]:
+            notes.append("plan modifié")
+        if notes:
+            regressions[name] = ", ".join(notes)
+    return regressions
+
+
+def to_markdown(report: dict) -> str:
+    lines = [
+        f"# Rapport KPI - {report['date']}",
+        "",
+        f"{len(report['queries'])} requêtes de `{report['source']}`, {report['workers']} connexions, "
+        f"meilleure de {report['repeat']} passe(s), total {report['total_s']:.2f} s.",
+        "",
+        "| Requête | Lignes | Wall (ms) | Exécution (ms) | Planif. (ms) | Hit | Read | Plan |",
+        "|---|---:|---:|---:|---:|---:|---:|---|",
+    ]
+    for name, r in report["queries"].items():
+        if isinstance(r, str):
+            lines.append(f"| {name} | | | | | | | {r} |")
+            continue
+        lines.append(f"| {name} | {r['rows']} | {r['wall_ms']:.2f} | {r['execution_ms']:.2f} | "
+                     f"{r['planning_ms']:.2f} | {r['shared_hit']} | {r['shared_read']} | "
+                     f"{', '.join(r['nodes'])} |")
+    if "regressions" in report:
+        lines += ["", f"## Régressions (référence : `{report['baseline']}`)", ""]
+        lines += [f"- {name} : {note}" for name, note in report["regressions"].items()] or ["- aucune"]
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rapport durée / EXPLAIN ANALYZE des requêtes KPI")
+    parser.add_argument("--workers", type=int, default=pool_settings()["pool_size"],
+                        help="Requêtes exécutées en parallèle (défaut : taille du pool)")
+    parser.add_argument("--repeat", type=int, default=1, help="Meilleure mesure sur N passes")
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT,
+                        help="Chemin du rapport sans extension (.json et .md écrits)")
+    parser.add_argument("--baseline", type=Path, help="Rapport JSON de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=20.0,
+                        help="Ralentissement signalé au-delà de ce pourcentage (avec --baseline)")
+    args = parser.parse_args()
+
+    db = DatabaseManager()
+    with contextlib.redirect_stdout(io.StringIO()):
+        db.connect_database()
+
+    queries = load_kpi_queries()
+    t0 = time.perf_counter()
+    results = run(db, queries, args.workers, args.repeat)
+    report = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "source": str(KPI_SQL.relative_to(ROOT)),
+        "workers": args.workers,
+        "repeat": args.repeat,
+        "total_s": round(time.perf_counter() - t0, 3),
+        "queries": results,
+    }
+    if args.baseline:
+        report["baseline"] = str(args.baseline)
+        report["regressions"] = compare(results, json.loads(args.baseline.read_text(encoding="utf-8"))["queries"],
+                                        args.threshold)
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    json_path, md_path = args.out.with_suffix(".json"), args.out.with_suffix(".md")
+    json_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    md_path.write_text(to_markdown(report), encoding="utf-8")
+
+    print(" REQUÊTES KPI")
+    print("=" * 60)
+    for name, r in results.items():
+        if isinstance(r, str):
+            print(f" {name}\n   {r}")
+        else:
+            print(f" {r['wall_ms']:8.2f} ms  {r['execution_ms']:8.2f} ms serveur  {r['rows']:5} lignes  {name}")
+    errors = sum(isinstance(r, str) for r in results.values())
+    print(f"\n {len(results) - errors}/{len(results)} requêtes en {report['total_s']:.2f}s ({args.workers} connexions)")
+    if "regressions" in report:
+        print(f" Régressions: {len(report['regressions'])}")
+        for name, note in report["regressions"].items():
+            print(f"   {name}: {note}")
+    print(f" Rapport: {json_path} / {md_path.name}")
+
+
+if __name__ == "__main__":
+    main()
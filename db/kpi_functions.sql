@@ -0,0 +1,82 @@
+-- Fonctions KPI paramétrées : une équipe ou une paire d'équipes
+-- Créées ou remplacées (CREATE OR REPLACE) en dernière étape de src/run_setup.py, après les vues.
+-- Les requêtes de db/kpi.sql portent sur toutes les équipes ; ces fonctions ne lisent
+-- que les lignes demandées, en un aller-retour (DatabaseManager.team_record, head_to_head...).
+-- LANGUAGE sql STABLE, une seule requête : le planificateur déplie la fonction dans la
+-- requête appelante et lit les vues de db/kpi_views.sql par leurs index :
+--   - bilan : idx_mv_team_record_name (competition, "Team_name"),
+--   - matchs d'une équipe : idx_mv_team_matches_team (competition, "Team_name", date, id_match),
+--   - matchs d'une paire : idx_mv_team_matches_pair (competition, "Team_name", opponent, date, id_match),
+--   - équipes d'une paire : uq_teams_reference_name ("Team_name", competition).
+-- Vues non partitionnées : pas de planification des partitions de team_match à chaque appel.
+-- Noms d'équipe : "Team_name" exact de teams_reference. Équipe inconnue : aucune ligne.
+--
+--   SELECT * FROM kpi_team_record('wc_men', 'France');
+--   SELECT * FROM kpi_team_matches('wc_men', 'France');
+--   SELECT * FROM kpi_head_to_head('wc_men', 'France', 'Germany');
+--   SELECT * FROM kpi_head_to_head_matches('wc_men', 'France', 'Germany');
+
+
+-- Bilan d'une équipe (ligne de mv_team_record)
+CREATE OR REPLACE FUNCTION kpi_team_record(p_competition TEXT, p_team TEXT)
+RETURNS TABLE (competition TEXT, id_team INTEGER, team TEXT,
+               matches_played BIGINT, final_matches BIGINT,
+               wins BIGINT, draws BIGINT, losses BIGINT, win_rate_pct NUMERIC,
+               goals_scored BIGINT, goals_conceded BIGINT,
+               max_goals_in_match INTEGER, max_goals_conceded INTEGER)
+LANGUAGE sql STABLE AS $$
+    SELECT r.competition, r.id_team, r."Team_name",
+           r.matches_played, r.final_matches, r.wins, r.draws, r.losses, r.win_rate_pct,
+           r.goals_scored, r.goals_conceded, r.max_goals_in_match, r.max_goals_conceded
+    FROM mv_team_record r
+    WHERE r.competition = p_competition AND r."Team_name" = p_team
+$$;
+
+
+-- Matchs d'une équipe (tous matchs), du plus ancien au plus récent
+CREATE OR REPLACE FUNCTION kpi_team_matches(p_competition TEXT, p_team TEXT)
+RETURNS TABLE (edition TEXT, date DATE, round TEXT, is_final BOOLEAN, is_home BOOLEAN,
+               opponent TEXT, goals_for INTEGER, goals_against INTEGER, outcome TEXT)
+LANGUAGE sql STABLE AS $$
+    SELECT tm.edition, tm.date, tm.round, tm.is_final, tm.is_home,
+           tm.opponent, tm.goals_for, tm.goals_against, tm.outcome
+    FROM mv_team_matches tm
+    WHERE tm.competition = p_competition AND tm."Team_name" = p_team
+    ORDER BY tm.date, tm.id_match
+$$;
+
+
+-- Confrontations (tous matchs) du point de vue de p_team_1 : une ligne, à zéro
+-- si les deux équipes ne se sont jamais rencontrées
+CREATE OR REPLACE FUNCTION kpi_head_to_head(p_competition TEXT, p_team_1 TEXT, p_team_2 TEXT)
+RETURNS TABLE (team_1 TEXT, team_2 TEXT, matches BIGINT,
+               wins_1 BIGINT, wins_2 BIGINT, draws BIGINT,
+               goals_1 BIGINT, goals_2 BIGINT)
+LANGUAGE sql STABLE AS $$
+    SELECT t1."Team_name", t2."Team_name",
+           COUNT(tm.id_match),
+           COUNT(*) FILTER (WHERE tm.outcome = 'W'),
+           COUNT(*) FILTER (WHERE tm.outcome = 'L'),
+           COUNT(*) FILTER (WHERE tm.outcome = 'D'),
+           COALESCE(SUM(tm.goals_for), 0),
+           COALESCE(SUM(tm.goals_against), 0)
+    FROM teams_reference t1
+    JOIN teams_reference t2 ON t2.competition = t1.competition AND t2."Team_name" = p_team_2
+    LEFT JOIN mv_team_matches tm ON tm.competition = t1.competition
+                                AND tm."Team_name" = t1."Team_name" AND tm.opponent = t2."Team_name"
+    WHERE t1.competition = p_competition AND t1."Team_name" = p_team_1
+    GROUP BY t1."Team_name", t2."Team_name"
+$$;
+
+
+-- Matchs entre deux équipes, du point de vue de p_team_1
+CREATE OR REPLACE FUNCTION kpi_head_to_head_matches(p_competition TEXT, p_team_1 TEXT, p_team_2 TEXT)
+RETURNS TABLE (edition TEXT, date DATE, round TEXT, is_final BOOLEAN, is_home BOOLEAN,
+               goals_1 INTEGER, goals_2 INTEGER, outcome TEXT)
+LANGUAGE sql STABLE AS $$
+    SELECT tm.edition, tm.date, tm.round, tm.is_final, tm.is_home,
+           tm.goals_for, tm.goals_against, tm.outcome
+    FROM mv_team_matches tm
+    WHERE tm.competition = p_competition AND tm."Team_name" = p_team_1 AND tm.opponent = p_team_2
+    ORDER BY tm.date, tm.id_match
+$$;
@@ -0,0 +1,113 @@
+-- Vues matérialisées des agrégats KPI
+-- Créées si absentes puis rafraîchies (REFRESH MATERIALIZED VIEW CONCURRENTLY) en
+-- dernière étape de src/run_setup.py : les agrégats sur team_match (une ligne par équipe
+-- et par match) ne sont plus recalculés à chaque requête de tableau de bord.
+-- Chaque vue a un index unique (obligatoire pour CONCURRENTLY) et des index de lecture.
+-- Résultats : outcome de team_match (NULL si score manquant : ni victoire, ni nul, ni défaite).
+--
+-- Lectures tableau de bord (recherches par index) :
+--   SELECT * FROM mv_team_record WHERE competition = 'wc_men' ORDER BY wins DESC LIMIT 10;
+--   SELECT * FROM mv_team_record WHERE competition = 'wc_men' AND "Team_name" = 'France';
+--   SELECT * FROM mv_edition_summary WHERE competition = 'wc_men' ORDER BY edition;
+--   SELECT * FROM mv_team_edition WHERE competition = 'wc_men' AND losses = 0;
+--   SELECT * FROM mv_head_to_head WHERE competition = 'wc_men' ORDER BY matches DESC LIMIT 10;
+--   SELECT * FROM mv_team_matches WHERE competition = 'wc_men' AND "Team_name" = 'France' ORDER BY date;
+
+
+-- Bilan par équipe : matchs joués et records sur tous les matchs,
+-- victoires / nuls / défaites / taux / buts sur le tournoi final
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_team_record AS
+SELECT t.competition, t.id_team, t."Team_name",
+       COUNT(*) AS matches_played,
+       COUNT(*) FILTER (WHERE m.is_final) AS final_matches,
+       COUNT(*) FILTER (WHERE m.is_final AND tm.outcome = 'W') AS wins,
+       COUNT(*) FILTER (WHERE m.is_final AND tm.outcome = 'D') AS draws,
+       COUNT(*) FILTER (WHERE m.is_final AND tm.outcome = 'L') AS losses,
+       ROUND(100.0 * COUNT(*) FILTER (WHERE m.is_final AND tm.outcome = 'W')
+             / NULLIF(COUNT(*) FILTER (WHERE m.is_final), 0), 2) AS win_rate_pct,
+       COALESCE(SUM(tm.goals_for) FILTER (WHERE m.is_final), 0) AS goals_scored,
+       COALESCE(SUM(tm.goals_against) FILTER (WHERE m.is_final), 0) AS goals_conceded,
+       MAX(tm.goals_for) AS max_goals_in_match,
+       MAX(tm.goals_against) AS max_goals_conceded
+FROM team_match tm
+JOIN matches_normalized m ON m.id_match = tm.id_match AND m.competition = tm.competition
+JOIN teams_reference t ON t.id_team = tm.id_team AND t.competition = tm.competition
+GROUP BY t.competition, t.id_team, t."Team_name";
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_team_record ON mv_team_record (competition, id_team);
+CREATE INDEX IF NOT EXISTS idx_mv_team_record_name ON mv_team_record (competition, "Team_name");
+CREATE INDEX IF NOT EXISTS idx_mv_team_record_wins ON mv_team_record (competition, wins DESC);
+
+
+-- Synthèse par édition (tournoi final) : matchs, buts, moyenne, taux de nuls
+-- (une ligne par match : côté domicile de team_match)
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_edition_summary AS
+SELECT m.competition, m.edition,
+       COUNT(*) AS total_matches,
+       SUM(tm.goals_for + tm.goals_against) AS total_goals,
+       ROUND(AVG(tm.goals_for + tm.goals_against), 2) AS avg_goals_per_match,
+       ROUND(100.0 * COUNT(*) FILTER (WHERE tm.outcome = 'D') / COUNT(*), 2) AS draw_rate_pct
+FROM team_match tm
+JOIN matches_normalized m ON m.id_match = tm.id_match AND m.competition = tm.competition
+WHERE m.is_final = true AND tm.is_home
+GROUP BY m.competition, m.edition;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_edition_summary ON mv_edition_summary (competition, edition);
+
+
+-- Bilan équipe x édition (tournoi final) ; invaincues : losses = 0
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_team_edition AS
+SELECT m.competition, m.edition, t.id_team, t."Team_name",
+       COUNT(*) AS matches_played,
+       COUNT(*) FILTER (WHERE tm.outcome = 'W') AS wins,
+       COUNT(*) FILTER (WHERE tm.outcome = 'D') AS draws,
+       COUNT(*) FILTER (WHERE tm.outcome = 'L') AS losses,
+       COALESCE(SUM(tm.goals_for), 0) AS goals_scored,
+       COALESCE(SUM(tm.goals_against), 0) AS goals_conceded
+FROM team_match tm
+JOIN matches_normalized m ON m.id_match = tm.id_match AND m.competition = tm.competition
+JOIN teams_reference t ON t.id_team = tm.id_team AND t.competition = tm.competition
+WHERE m.is_final = true
+GROUP BY m.competition, m.edition, t.id_team, t."Team_name";
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_team_edition ON mv_team_edition (competition, edition, id_team);
+CREATE INDEX IF NOT EXISTS idx_mv_team_edition_unbeaten ON mv_team_edition (competition, edition) WHERE losses = 0;
+
+
+-- Confrontations (paire non ordonnée, tous matchs) : nombre de matchs et bilan
+-- (auto-jointure de team_match sur le match, id_team_1 < id_team_2)
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_head_to_head AS
+SELECT tm1.competition, tm1.id_team AS id_team_1, t1."Team_name" AS team_1,
+       tm2.id_team AS id_team_2, t2."Team_name" AS team_2,
+       COUNT(*) AS matches,
+       COUNT(*) FILTER (WHERE tm1.outcome = 'W') AS wins_1,
+       COUNT(*) FILTER (WHERE tm1.outcome = 'L') AS wins_2,
+       COUNT(*) FILTER (WHERE tm1.outcome = 'D') AS draws
+FROM team_match tm1
+JOIN team_match tm2 ON tm2.id_match = tm1.id_match AND tm2.competition = tm1.competition
+                   AND tm2.id_team > tm1.id_team
+JOIN teams_reference t1 ON t1.id_team = tm1.id_team AND t1.competition = tm1.competition
+JOIN teams_reference t2 ON t2.id_team = tm2.id_team AND t2.competition = tm2.competition
+GROUP BY tm1.competition, tm1.id_team, t1."Team_name", tm2.id_team, t2."Team_name";
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_head_to_head ON mv_head_to_head (competition, id_team_1, id_team_2);
+CREATE INDEX IF NOT EXISTS idx_mv_head_to_head_matches ON mv_head_to_head (competition, matches DESC);
+
+
+-- Matchs par équipe (tous matchs) avec adversaire, date et score : une ligne par équipe
+-- et par match. Table non partitionnée : une recherche par équipe ou par paire est un
+-- seul parcours d'index (fonctions de db/kpi_functions.sql), sans planifier les partitions.
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_team_matches AS
+SELECT tm.competition, tm.id_team, t."Team_name", tmo.id_team AS id_opponent, o."Team_name" AS opponent,
+       tm.id_match, m.edition, m.date, m.round, m.is_final, tm.is_home,
+       tm.goals_for, tm.goals_against, tm.outcome
+FROM team_match tm
+JOIN team_match tmo ON tmo.id_match = tm.id_match AND tmo.competition = tm.competition
+                   AND tmo.is_home <> tm.is_home
+JOIN matches_normalized m ON m.id_match = tm.id_match AND m.competition = tm.competition
+JOIN teams_reference t ON t.id_team = tm.id_team AND t.competition = tm.competition
+JOIN teams_reference o ON o.id_team = tmo.id_team AND o.competition = tmo.competition;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_team_matches ON mv_team_matches (competition, id_team, id_match);
+CREATE INDEX IF NOT EXISTS idx_mv_team_matches_team ON mv_team_matches (competition, "Team_name", date, id_match);
+CREATE INDEX IF NOT EXISTS idx_mv_team_matches_pair ON mv_team_matches (competition, "Team_name", opponent, date, id_match);
@@ -1,15 +1,19 @@
 from __future__ import annotations
 
 from pathlib import Path
+import argparse
 import re
 import unicodedata
 import pandas as pd
 
+from pipeline.paths import COMPETITION_COLUMN, competition_key, data_dir
+from pipeline.sharding import ShardResult, get_shared, resolve_workers, run_sharded
+
 # =============================================================================
 # 1. CONFIGURATION & CHEMINS
 # =============================================================================
 ROOT = Path(__file__).resolve().parents[1]
-DATA = ROOT / "data"
+DATA = data_dir()  # data/ ou FIFA_DATA_DIR (mode échantillon)
 
 IN_V2 = DATA / "processed" / "matches_unified_v2.csv"
 
@@ -21,6 +25,7 @@ OUT_QA = DATA / "reference" / "qa_team_collisions.csv"
 
 OUT_V3.parent.mkdir(parents=True, exist_ok=True)
 OUT_DIM.parent.mkdir(parents=True, exist_ok=True)
+OUT_ALIASES.parent.mkdir(parents=True, exist_ok=True)
 
 
 # =============================================================================
@@ -252,25 +257,11 @@ def build_country_resolver():
 
 
 # =============================================================================
-# 4. MAIN SCRIPT
+# 4. ÉTAPES (shardables par édition)
 # =============================================================================
-def main() -> None:
-    print(f"Chargement V2 depuis {IN_V2}")
-    if not IN_V2.exists():
-        print("ERREUR : Le fichier matches_unified_v2.csv n'existe pas !")
-        return
-
-    df = pd.read_csv(IN_V2)
-
-    required = ["home_team", "away_team", "home_result", "away_result", "date", "round", "city", "edition"]
-    missing = [c for c in required if c not in df.columns]
-    if missing:
-        raise KeyError(f"Colonnes manquantes dans V2: {missing}")
-
-    before = len(df)
-
+def clean_matches(df: pd.DataFrame) -> ShardResult:
+    """Hard fixes, filtre anti-garbage et nettoyage standard (ligne à ligne)."""
     # 1. APPLICATION DES HARD FIXES (Globales)
-    print("Application des correctifs manuels (Force 'Cote d Ivoire')...")
     for col in ["home_team", "away_team", "result"]:
         if col in df.columns:
             df[col] = df[col].replace(MANUAL_CORRECTIONS)
@@ -278,7 +269,6 @@ def main() -> None:
             df[col] = df[col].apply(lambda x: "Cote d Ivoire" if isinstance(x, str) and ("ote" in x.lower() or "cte" in x.lower()) and "ivoire" in x.lower() else x)
 
     # 2. FILTRE ANTI-GARBAGE
-    print("Filtrage des lignes fantômes (Winner X, Loser Y)...")
     mask_garbage = df["home_team"].apply(is_garbage_row) | df["away_team"].apply(is_garbage_row)
     df = df[~mask_garbage].copy()
 
@@ -303,7 +293,12 @@ def main() -> None:
     df = df.loc[~ghost].copy()
     df["is_placeholder_date"] = df["date"].astype(str).map(is_placeholder_date)
 
-    # 4. CONSTRUCTION DIM_TEAMS
+    stats = {"garbage": int(mask_garbage.sum()), "invalid_team": int(invalid_team.sum()), "ghost": int(ghost.sum())}
+    return df, stats
+
+
+def build_team_index(df: pd.DataFrame):
+    """Construction dim_teams / aliases / QA (global, sur toutes les éditions)."""
     resolve = build_country_resolver()
     raw_teams = pd.concat([df["home_team_raw"], df["away_team_raw"]]).dropna().astype(str).unique().tolist()
 
@@ -355,10 +350,13 @@ def main() -> None:
         .agg(n_variants=("team_raw", "nunique"), variants=("team_clean", lambda s: ", ".join(sorted(set(s))[:30])))
         .reset_index().sort_values("n_variants", ascending=False)
     )
+    return dim, aliases_df, unknown, qa
 
-    # 5. MAPPING FINAL & EXPORT
-    raw_to_id = dict(zip(aliases_df["team_raw"], aliases_df["team_id"]))
-    id_to_canonical = dict(zip(dim["team_id"], dim["team_canonical"]))
+
+def resolve_matches(df: pd.DataFrame) -> ShardResult:
+    """Mapping IDs via l'index partagé, dédoublonnage et résultat (par édition)."""
+    index = get_shared()
+    raw_to_id, id_to_canonical = index["raw_to_id"], index["id_to_canonical"]
 
     df["home_team_id"] = df["home_team_raw"].map(raw_to_id)
     df["away_team_id"] = df["away_team_raw"].map(raw_to_id)
@@ -367,11 +365,61 @@ def main() -> None:
 
     df = df.loc[df["home_team_id"].notna() & df["away_team_id"].notna()].copy()
 
+    # match_key contient edition_year : les doublons ne traversent jamais deux shards
     match_key = ["edition_year", "date", "home_team_id", "away_team_id", "home_result", "away_result", "round"]
+    n = len(df)
     df = df.drop_duplicates(subset=match_key, keep="first").copy()
-    df = df.reset_index(drop=True)
+    df["result"] = df.apply(compute_result, axis=1) if len(df) else pd.Series(dtype="object")
+    return df, {"duplicates": n - len(df)}
+
+
+# =============================================================================
+# 5. MAIN SCRIPT
+# =============================================================================
+def main(workers: int = 1, backend: str = "pandas") -> None:
+    print(f"Chargement V2 depuis {IN_V2}")
+    if not IN_V2.exists():
+        print("ERREUR : Le fichier matches_unified_v2.csv n'existe pas !")
+        return
+
+    df = pd.read_csv(IN_V2)
+
+    required = ["home_team", "away_team", "home_result", "away_result", "date", "round", "city", "edition"]
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        raise KeyError(f"Colonnes manquantes dans V2: {missing}")
+
+    # Clé de partition compétition (absente des V2 mono-compétition)
+    if COMPETITION_COLUMN not in df.columns:
+        df[COMPETITION_COLUMN] = competition_key()
+
+    before = len(df)
+    workers = resolve_workers(workers)
+    if workers > 1:
+        print(f"Mode shardé : {workers} workers, découpage par édition")
+
+    # Clé de sharding (recalculée à l'identique dans clean_matches)
+    df["edition_year"] = extract_year_from_edition_label(df["edition"].astype(str))
+
+    # 1-3. HARD FIXES + ANTI-GARBAGE + NETTOYAGE STANDARD
+    print("Application des correctifs manuels (Force 'Cote d Ivoire')...")
+    print("Filtrage des lignes fantômes (Winner X, Loser Y)...")
+    df, clean_stats = run_sharded(clean_matches, df, workers=workers)
+
+    # 4. CONSTRUCTION DIM_TEAMS (index global, partagé en lecture seule)
+    dim, aliases_df, unknown, qa = build_team_index(df)
+    shared_index = {
+        "raw_to_id": dict(zip(aliases_df["team_raw"], aliases_df["team_id"])),
+        "id_to_canonical": dict(zip(dim["team_id"], dim["team_canonical"])),
+    }
+
+    # 5. MAPPING FINAL & EXPORT
+    if backend == "polars":
+        from pipeline.polars_backend import resolve_matches_lazy
+        df, resolve_stats = resolve_matches_lazy(df, **shared_index)
+    else:
+        df, resolve_stats = run_sharded(resolve_matches, df, workers=workers, shared=shared_index)
     df["id_match"] = range(1, len(df) + 1)
-    df["result"] = df.apply(compute_result, axis=1)
 
     after = len(df)
 
@@ -383,7 +431,7 @@ def main() -> None:
     cols_out = [
         "id_match", "edition", "edition_year", "date", "round", "city",
         "home_team_id", "away_team_id", "home_team_canonical", "away_team_canonical",
-        "home_result", "away_result", "result", "is_placeholder_date"
+        "home_result", "away_result", "result", "is_placeholder_date", COMPETITION_COLUMN
     ]
     cols_out = [c for c in cols_out if c in df.columns]
     df[cols_out].to_csv(OUT_V3, index=False, encoding="utf-8")
@@ -391,8 +439,20 @@ def main() -> None:
     print(f"\n[SUCCÈS] CSV Clean généré : {OUT_V3}")
     print(f"Lignes avant nettoyage: {before}")
     print(f"Lignes après nettoyage: {after}")
+    print(f"Lignes retirées: {clean_stats} | {resolve_stats}")
     print(f"Pays uniques: {len(dim)}")
     print("Vérification : Cote d Ivoire (avec espace) doit être le seul nom UNIQUE !")
 
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="V2 -> V3 : nettoyage et référentiels équipes")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Nombre de processus (shards par édition). 1 = série, 0 = tous les cœurs")
+    parser.add_argument("--backend", choices=["pandas", "polars"], default="pandas",
+                        help="Moteur de la résolution des équipes (polars = plan lazy, optionnel)")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(workers=args.workers, backend=args.backend)
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
+import argparse
 import hashlib
 import re
 from pathlib import Path
 
 import pandas as pd
 
+from pipeline.paths import COMPETITION_COLUMN, competition_key, data_dir
+from pipeline.sharding import ShardResult, run_sharded
+
 ROOT = Path(__file__).resolve().parents[1]
-DATA = ROOT / "data"
+DATA = data_dir()  # data/ ou FIFA_DATA_DIR (mode échantillon)
 
 IN_V3 = DATA / "processed" / "matches_unified_v3.csv"
 
@@ -66,30 +70,8 @@ def make_match_uid(row: pd.Series) -> str:
     return hashlib.sha1(raw).hexdigest()
 
 
-def main() -> None:
-    df = pd.read_csv(IN_V3)
-
-    # -----------------------
-    # 0) Colonnes attendues (V3 ID-based)
-    # -----------------------
-    required = [
-        "edition",
-        "date",
-        "round",
-        "city",
-        "home_team_id",
-        "away_team_id",
-        "home_team_canonical",
-        "away_team_canonical",
-        "home_result",
-        "away_result",
-    ]
-    missing = [c for c in required if c not in df.columns]
-    if missing:
-        raise KeyError(f"Colonnes manquantes dans V3: {missing} (colonnes: {df.columns.tolist()})")
-
-    before = len(df)
-
+def transform_matches(df: pd.DataFrame) -> ShardResult:
+    """Nettoyage, dates, résultat et dédoublonnage (indépendants par édition)."""
     # -----------------------
     # 1) Nettoyage texte
     # -----------------------
@@ -125,14 +107,66 @@ def main() -> None:
     df["result"] = df.apply(
         lambda r: compute_result_ids(r["home_team_id"], r["away_team_id"], r["home_result"], r["away_result"]),
         axis=1,
-    )
+    ) if len(df) else pd.Series(dtype="object")
 
     # -----------------------
-    # 5) UID + dédoublonnage
+    # 5) UID + dédoublonnage (l'UID contient l'édition : pas de doublon inter-shards)
     # -----------------------
-    df["match_uid"] = df.apply(make_match_uid, axis=1)
+    df["match_uid"] = df.apply(make_match_uid, axis=1) if len(df) else pd.Series(dtype="object")
     df = df.drop_duplicates(subset=["match_uid"], keep="first").copy()
 
+    return df, {"ghost": int(ghost.sum()), "bad_ids": int(bad_ids.sum())}
+
+
+REQUIRED_V3 = [
+    "edition",
+    "date",
+    "round",
+    "city",
+    "home_team_id",
+    "away_team_id",
+    "home_team_canonical",
+    "away_team_canonical",
+    "home_result",
+    "away_result",
+]
+
+# Sortie V4 = 12 colonnes (fact ID-based, clé de partition compétition et UID stable en fin)
+V4_COLUMNS = [
+    "id_match",
+    "home_team_id",
+    "away_team_id",
+    "home_result",
+    "away_result",
+    "result",
+    "date",
+    "round",
+    "city",
+    "edition",
+    COMPETITION_COLUMN,
+    "match_uid",
+]
+
+
+def build_v4(df: pd.DataFrame, workers: int = 1) -> tuple[pd.DataFrame, pd.DataFrame, dict[str, int]]:
+    """V3 -> (fact V4, dimension teams, compteurs qualité) avec le backend pandas."""
+    # -----------------------
+    # 0) Colonnes attendues (V3 ID-based)
+    # -----------------------
+    missing = [c for c in REQUIRED_V3 if c not in df.columns]
+    if missing:
+        raise KeyError(f"Colonnes manquantes dans V3: {missing} (colonnes: {df.columns.tolist()})")
+
+    before = len(df)
+    if COMPETITION_COLUMN not in df.columns:  # V3 antérieure au partitionnement
+        df[COMPETITION_COLUMN] = competition_key()
+
+    # -----------------------
+    # 1-5) Transformations par édition (série ou pool de processus)
+    # -----------------------
+    shard_key = "edition_year" if "edition_year" in df.columns else "edition"
+    df, stats = run_sharded(transform_matches, df, workers=workers, key=shard_key)
+
     # -----------------------
     # 6) Recréer id_match séquentiel
     # -----------------------
@@ -173,37 +207,36 @@ def main() -> None:
     )
 
     # -----------------------
-    # 8) Sortie V4 = 10 colonnes (fact ID-based)
+    # 8) Sortie V4
     # -----------------------
-    out_cols = [
-        "id_match",
-        "home_team_id",
-        "away_team_id",
-        "home_result",
-        "away_result",
-        "result",
-        "date",
-        "round",
-        "city",
-        "edition",
-    ]
-    df_out = df[out_cols].copy()
+    df_out = df[V4_COLUMNS].copy()
 
     df_out["home_result"] = df_out["home_result"].astype("Int64")
     df_out["away_result"] = df_out["away_result"].astype("Int64")
     df_out["home_team_id"] = df_out["home_team_id"].astype("Int64")
     df_out["away_team_id"] = df_out["away_team_id"].astype("Int64")
 
+    stats = {
+        "before": before,
+        "ghost": stats.get("ghost", 0),
+        "bad_ids": stats.get("bad_ids", 0),
+        "placeholder": int(df["date_is_placeholder"].sum()),
+    }
+    return df_out, teams, stats
+
+
+def write_v4(df_out: pd.DataFrame, teams: pd.DataFrame, stats: dict[str, int]) -> None:
+    """Écriture V4 + dimension teams + rapport qualité."""
     # -----------------------
     # 9) Rapport qualité
     # -----------------------
     after = len(df_out)
 
     report_lines = [
-        f"V3 -> V4 rows: {before} -> {after}",
-        f"ghost removed: {int(ghost.sum())}",
-        f"bad team_id rows removed: {int(bad_ids.sum())}",
-        f"placeholder dates (set to NULL): {int(df['date_is_placeholder'].sum())}",
+        f"V3 -> V4 rows: {stats['before']} -> {after}",
+        f"ghost removed: {stats['ghost']}",
+        f"bad team_id rows removed: {stats['bad_ids']}",
+        f"placeholder dates (set to NULL): {stats['placeholder']}",
         f"n_teams_dim: {len(teams)}",
         "",
         "round value_counts:",
@@ -220,5 +253,25 @@ def main() -> None:
     print("OK ->", OUT_REPORT)
 
 
+def main(workers: int = 1, backend: str = "pandas") -> None:
+    if backend == "polars":
+        from pipeline.polars_backend import build_v4_lazy
+        df_out, teams, stats = build_v4_lazy(IN_V3)
+    else:
+        df_out, teams, stats = build_v4(pd.read_csv(IN_V3), workers=workers)
+
+    write_v4(df_out, teams, stats)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="V3 -> V4 : règles métier finales")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Nombre de processus (shards par édition). 1 = série, 0 = tous les cœurs")
+    parser.add_argument("--backend", choices=["pandas", "polars"], default="pandas",
+                        help="Moteur de transformation (polars = plan lazy, optionnel)")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    main(workers=args.workers, backend=args.backend)
@@ -0,0 +1,66 @@
+"""
+Classements des groupes
+=======================
+
+Étape après 07 : classement de tous les groupes de toutes les éditions
+depuis la V4 (matches_unified_v4.csv + teams_v4.csv), en une passe
+vectorisée (voir pipeline.standings) : éditions à une seule phase de
+poules (GROUP_STAGE_FORMATS), groupes retrouvés par composantes connexes et
+vérifiés (échec de l'étape sinon) ; les éditions sans format déclaré (dont
+toute compétition absente de GROUP_STAGE_FORMATS) sont signalées et non
+classées. Points (2 par victoire avant 1994, 3 ensuite), départage, rang et
+équipes qualifiées. Les éditions dont des matchs de poule manquent dans la
+V4 sont signalées. Écrit
+data/clean/group_standings.csv, chargé par src/run_setup.py dans la table
+group_standings.
+
+Usage:
+    python src/07b_group_standings.py
+"""
+
+import time
+
+import pandas as pd
+
+from pipeline.paths import data_dir
+from pipeline.standings import expected_matches, group_standings, undeclared_editions
+
+DATA = data_dir()
+IN_MATCHES_V4 = DATA / "processed" / "matches_unified_v4.csv"
+IN_TEAMS_V4 = DATA / "reference" / "teams_v4.csv"
+OUT_STANDINGS = DATA / "clean" / "group_standings.csv"
+
+
+def main():
+    print(" CLASSEMENTS DES GROUPES")
+    print("=" * 40)
+    matches = pd.read_csv(IN_MATCHES_V4)
+    teams = pd.read_csv(IN_TEAMS_V4)
+
+    start = time.perf_counter()
+    standings = group_standings(matches, teams)
+    elapsed = time.perf_counter() - start
+
+    skipped = undeclared_editions(matches)
+    if skipped:
+        print(f" Éditions sans format déclaré (non classées): "
+              f"{', '.join(f'{competition} {edition}' for competition, edition in skipped)}")
+    groups = standings[["competition", "edition", "group_name"]].drop_duplicates()
+    print(f" {len(groups)} groupes sur {standings['edition'].nunique()} éditions, "
+          f"{len(standings)} lignes en {elapsed * 1000:.1f} ms")
+    print(f" Équipes qualifiées: {int(standings['qualified'].sum())}")
+
+    # Chaque match compte pour deux lignes (une par équipe)
+    played = standings.groupby(["competition", "edition"])["played"].sum() // 2
+    missing = {key: expected_matches(*key) - n for key, n in played.items() if n < expected_matches(*key)}
+    if missing:
+        print(f" Matchs de poule absents de la V4 (groupes classés sur les matchs présents): "
+              f"{', '.join(f'{edition} ({n})' for (_, edition), n in missing.items())}")
+
+    OUT_STANDINGS.parent.mkdir(parents=True, exist_ok=True)
+    standings.to_csv(OUT_STANDINGS, index=False, encoding="utf-8")
+    print("OK ->", OUT_STANDINGS)
+
+
+if __name__ == "__main__":
+    main()
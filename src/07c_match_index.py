@@ -0,0 +1,51 @@
+"""
+Index des matchs
+================
+
+Étape après 07 : structures de lecture rapide construites depuis la V4
+(matches_unified_v4.csv + teams_v4.csv), séparées de 07 pour qu'un échec
+ici n'empêche pas la V4 d'être écrite :
+  - <partition>/reference/team_index/ (pipeline.team_index) : index inversé
+    équipe -> matchs et matrice CSR des confrontations,
+  - <partition>/processed/match_store/ (pipeline.match_store) : magasin
+    memmap interrogé par src/run_matches.py.
+
+Usage:
+    python src/07c_match_index.py
+"""
+
+import time
+
+import pandas as pd
+
+from pipeline.match_store import STORE_DIR, build_match_store
+from pipeline.paths import data_dir
+from pipeline.team_index import INDEX_DIR, build_team_index, index_version, write_team_index
+
+DATA = data_dir()
+IN_MATCHES_V4 = DATA / "processed" / "matches_unified_v4.csv"
+IN_TEAMS_V4 = DATA / "reference" / "teams_v4.csv"
+OUT_TEAM_INDEX = DATA / "reference" / INDEX_DIR  # index équipe -> matchs + matrice des confrontations
+OUT_MATCH_STORE = DATA / "processed" / STORE_DIR  # magasin memmap (src/run_matches.py)
+
+
+def main():
+    print(" INDEX DES MATCHS")
+    print("=" * 40)
+
+    start = time.perf_counter()
+    index = build_team_index(pd.read_csv(IN_MATCHES_V4), pd.read_csv(IN_TEAMS_V4))
+    write_team_index(index, OUT_TEAM_INDEX, index_version(IN_MATCHES_V4, IN_TEAMS_V4))
+    print(f" Index des équipes: {len(index.team_ids)} équipes, {len(index.match_ids)} matchs "
+          f"en {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    rows = build_match_store(IN_MATCHES_V4, IN_TEAMS_V4, OUT_MATCH_STORE)
+    print(f" Magasin memmap: {rows} matchs en {time.perf_counter() - start:.2f}s")
+
+    print("OK ->", OUT_TEAM_INDEX)
+    print("OK ->", OUT_MATCH_STORE)
+
+
+if __name__ == "__main__":
+    main()
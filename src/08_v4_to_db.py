@@ -1,12 +1,22 @@
+import argparse
+
 import pandas as pd
 import numpy as np
 
-def generate_final_kpi_table():
-    print("Chargement des données...")
-    # 1. Charger les deux fichiers propres
-    df_matches = pd.read_csv("data/processed/matches_unified_v4.csv")
-    df_teams = pd.read_csv("data/reference/teams_v4.csv")
+from pipeline.paths import COMPETITION_COLUMN, data_dir
+
+DATA = data_dir()  # data/ ou FIFA_DATA_DIR (mode échantillon)
+
+IN_MATCHES_V4 = DATA / "processed" / "matches_unified_v4.csv"
+IN_TEAMS_V4 = DATA / "reference" / "teams_v4.csv"
+OUT_FINAL_KPI = DATA / "clean" / "matches_final_kpi.csv"
+
+# On considère que tout ce qui n'est pas "Preliminary" ou "Qualification" fait partie du tournoi final
+NON_FINAL_ROUNDS = ['Preliminary round', 'Qualification', 'Preliminaries']
 
+
+def build_final_kpi(df_matches, df_teams):
+    """V4 (IDs) + teams -> table analytique dénormalisée (noms de pays)"""
     # 2. Créer un dictionnaire pour traduire ID -> Nom
     # Ex: {78: 'France', 10: 'Argentina'}
     team_map = pd.Series(df_teams.team_canonical.values, index=df_teams.team_id).to_dict()
@@ -29,9 +39,7 @@ def generate_final_kpi_table():
     df_matches['edition_year'] = df_matches['edition'].astype(str).apply(lambda x: x.split('-')[0])
 
     # 6. Ajouter la colonne is_final
-    # On considère que tout ce qui n'est pas "Preliminary" ou "Qualification" fait partie du tournoi final
-    non_final_rounds = ['Preliminary round', 'Qualification', 'Preliminaries']
-    df_matches['is_final'] = ~df_matches['round'].isin(non_final_rounds)
+    df_matches['is_final'] = ~df_matches['round'].isin(NON_FINAL_ROUNDS)
 
     # 7. Sélectionner et ordonner EXACTEMENT les colonnes demandées
     # On renomme result_name en result pour écraser l'ancien
@@ -46,7 +54,9 @@ def generate_final_kpi_table():
         'round',
         'city',
         'edition_year', # Sera renommé en 'edition'
-        'is_final'      # Colonne bonus très utile
+        'is_final',     # Colonne bonus très utile
+        COMPETITION_COLUMN,  # Clé de partition (chargement par compétition)
+        'match_uid',    # UID stable de 07 (clé du chargement incrémental)
     ]
 
     df_final = df_matches[final_cols].copy()
@@ -54,6 +64,19 @@ def generate_final_kpi_table():
         'result_name': 'result',
         'edition_year': 'edition'
     }, inplace=True)
+    return df_final
+
+
+def generate_final_kpi_table(backend="pandas"):
+    print("Chargement des données...")
+    if backend == "polars":
+        from pipeline.polars_backend import build_final_kpi_lazy
+        df_final = build_final_kpi_lazy(IN_MATCHES_V4, IN_TEAMS_V4)
+    else:
+        # 1. Charger les deux fichiers propres
+        df_matches = pd.read_csv(IN_MATCHES_V4)
+        df_teams = pd.read_csv(IN_TEAMS_V4)
+        df_final = build_final_kpi(df_matches, df_teams)
 
     # 8. Vérifications
     print("\n--- Aperçu des 5 dernières lignes (2022) ---")
@@ -64,9 +87,15 @@ def generate_final_kpi_table():
     print(f"Équipes manquantes: {df_final['home_team'].isnull().sum()}")
 
     # 9. Sauvegarde
-    output_path = "data/clean/matches_final_kpi.csv"
-    df_final.to_csv(output_path, index=False)
-    print(f"\nFichier final généré avec succès : {output_path}")
+    df_final.to_csv(OUT_FINAL_KPI, index=False)
+    print(f"\nFichier final généré avec succès : {OUT_FINAL_KPI}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="V4 -> table analytique finale (matches_final_kpi.csv)")
+    parser.add_argument("--backend", choices=["pandas", "polars"], default="pandas",
+                        help="Moteur de transformation (polars = plan lazy, optionnel)")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    generate_final_kpi_table()
+    args = parse_args()
+    generate_final_kpi_table(backend=args.backend)
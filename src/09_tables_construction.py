@@ -4,21 +4,48 @@ Construction tables normalisées pour BDD
 
 Transformation des données vers modèle relationnel avec IDs numériques :
 1. Vérification exhaustivité équipes dans dim_teams
-2. Construction de 4 tables normalisées (matches, home_stats, away_stats, teams)
+2. Construction de 5 tables normalisées (matches, home_stats, away_stats, teams,
+   team_match) ; team_match : format long, une ligne par équipe et par match (is_home,
+   buts pour/contre, différence, issue W/D/L) pour les KPI par équipe
+
+Chaque table porte la colonne `competition` (clé de partition) : une
+compétition se recharge en base sans toucher aux autres. Les tables par match
+portent aussi `match_uid` (UID stable de l'étape 07), clé du chargement
+incrémental (run_setup.py --incremental).
 
 Usage:
     python src/09_tables_construction.py
+    python src/09_tables_construction.py --backend polars
+    python src/09_tables_construction.py --yes    # non interactif (runner)
 """
 
+import argparse
+
 import pandas as pd
 import numpy as np
 
+from pipeline.paths import COMPETITION_COLUMN, competition_key, data_dir
+
+CLEAN = data_dir() / "clean"
+
+IN_MATCHES_KPI = CLEAN / "matches_final_kpi.csv"
+IN_DIM_TEAMS = CLEAN / "dim_teams.csv"
+
+# Table -> fichier exporté dans data/clean/
+OUT_TABLES = {
+    'teams_reference': CLEAN / "teams_reference_normalized.csv",
+    'matches_normalized': CLEAN / "matches_normalized.csv",
+    'home_stats': CLEAN / "home_stats_normalized.csv",
+    'away_stats': CLEAN / "away_stats_normalized.csv",
+    'team_match': CLEAN / "team_match_normalized.csv",
+}
+
 def load_data():
     """Charger les données sources"""
     print(" Chargement des données...")
 
-    matches_df = pd.read_csv("data/clean/matches_final_kpi.csv")
-    teams_df = pd.read_csv("data/clean/dim_teams.csv")
+    matches_df = pd.read_csv(IN_MATCHES_KPI)
+    teams_df = pd.read_csv(IN_DIM_TEAMS)
 
     print(f" Matches loaded: {len(matches_df)} lignes")
     print(f" Teams loaded: {len(teams_df)} équipes")
@@ -64,6 +91,12 @@ def check_teams_completeness(matches_df, teams_df):
         print(" Toutes les équipes des matchs sont présentes dans dim_teams")
         return True
 
+def partition_key(matches_df):
+    """Compétition des matchs (une partition = une compétition)"""
+    if COMPETITION_COLUMN in matches_df.columns and len(matches_df):
+        return matches_df[COMPETITION_COLUMN].iloc[0]
+    return competition_key()
+
 def create_teams_reference(matches_df):
     """2.4 Créer référentiel exhaustif des équipes avec IDs"""
     print("\n CONSTRUCTION RÉFÉRENTIEL ÉQUIPES")
@@ -77,14 +110,18 @@ def create_teams_reference(matches_df):
     # Créer DataFrame avec IDs séquentiels
     teams_ref = pd.DataFrame({
         'id_team': range(1, len(all_teams) + 1),
-        'Team_name': all_teams
+        'Team_name': all_teams,
+        COMPETITION_COLUMN: partition_key(matches_df)
     })
 
     print(f" Référentiel créé: {len(teams_ref)} équipes avec IDs 1-{len(all_teams)}")
     return teams_ref
 
-def create_matches_table(matches_df, teams_ref):
-    """2.1 Créer table matches avec result = ID du gagnant ou 0 si nul"""
+def create_matches_table(matches_df, teams_ref, start_id=1):
+    """2.1 Créer table matches avec result = ID du gagnant ou 0 si nul
+
+    start_id : premier id_match (lots par édition en mode streaming)
+    """
     print("\n CONSTRUCTION TABLE MATCHES")
     print("=" * 50)
 
@@ -95,7 +132,7 @@ def create_matches_table(matches_df, teams_ref):
     matches_table = matches_df.copy()
 
     # Ajouter id_match séquentiel
-    matches_table['id_match'] = range(1, len(matches_table) + 1)
+    matches_table['id_match'] = range(start_id, start_id + len(matches_table))
 
     # Calculer result basé sur les scores
     def calculate_result(row):
@@ -116,14 +153,14 @@ def create_matches_table(matches_df, teams_ref):
     matches_table['result'] = matches_table.apply(calculate_result, axis=1)
     
     # Sélectionner colonnes finales
-    final_matches = matches_table[['id_match', 'result', 'date', 'round', 'city', 'edition', 'is_final']].copy()
+    final_matches = matches_table[['id_match', 'result', 'date', 'round', 'city', 'edition', 'is_final', COMPETITION_COLUMN, 'match_uid']].copy()
 
     print(f" Table matches créée: {len(final_matches)} lignes")
     print(f" Répartition résultats: {final_matches['result'].value_counts().sort_index().head()}")
 
     return final_matches
 
-def create_home_stats(matches_df, teams_ref):
+def create_home_stats(matches_df, teams_ref, start_id=1):
     """2.2 Créer table stats équipes domicile"""
     print("\n CONSTRUCTION TABLE HOME STATS")
     print("=" * 50)
@@ -133,10 +170,12 @@ def create_home_stats(matches_df, teams_ref):
 
     # Créer table home stats
     home_stats = pd.DataFrame({
-        'id_match': range(1, len(matches_df) + 1),
+        'id_match': range(start_id, start_id + len(matches_df)),
         'id_team': matches_df['home_team'].map(team_to_id),
         'Number_of_goals_scored': matches_df['home_result'],
-        'Number_of_goals_conceded': matches_df['away_result']
+        'Number_of_goals_conceded': matches_df['away_result'],
+        COMPETITION_COLUMN: matches_df[COMPETITION_COLUMN],
+        'match_uid': matches_df['match_uid']
     })
 
     # Supprimer lignes avec id_team manquant
@@ -146,7 +185,7 @@ def create_home_stats(matches_df, teams_ref):
     print(f" Home stats créées: {len(home_stats)} lignes")
     return home_stats
 
-def create_away_stats(matches_df, teams_ref):
+def create_away_stats(matches_df, teams_ref, start_id=1):
     """2.3 Créer table stats équipes extérieur"""
     print("\n CONSTRUCTION TABLE AWAY STATS")
     print("=" * 50)
@@ -156,10 +195,12 @@ def create_away_stats(matches_df, teams_ref):
 
     # Créer table away stats
     away_stats = pd.DataFrame({
-        'id_match': range(1, len(matches_df) + 1),
+        'id_match': range(start_id, start_id + len(matches_df)),
         'id_team': matches_df['away_team'].map(team_to_id),
         'Number_of_goals_scored': matches_df['away_result'],
-        'Number_of_goals_conceded': matches_df['home_result']
+        'Number_of_goals_conceded': matches_df['home_result'],
+        COMPETITION_COLUMN: matches_df[COMPETITION_COLUMN],
+        'match_uid': matches_df['match_uid']
     })
 
     # Supprimer lignes avec id_team manquant
@@ -169,7 +210,62 @@ def create_away_stats(matches_df, teams_ref):
     print(f" Away stats créées: {len(away_stats)} lignes")
     return away_stats
 
-def main():
+def create_team_match(home_stats, away_stats):
+    """2.5 Créer table long format : une ligne par équipe et par match
+
+    Issue W/D/L côté équipe (vide si score manquant) : les KPI par équipe
+    n'ont plus besoin de l'UNION ALL home/away ni des OR sur les scores.
+    """
+    print("\n CONSTRUCTION TABLE TEAM MATCH")
+    print("=" * 50)
+
+    sides = []
+    for stats, is_home in ((home_stats, True), (away_stats, False)):
+        sides.append(pd.DataFrame({
+            'id_match': stats['id_match'],
+            'id_team': stats['id_team'],
+            'is_home': is_home,
+            'goals_for': stats['Number_of_goals_scored'],
+            'goals_against': stats['Number_of_goals_conceded'],
+            'goal_diff': stats['Number_of_goals_scored'] - stats['Number_of_goals_conceded'],
+            COMPETITION_COLUMN: stats[COMPETITION_COLUMN],
+            'match_uid': stats['match_uid'],
+        }))
+
+    # Domicile puis extérieur pour chaque match
+    team_match = pd.concat(sides, ignore_index=True).sort_values('id_match', kind='mergesort')
+    team_match = team_match.reset_index(drop=True)
+
+    diff = team_match['goal_diff']
+    outcome = pd.Series(None, index=team_match.index, dtype=object)
+    outcome[diff > 0] = 'W'
+    outcome[diff == 0] = 'D'
+    outcome[diff < 0] = 'L'
+    team_match.insert(team_match.columns.get_loc('goal_diff') + 1, 'outcome', outcome)
+
+    print(f" Team match créée: {len(team_match)} lignes")
+    return team_match
+
+def build_tables(matches_df):
+    """Construire les 5 tables normalisées (backend pandas)"""
+    # 2.4 Créer référentiel équipes avec IDs
+    teams_reference = create_teams_reference(matches_df)
+
+    # 2.2 / 2.3 Créer tables home et away stats
+    home_stats = create_home_stats(matches_df, teams_reference)
+    away_stats = create_away_stats(matches_df, teams_reference)
+
+    return {
+        'teams_reference': teams_reference,
+        # 2.1 Créer table matches
+        'matches_normalized': create_matches_table(matches_df, teams_reference),
+        'home_stats': home_stats,
+        'away_stats': away_stats,
+        # 2.5 Créer table team_match (format long)
+        'team_match': create_team_match(home_stats, away_stats),
+    }
+
+def main(backend="pandas", assume_yes=False):
     """Workflow principal"""
     print(" CONSTRUCTION TABLES NORMALISÉES")
     print("=" * 60)
@@ -181,22 +277,22 @@ def main():
     teams_complete = check_teams_completeness(matches_df, teams_df)
     if not teams_complete:
         print("\n  Continuer malgré équipes manquantes ? (y/n)")
-        response = input().lower()
+        response = 'y' if assume_yes else input().lower()
         if response != 'y':
             print(" Arrêt du traitement")
             return
 
-    # 2.4 Créer référentiel équipes avec IDs
-    teams_reference = create_teams_reference(matches_df)
-
-    # 2.1 Créer table matches
-    matches_table = create_matches_table(matches_df, teams_reference)
-
-    # 2.2 Créer table home stats
-    home_stats_table = create_home_stats(matches_df, teams_reference)
+    # 2. Construction des 5 tables
+    if backend == "polars":
+        from pipeline.polars_backend import build_tables_lazy
+        tables = build_tables_lazy(IN_MATCHES_KPI)
+    else:
+        tables = build_tables(matches_df)
 
-    # 2.3 Créer table away stats
-    away_stats_table = create_away_stats(matches_df, teams_reference)
+    teams_reference = tables['teams_reference']
+    matches_table = tables['matches_normalized']
+    home_stats_table = tables['home_stats']
+    away_stats_table = tables['away_stats']
 
     # Affichage résultats
     print("\n RÉSUMÉ TABLES CRÉÉES")
@@ -205,6 +301,7 @@ def main():
     print(f" matches_table: {len(matches_table)} matchs")
     print(f" home_stats_table: {len(home_stats_table)} lignes")
     print(f" away_stats_table: {len(away_stats_table)} lignes")
+    print(f" team_match_table: {len(tables['team_match'])} lignes")
 
     # Aperçu des données
     print("\n APERÇU DES DONNÉES")
@@ -224,13 +321,20 @@ def main():
 
     # Optionnel : Export vers CSV
     print("\n Export vers CSV ? (y/n)")
-    response = input().lower()
+    response = 'y' if assume_yes else input().lower()
     if response == 'y':
-        teams_reference.to_csv("data/clean/teams_reference_normalized.csv", index=False)
-        matches_table.to_csv("data/clean/matches_normalized.csv", index=False)
-        home_stats_table.to_csv("data/clean/home_stats_normalized.csv", index=False)
-        away_stats_table.to_csv("data/clean/away_stats_normalized.csv", index=False)
-        print(" Fichiers exportés vers data/clean/")
+        for table_name, df in tables.items():
+            df.to_csv(OUT_TABLES[table_name], index=False)
+        print(f" Fichiers exportés vers {CLEAN}/")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Construction des 5 tables normalisées")
+    parser.add_argument("--backend", choices=["pandas", "polars"], default="pandas",
+                        help="Moteur de transformation (polars = plan lazy, optionnel)")
+    parser.add_argument("--yes", action="store_true",
+                        help="Répondre oui aux questions (continuer + export CSV)")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(backend=args.backend, assume_yes=args.yes)
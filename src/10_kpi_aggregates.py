@@ -0,0 +1,97 @@
+"""
+Agrégats KPI précalculés pour le notebook
+=========================================
+
+Dernière étape du pipeline (après 09) : calcule une fois les agrégats tracés
+par Notebook/Vizualisation_KPI.ipynb (par édition, par équipe) depuis les
+tables normalisées de data/clean/ et les écrit dans
+data/clean/kpi_aggregates.parquet avec le tampon de version des données
+(sha1 des CSV sources). Le notebook lit ce seul fichier : pas de base, pas
+de CSV complets, démarrage en quelques secondes et hors ligne.
+
+Écrit aussi le cube KPI data/clean/kpi_cube.npz (édition x équipe x tour x
+côté, voir pipeline.kpi_cube), mis à jour par édition : seules les éditions
+nouvelles ou modifiées depuis le dernier passage sont recalculées.
+
+Prérequis : pyarrow (requirements.txt)
+
+Usage:
+    python src/10_kpi_aggregates.py
+    python src/10_kpi_aggregates.py --check   # fichier à jour des CSV ? (code 1 sinon)
+"""
+
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from pipeline.kpi_aggregates import (
+    AGGREGATES_FILE, SOURCE_FILES, build_aggregates, data_version, read_stamp, write_aggregates,
+)
+from pipeline.kpi_cube import CUBE_FILE, KpiCube, build_cube
+from pipeline.paths import competition_key, data_dir
+
+CLEAN = data_dir() / "clean"
+OUT_AGGREGATES = CLEAN / AGGREGATES_FILE
+OUT_CUBE = CLEAN / CUBE_FILE
+
+
+def check_aggregates():
+    """Le fichier d'agrégats correspond-il aux tables normalisées actuelles ?"""
+    version, _ = data_version(CLEAN)
+    if not OUT_AGGREGATES.exists():
+        print(f" {OUT_AGGREGATES} absent (version des données: {version})")
+        return False
+    stamp = read_stamp(OUT_AGGREGATES)
+    if stamp["version"] != version:
+        print(f" Agrégats périmés: version {stamp['version']}, données {version}")
+        return False
+    print(f" Agrégats à jour: version {version}")
+    return True
+
+
+def update_cube():
+    """Cube KPI : éditions inchangées reprises du cube existant, les autres recalculées"""
+    previous = KpiCube.load(OUT_CUBE) if OUT_CUBE.exists() else None
+    cube, stats = build_cube(
+        pd.read_csv(CLEAN / SOURCE_FILES["matches_normalized"]),
+        pd.read_csv(CLEAN / SOURCE_FILES["team_match"]),
+        pd.read_csv(CLEAN / SOURCE_FILES["teams_reference"]),
+        previous=previous,
+    )
+    size = cube.save(OUT_CUBE)
+    editions, teams, rounds, sides = cube.shape
+    print(f" cube: {editions} éditions x {teams} équipes x {rounds} tours x {sides} côtés "
+          f"({size / 1024:.1f} Ko)")
+    print(f" éditions recalculées: {len(stats['computed'])}, reprises: {len(stats['reused'])}, "
+          f"supprimées: {len(stats['removed'])}")
+
+
+def main():
+    print(" AGRÉGATS KPI DU NOTEBOOK")
+    print("=" * 40)
+    start = time.perf_counter()
+    aggregates, stamp = build_aggregates(CLEAN, competition_key())
+    size = write_aggregates(aggregates, stamp, OUT_AGGREGATES)
+
+    for name, df in aggregates.items():
+        print(f" {name}: {len(df)} lignes")
+    print(f" Version des données: {stamp['version']}")
+    print(f" {OUT_AGGREGATES} ({size / 1024:.1f} Ko)")
+    update_cube()
+    print(f" Agrégats écrits en {time.perf_counter() - start:.2f}s")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Agrégats KPI du notebook -> kpi_aggregates.parquet")
+    parser.add_argument("--check", action="store_true",
+                        help="Vérifier seulement que le fichier correspond aux tables normalisées")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.check:
+        sys.exit(0 if check_aggregates() else 1)
+    main()
@@ -0,0 +1,90 @@
+"""
+Lots typés pour les lectures en flux - DataFrame ou Arrow
+=========================================================
+
+DatabaseManager.iter_query lit un résultat par lots (curseur serveur nommé).
+Chaque lot est converti avec le type PostgreSQL de la colonne (OID de
+cursor.description) et non par inférence sur les valeurs du lot : un lot
+dont une colonne n'a que des NULL garde le même dtype que les autres, et
+les entiers avec NULL restent entiers (Int64 nullable) au lieu de float.
+
+Arrow (optionnel) : pip install pyarrow
+
+Usage:
+    df = frame_batch(rows, cursor.description)
+    batch = arrow_batch(rows, cursor.description)   # pyarrow.RecordBatch
+"""
+
+from decimal import Decimal
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # dépendance optionnelle
+    pa = None
+
+# OID PostgreSQL -> (dtype pandas, type Arrow)
+PG_TYPES = {
+    16: ('boolean', 'bool_'),                   # boolean
+    20: ('Int64', 'int64'),                     # bigint
+    21: ('Int16', 'int16'),                     # smallint
+    23: ('Int32', 'int32'),                     # integer
+    700: ('float32', 'float32'),                # real
+    701: ('float64', 'float64'),                # double precision
+    1700: ('float64', 'float64'),               # numeric (ROUND, AVG)
+    25: ('string', 'string'),                   # text
+    1042: ('string', 'string'),                 # char(n)
+    1043: ('string', 'string'),                 # varchar
+    1082: ('datetime64[ns]', 'date32'),         # date
+    1114: ('datetime64[ns]', 'timestamp'),      # timestamp
+    1184: ('datetime64[ns, UTC]', 'timestamptz'),  # timestamptz
+}
+NUMERIC_OID = 1700
+
+
+def require_pyarrow():
+    if pa is None:
+        raise ImportError("Lots Arrow indisponibles : pip install pyarrow")
+
+
+def _columns(rows, description):
+    """Lignes -> colonnes (numeric Decimal -> float)"""
+    columns = list(zip(*rows)) if rows else [() for _ in description]
+    return [
+        [None if v is None else float(v) for v in values] if column.type_code == NUMERIC_OID else list(values)
+        for column, values in zip(description, columns)
+    ]
+
+
+def frame_batch(rows, description):
+    """Lignes d'un fetchmany -> DataFrame typé selon les colonnes PostgreSQL"""
+    data = {}
+    for column, values in zip(description, _columns(rows, description)):
+        dtype = PG_TYPES.get(column.type_code, ('object', None))[0]
+        if dtype.startswith('datetime64'):
+            series = pd.to_datetime(pd.Series(values, dtype=object), utc=dtype.endswith('UTC]'))
+        else:
+            series = pd.Series(values, dtype=dtype)
+        data[column.name] = series
+    return pd.DataFrame(data)
+
+
+def _arrow_type(type_code):
+    name = PG_TYPES.get(type_code, (None, 'string'))[1]
+    if name == 'timestamp':
+        return pa.timestamp('us')
+    if name == 'timestamptz':
+        return pa.timestamp('us', tz='UTC')
+    return getattr(pa, name)()
+
+
+def arrow_batch(rows, description):
+    """Lignes d'un fetchmany -> pyarrow.RecordBatch typé (types inconnus en texte)"""
+    require_pyarrow()
+    arrays = []
+    for column, values in zip(description, _columns(rows, description)):
+        if column.type_code not in PG_TYPES:
+            values = [None if v is None else str(v) for v in values]
+        arrays.append(pa.array(values, type=_arrow_type(column.type_code)))
+    return pa.RecordBatch.from_arrays(arrays, names=[column.name for column in description])
@@ -0,0 +1,103 @@
+"""
+Vérification du chargement par sommes de contrôle
+================================================
+
+COUNT(*) ne voit pas une valeur fausse ou des lignes mélangées. Chaque table
+est donc comparée à sa source par une somme de contrôle indépendante de
+l'ordre des lignes, par édition (partition) :
+
+    somme(60 premiers bits du md5 de la ligne), nombre de lignes
+
+La ligne est mise sous forme canonique de la même façon des deux côtés :
+colonnes de TABLE_DEFINITIONS (row_hash exclu) en texte PostgreSQL
+(booléens true/false, entiers sans décimale, NULL -> \\N), séparées par \\x1f.
+  - serveur : une seule requête GROUP BY edition (un parcours de la table),
+  - client  : mise en forme vectorisée par colonne, puis md5 ligne à ligne
+    (hashlib en boucle Python, pas de md5 vectorisé dans pandas), groupby.
+
+Une édition dont le nombre de lignes ou la somme diffère est signalée.
+
+Usage:
+    client = client_checksums('matches_normalized', df)
+    server = server_checksums(conn, 'matches_normalized', 'wc_men')
+    mismatches = compare_checksums(client, server)
+"""
+
+import hashlib
+import re
+
+import pandas as pd
+from sqlalchemy import text
+
+from database.setup_database import PARTITIONED_TABLES, ROW_HASH_COLUMN, TABLE_DEFINITIONS
+
+NULL_TEXT = '\\N'
+SEPARATOR = '\x1f'
+HASH_HEX_DIGITS = 15   # 60 bits : somme exacte en bigint / numeric côté serveur
+NO_EDITION = ''        # tables non partitionnées : un seul groupe
+
+
+def table_columns(table_name):
+    """Colonnes comparées : celles de TABLE_DEFINITIONS, row_hash exclu"""
+    names = re.findall(r'^\s*"?(\w+)"?\s', TABLE_DEFINITIONS[table_name], re.MULTILINE)
+    return [name for name in names if name != ROW_HASH_COLUMN]
+
+
+def _canonical(series):
+    """Colonne -> texte PostgreSQL (col::text), NULL -> \\N"""
+    values = series.dropna()
+    if series.dtype == bool or str(series.dtype) == 'boolean' or \
+            (len(values) and values.map(type).isin([bool]).all()):
+        out = series.map({True: 'true', False: 'false'})
+    elif series.dtype.kind == 'f' and (values % 1 == 0).all():
+        out = series.astype('Int64').astype(str)
+    else:
+        out = series.astype(str)
+    return out.where(series.notna(), NULL_TEXT)
+
+
+def client_checksums(table_name, df):
+    """DataFrame source -> DataFrame (edition, rows, checksum) ; texte vectorisé, md5 par ligne"""
+    columns = table_columns(table_name)
+    text_rows = _canonical(df[columns[0]])
+    for column in columns[1:]:
+        text_rows = text_rows + SEPARATOR + _canonical(df[column])
+    hashes = pd.Series(
+        [int(hashlib.md5(row.encode('utf-8')).hexdigest()[:HASH_HEX_DIGITS], 16) for row in text_rows],
+        index=df.index, dtype=object,
+    )
+    editions = df['edition'].astype(str) if table_name in PARTITIONED_TABLES else pd.Series(NO_EDITION, index=df.index)
+    grouped = hashes.groupby(editions.values)
+    return pd.DataFrame({'rows': grouped.size(), 'checksum': grouped.sum()}).rename_axis('edition').reset_index()
+
+
+def checksum_sql(table_name):
+    """Requête serveur : (edition, rows, checksum) en un parcours, filtrée sur :competition"""
+    row_text = " || chr(31) || ".join(f"""coalesce("{c}"::text, '{NULL_TEXT}')""" for c in table_columns(table_name))
+    edition = "edition" if table_name in PARTITIONED_TABLES else f"'{NO_EDITION}'"
+    return (
+        f"SELECT {edition} AS edition, COUNT(*) AS rows, "
+        f"SUM(('x' || substr(md5({row_text}), 1, {HASH_HEX_DIGITS}))::bit({HASH_HEX_DIGITS * 4})::bigint) AS checksum "
+        f"FROM {table_name} WHERE competition = :competition GROUP BY 1"
+    )
+
+
+def server_checksums(conn, table_name, competition):
+    """Sommes de contrôle calculées par PostgreSQL pour une compétition"""
+    rows = conn.execute(text(checksum_sql(table_name)), {"competition": competition}).all()
+    return pd.DataFrame([(str(e), int(n), int(s)) for e, n, s in rows], columns=['edition', 'rows', 'checksum'])
+
+
+def compare_checksums(client, server, editions=None):
+    """Éditions dont le nombre de lignes ou la somme diffère -> DataFrame
+
+    editions : ne comparer que ces éditions (rechargement d'une seule édition).
+    Colonnes : edition, rows_source, rows_base, checksum_ok.
+    """
+    merged = client.merge(server, on='edition', how='outer', suffixes=('_source', '_base'))
+    if editions is not None:
+        merged = merged[merged['edition'].isin([str(e) for e in editions])]
+    merged['checksum_ok'] = merged['checksum_source'] == merged['checksum_base']
+    rows_ok = merged['rows_source'] == merged['rows_base']
+    bad = merged[~(rows_ok & merged['checksum_ok'])]
+    return bad[['edition', 'rows_source', 'rows_base', 'checksum_ok']].sort_values('edition').reset_index(drop=True)
@@ -0,0 +1,339 @@
+"""
+Base embarquée - DuckDB (ou SQLite) derrière l'API DatabaseManager
+==================================================================
+
+Même API de chargement et de lecture que DatabaseManager (BaseDatabaseManager),
+sans serveur ni réseau : les tables normalisées de data/clean/ sont chargées dans une base
+locale (fichier ou mémoire) et db/kpi.sql s'y exécute tel quel.
+
+  - DuckDB (moteur analytique colonne) si installé : les CSV sont lus
+    directement par read_csv, les DataFrames sans copie,
+  - sinon SQLite (bibliothèque standard) : chargement par lots pandas.
+
+Différences avec PostgreSQL :
+  - pas de contraintes ajoutées après coup : clés primaires remplacées par
+    des index uniques, clés étrangères ignorées,
+  - vues matérialisées créées en tables (CREATE TABLE AS), index uniques seulement,
+  - pas de partitions, de staging ni de chargement incrémental (row_hash NULL),
+    ni export, lecture en flux ou fonctions KPI paramétrées : ces méthodes
+    n'existent que sur DatabaseManager,
+  - cache des lectures en mémoire seulement, invalidé par toute écriture,
+  - paramètres nommés :nom (comme DatabaseManager.query) traduits en `?`.
+
+Prérequis (optionnel) : pip install duckdb
+
+Usage:
+    db = EmbeddedDatabaseManager()                      # DuckDB, sinon SQLite, en mémoire
+    db = EmbeddedDatabaseManager("data/fifa_local.duckdb")
+    db.connect_database()
+    db.create_simple_tables()
+    db.load_clean_tables()                              # <partition>/clean/*_normalized.csv
+    db.build_post_load_objects()
+    results = db.run_kpi_queries()                      # {nom: DataFrame | "erreur: ..."}
+    df = db.query("SELECT * FROM teams_reference WHERE competition = :c", {"c": "wc_men"})
+    db.group_qualifiers(2022)                           # group_standings (étape 07b)
+"""
+
+import re
+import sqlite3
+import time
+
+import pandas as pd
+
+from database.kpi_queries import load_kpi_queries, load_kpi_views
+from database.query_cache import QueryCache, cache_key
+from database.setup_database import (
+    COPY_CHUNK_ROWS, PARTITIONED_TABLES, POST_LOAD_OBJECTS, STANDINGS_DEFINITION, STANDINGS_FILE, STANDINGS_TABLE,
+    TABLE_DEFINITIONS, BaseDatabaseManager, iter_chunks,
+)
+from pipeline.paths import DEFAULT_COMPETITION, available_competitions, competition_dir
+
+try:
+    import duckdb
+except ImportError:  # dépendance optionnelle
+    duckdb = None
+
+# Tables normalisées de l'étape 09 (<partition>/clean/)
+NORMALIZED_FILES = {
+    'teams_reference': 'teams_reference_normalized.csv',
+    'matches_normalized': 'matches_normalized.csv',
+    'home_stats': 'home_stats_normalized.csv',
+    'away_stats': 'away_stats_normalized.csv',
+    'team_match': 'team_match_normalized.csv',
+}
+
+_PRIMARY_KEY = re.compile(r"^ALTER TABLE (\w+) ADD CONSTRAINT (\w+) PRIMARY KEY (\(.*\))$")
+_VIEW_START = re.compile(r"^CREATE MATERIALIZED VIEW (?:IF NOT EXISTS )?(\w+) AS", re.IGNORECASE)
+# Paramètre :nom ; chaînes, identifiants entre guillemets et casts :: capturés pour être laissés tels quels
+_NAMED_PARAM = re.compile(r"""('(?:[^']|'')*'|"[^"]*"|::)|:(\w+)""")
+
+
+def default_backend():
+    """DuckDB si installé, sinon SQLite"""
+    return 'duckdb' if duckdb is not None else 'sqlite'
+
+
+def positional_sql(sql, params):
+    """Requête à paramètres nommés :nom -> (requête à `?`, valeurs dans l'ordre d'apparition)
+
+    Un même nom peut revenir plusieurs fois ; nom absent de params : KeyError.
+    """
+    values = []
+
+    def placeholder(match):
+        if match.group(1):
+            return match.group(1)
+        values.append(params[match.group(2)])
+        return "?"
+
+    return _NAMED_PARAM.sub(placeholder, sql), tuple(values)
+
+
+def embedded_statement(sql):
+    """Objet post-chargement PostgreSQL -> instruction du moteur embarqué (None : ignoré)
+
+    Index : inchangés. Clé primaire : index unique du même nom.
+    Clé étrangère : ignorée (ALTER TABLE ... ADD CONSTRAINT non supporté).
+    """
+    if sql.startswith('CREATE'):
+        return sql
+    match = _PRIMARY_KEY.match(sql)
+    if match:
+        table_name, name, columns = match.groups()
+        return f"CREATE UNIQUE INDEX {name} ON {table_name} {columns}"
+    return None
+
+
+class EmbeddedDatabaseManager(BaseDatabaseManager):
+    """Gestionnaire base locale embarquée (DuckDB ou SQLite)"""
+
+    def __init__(self, path=":memory:", backend=None):
+        """path : fichier de la base (":memory:" : base en mémoire) ; backend : 'duckdb' | 'sqlite'"""
+        self.path = str(path)
+        self.backend = backend or default_backend()
+        self.conn = None
+        self.cache = None
+        self._writes = 0    # version locale des données : incrémentée par chaque écriture
+
+    def connect_database(self):
+        """Ouvrir (ou créer) la base locale"""
+        if self.backend == 'duckdb':
+            if duckdb is None:
+                raise ImportError("Backend duckdb indisponible : pip install duckdb")
+            self.conn = duckdb.connect(self.path)
+        elif self.backend == 'sqlite':
+            self.conn = sqlite3.connect(self.path)
+        else:
+            raise ValueError(f"Backend embarqué inconnu: {self.backend!r} (attendu: duckdb, sqlite)")
+        # Mémoire seulement : la version locale (_writes) ne vaut que pour ce processus
+        self.cache = QueryCache()
+        print(f"✅ Base locale {self.backend} ouverte ({self.path})")
+        return True
+
+    def execute(self, sql, params=()):
+        """Exécuter une instruction (validée immédiatement)"""
+        cursor = self.conn.execute(sql, params)
+        self.conn.commit()
+        self._writes += 1
+        return cursor
+
+    def query(self, sql, params=None, cache=True):
+        """Requête de lecture -> DataFrame, paramètres nommés :nom (dict) comme PostgreSQL
+
+        Résultat en cache (mémoire) jusqu'à la prochaine écriture dans la base.
+        cache=False : lecture directe, résultat non mis en cache.
+        """
+        key = cache_key(sql, params, self._writes) if cache else None
+        df = self.cache.get(key) if cache else None
+        if df is None:
+            statement, values = positional_sql(sql, params or {})
+            if self.backend == 'duckdb':
+                df = self.conn.execute(statement, values).df()
+            else:
+                df = pd.read_sql_query(statement, self.conn, params=values)
+            if cache:
+                self.cache.put(key, df)
+        return df
+
+    def group_qualifiers(self, edition=None, competition=DEFAULT_COMPETITION, cache=True):
+        """Équipes qualifiées de chaque groupe (toutes éditions ou une)"""
+        params = {"competition": competition}
+        where = "competition = :competition AND qualified"
+        if edition is not None:
+            where += " AND edition = :edition"
+            params["edition"] = str(edition)
+        return self.query(f'SELECT edition, group_name, rank, "Team_name", points FROM {STANDINGS_TABLE} '
+                          f'WHERE {where} ORDER BY edition, group_name, rank', params, cache=cache)
+
+    def create_simple_tables(self, drop=True):
+        """Créer les tables (mêmes colonnes que PostgreSQL, sans partitions ni contraintes)"""
+        for table_name, columns in TABLE_DEFINITIONS.items():
+            if drop:
+                self.execute(f"DROP TABLE IF EXISTS {table_name}")
+            self.execute(f"CREATE TABLE IF NOT EXISTS {table_name} ({columns})")
+        print("✅ Tables simples créées (sans contraintes)")
+        return True
+
+    def drop_post_load_objects(self):
+        """Supprimer les index post-chargement avant un chargement"""
+        for name, _, sql in reversed(POST_LOAD_OBJECTS):
+            if embedded_statement(sql):
+                self.execute(f"DROP INDEX IF EXISTS {name}")
+        return True
+
+    def build_post_load_objects(self, only_missing=False, schema=None):
+        """Créer les index (clés primaires en index uniques) puis ANALYZE
+
+        Pas de schéma de staging en local : schema doit rester None.
+        Renvoie la durée de chaque création ({nom: secondes}, 'ANALYZE' compris).
+        """
+        if schema is not None:
+            raise ValueError(f"Schéma {schema!r} non géré par la base embarquée")
+        timings = {}
+        for name, _, sql in POST_LOAD_OBJECTS:
+            statement = embedded_statement(sql)
+            if statement is None:
+                continue
+            if only_missing:
+                statement = statement.replace("INDEX ", "INDEX IF NOT EXISTS ", 1)
+            start = time.perf_counter()
+            self.execute(statement)
+            timings[name] = time.perf_counter() - start
+        start = time.perf_counter()
+        self.execute("ANALYZE")
+        timings['ANALYZE'] = time.perf_counter() - start
+        return timings
+
+    def bulk_load(self, table_name, source, competition=None, truncate=False, chunk_rows=COPY_CHUNK_ROWS):
+        """Charger un DataFrame ou un CSV dans une table déjà créée, une transaction
+
+        Colonnes associées par nom ; colonnes absentes de la source à NULL.
+        competition : lignes de cette compétition supprimées avant chargement
+        truncate    : table vidée avant chargement
+        DuckDB lit le CSV lui-même (read_csv) ; SQLite le reçoit par lots pandas.
+        """
+        try:
+            self.conn.execute("BEGIN")
+            if truncate:
+                self.conn.execute(f"DELETE FROM {table_name}")
+            if competition is not None:
+                self.conn.execute(f"DELETE FROM {table_name} WHERE competition = ?", (competition,))
+
+            if self.backend == 'duckdb':
+                n = self._duckdb_insert(table_name, source)
+            else:
+                n = 0
+                for chunk in iter_chunks(source, chunk_rows):
+                    columns = ", ".join(f'"{c}"' for c in chunk.columns)
+                    placeholders = ", ".join("?" for _ in chunk.columns)
+                    rows = chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+                    self.conn.executemany(f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})", rows)
+                    n += len(chunk)
+            self.conn.commit()
+            self._writes += 1
+            return n
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def _duckdb_insert(self, table_name, source):
+        """INSERT ... BY NAME depuis un CSV (read_csv) ou un DataFrame (lu sans copie)"""
+        if isinstance(source, pd.DataFrame):
+            self.conn.register('_source', source)
+            try:
+                self.conn.execute(f"INSERT INTO {table_name} BY NAME SELECT * FROM _source")
+            finally:
+                self.conn.unregister('_source')
+            return len(source)
+        before = self.conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+        self.conn.execute(f"INSERT INTO {table_name} BY NAME SELECT * FROM read_csv(?, header = true)",
+                          [str(source)])
+        return self.conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0] - before
+
+    def delete_competition(self, competition):
+        """Supprimer les lignes d'une compétition dans toutes les tables (une transaction)"""
+        self.conn.execute("BEGIN")
+        for table_name in TABLE_DEFINITIONS:
+            self.conn.execute(f"DELETE FROM {table_name} WHERE competition = ?", (competition,))
+        self.conn.commit()
+        self._writes += 1
+        return True
+
+    def load_tables_concurrently(self, tables, competition, keys_in_place=False):
+        """Base embarquée : un seul écrivain, tables chargées l'une après l'autre (pas de FK)"""
+        return {table_name: self.replace_competition(table_name, competition, df)
+                for table_name, df in tables.items()}
+
+    def fill_edition(self):
+        """edition des tables de stats (absente des CSV de l'étape 09) reprise de matches_normalized"""
+        for table_name in PARTITIONED_TABLES:
+            if table_name == 'matches_normalized':
+                continue
+            self.execute(
+                f"UPDATE {table_name} SET edition = (SELECT m.edition FROM matches_normalized m "
+                f"WHERE m.id_match = {table_name}.id_match AND m.competition = {table_name}.competition) "
+                f"WHERE edition IS NULL"
+            )
+        return True
+
+    def load_clean_tables(self, competitions=None):
+        """Charger les CSV <partition>/clean/*_normalized.csv de chaque compétition
+
+        Classements des groupes (group_standings.csv, étape 07b) chargés aussi s'ils existent.
+        Renvoie {table: lignes chargées} (toutes compétitions).
+        """
+        counts = {table_name: 0 for table_name in NORMALIZED_FILES}
+        for key in competitions or available_competitions():
+            clean = competition_dir(key) / "clean"
+            for table_name, filename in NORMALIZED_FILES.items():
+                path = clean / filename
+                if not path.exists():
+                    raise FileNotFoundError(f"{filename} introuvable dans {clean}")
+                counts[table_name] += self.bulk_load(table_name, path, competition=key)
+            if (clean / STANDINGS_FILE).exists():
+                self.load_group_standings(clean / STANDINGS_FILE, key)
+        self.fill_edition()
+        return counts
+
+    def load_group_standings(self, source, competition):
+        """Classements des groupes d'une compétition (table créée si absente, sans index partiel)"""
+        self.execute(f"CREATE TABLE IF NOT EXISTS {STANDINGS_TABLE} ({STANDINGS_DEFINITION})")
+        return self.bulk_load(STANDINGS_TABLE, source, competition=competition)
+
+    def refresh_kpi_views(self):
+        """Vues KPI de db/kpi_views.sql recréées en tables (CREATE TABLE AS) + index uniques
+
+        Renvoie {vue: ('créée', secondes)}.
+        """
+        timings = {}
+        for view, statements in load_kpi_views():
+            start = time.perf_counter()
+            self.execute(f"DROP TABLE IF EXISTS {view}")
+            self.execute(_VIEW_START.sub(f"CREATE TABLE {view} AS", statements[0], count=1))
+            for statement in statements[1:]:
+                if statement.upper().startswith("CREATE UNIQUE INDEX"):
+                    self.execute(statement)
+            timings[view] = ('créée', time.perf_counter() - start)
+        return timings
+
+    def run_kpi_queries(self, queries=None):
+        """Exécuter les requêtes nommées de db/kpi.sql
+
+        Renvoie {nom: (DataFrame, secondes)} ou {nom: "erreur: ..."} si le
+        dialecte du moteur refuse la requête.
+        """
+        results = {}
+        for name, sql in queries if queries is not None else load_kpi_queries():
+            start = time.perf_counter()
+            try:
+                df = self.query(sql, cache=False)
+                results[name] = (df, time.perf_counter() - start)
+            except Exception as e:
+                results[name] = "erreur: " + str(e).splitlines()[0]
+        return results
+
+    def close(self):
+        """Fermer la base locale"""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
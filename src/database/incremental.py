@@ -0,0 +1,132 @@
+"""
+Chargement incrémental - delta entre les tables normalisées et la base
+=====================================================================
+
+Au lieu de recharger toutes les tables, on compare côté client les lignes d'une
+compétition à celles déjà en base :
+  - clé naturelle : match_uid (UID stable de l'étape 07) pour les tables par
+    match, (match_uid, is_home) pour team_match, Team_name pour teams_reference
+    (plus edition, clé de partition, pour les tables par match),
+  - lignes nouvelles (clé absente en base), modifiées (row_hash différent),
+    supprimées (clé en base absente de la partition).
+
+Les ids de substitution (id_match, id_team) sont recalculés à chaque run de
+09 : un match inséré au milieu de l'historique décalerait tous les suivants.
+Avant comparaison, ils sont donc ramenés aux ids déjà en base (même
+match_uid / même nom) ; les nouvelles clés prennent max + 1. Une mise à jour
+d'une édition ne touche ainsi que les lignes de cette édition.
+
+Rechargement d'une seule édition (plan_edition) : mêmes ids, nouvelles
+équipes upsertées, puis partitions de l'édition remplacées (replace_edition).
+
+Usage:
+    state = db.fetch_state('wc_men', STATE_COLUMNS)
+    deltas, stats = plan_delta(tables, state)
+    db.apply_delta('wc_men', deltas)
+
+    teams_delta, edition_tables = plan_edition(tables, state, 2022)
+    db.apply_delta('wc_men', teams_delta)
+    db.replace_edition('wc_men', 2022, edition_tables)
+"""
+
+import pandas as pd
+
+from database.setup_database import PARTITIONED_TABLES, ROW_HASH_COLUMN, UPSERT_KEYS, with_row_hash
+
+# Colonnes lues en base pour calculer le delta
+STATE_COLUMNS = {
+    'teams_reference': ['id_team', 'Team_name', ROW_HASH_COLUMN],
+    'matches_normalized': ['id_match', 'match_uid', 'edition', ROW_HASH_COLUMN],
+    'home_stats': ['match_uid', 'edition', ROW_HASH_COLUMN],
+    'away_stats': ['match_uid', 'edition', ROW_HASH_COLUMN],
+    'team_match': ['match_uid', 'is_home', 'edition', ROW_HASH_COLUMN],
+}
+
+
+def stable_ids(keys, existing):
+    """Id en base de chaque clé connue ; nouvelles clés numérotées à partir de max + 1
+
+    existing : Series clé -> id en base
+    """
+    ids = keys.map(existing)
+    new = ids.isna()
+    start = int(existing.max()) + 1 if len(existing) else 1
+    ids[new] = range(start, start + int(new.sum()))
+    return ids.astype(int)
+
+
+def remap_ids(tables, state):
+    """Ids de la partition -> ids en base (équipes par nom, matchs par match_uid)"""
+    db_teams, db_matches = state['teams_reference'], state['matches_normalized']
+
+    teams = tables['teams_reference'].copy()
+    team_ids = stable_ids(teams['Team_name'], pd.Series(db_teams['id_team'].values, index=db_teams['Team_name']))
+    team_map = dict(zip(teams['id_team'], team_ids))
+    teams['id_team'] = team_ids.values
+
+    matches = tables['matches_normalized'].copy()
+    match_ids = stable_ids(matches['match_uid'],
+                           pd.Series(db_matches['id_match'].values, index=db_matches['match_uid']))
+    match_map = dict(zip(matches['match_uid'], match_ids))
+    matches['id_match'] = match_ids.values
+    # result = id de l'équipe gagnante, 0 = nul
+    matches['result'] = matches['result'].map(team_map).fillna(matches['result']).astype(int)
+
+    remapped = {'teams_reference': teams, 'matches_normalized': matches}
+    for table_name in ('home_stats', 'away_stats', 'team_match'):
+        stats = tables[table_name].copy()
+        stats['id_match'] = stats['match_uid'].map(match_map).astype(int)
+        stats['id_team'] = stats['id_team'].map(team_map).astype(int)
+        remapped[table_name] = stats
+    return remapped
+
+
+def diff_table(new, existing, keys):
+    """Lignes à insérer/mettre à jour et clés à supprimer (comparaison des row_hash)
+
+    keys : colonnes de la clé naturelle ; clés supprimées renvoyées en DataFrame.
+    Clés comparées en texte (edition : entier dans les CSV, VARCHAR en base).
+    """
+    new = with_row_hash(new)
+    new_keys = pd.MultiIndex.from_frame(new[keys].astype(str))
+    existing_keys = pd.MultiIndex.from_frame(existing[keys].astype(str))
+    stored = pd.Series(existing[ROW_HASH_COLUMN].values, index=existing_keys)
+    current = stored.reindex(new_keys).values
+
+    inserted = pd.Series(~new_keys.isin(existing_keys), index=new.index)
+    upserts = new[inserted | (current != new[ROW_HASH_COLUMN].values)]
+    deleted = existing.loc[~existing_keys.isin(new_keys), keys]
+    stats = {
+        'inserted': int(inserted.sum()),
+        'updated': len(upserts) - int(inserted.sum()),
+        'deleted': len(deleted),
+        'unchanged': len(new) - len(upserts),
+    }
+    return upserts, deleted, stats
+
+
+def plan_delta(tables, state):
+    """Tables normalisées d'une compétition + état en base -> (deltas, compteurs par table)"""
+    remapped = remap_ids(tables, state)
+    deltas, stats = {}, {}
+    for table_name, df in remapped.items():
+        upserts, deleted, stats[table_name] = diff_table(df, state[table_name], UPSERT_KEYS[table_name])
+        deltas[table_name] = (upserts, deleted)
+    return deltas, stats
+
+
+def plan_edition(tables, state, edition):
+    """Tables d'une compétition + état en base -> (delta des équipes, lignes de l'édition)
+
+    Les lignes de l'édition gardent les ids en base (remap_ids) ; seules les
+    équipes nouvelles ou modifiées sont upsertées (aucune suppression : les
+    autres éditions peuvent encore les référencer).
+    """
+    remapped = remap_ids(tables, state)
+    upserts, deleted, _ = diff_table(remapped['teams_reference'], state['teams_reference'],
+                                     UPSERT_KEYS['teams_reference'])
+    edition_tables = {
+        table_name: remapped[table_name][remapped[table_name]['edition'].astype(str) == str(edition)]
+        for table_name in PARTITIONED_TABLES
+    }
+    return {'teams_reference': (upserts, deleted.iloc[:0])}, edition_tables
@@ -0,0 +1,228 @@
+"""
+Requêtes KPI nommées - découpage de db/kpi.sql
+==============================================
+
+db/kpi.sql est un fichier de travail : requêtes précédées d'un commentaire
+`-- titre`, sections `# TITRE`, points-virgules parfois absents. Ce module
+le découpe en requêtes nommées exécutables :
+  - un commentaire `--` ou une section `#` termine la requête en cours,
+  - le premier commentaire `--` d'un bloc donne le nom de la requête,
+  - `;` termine la requête en cours,
+  - seuls les blocs commençant par SELECT / WITH sont gardés (fragments ignorés),
+  - titres en double suffixés « (2) », « (3) »...
+
+Le module lit aussi db/kpi_views.sql (vues matérialisées des agrégats KPI) :
+chaque vue est regroupée avec les index créés juste après elle, et
+db/kpi_functions.sql (fonctions KPI paramétrées par équipe / paire d'équipes).
+
+Usage:
+    from database.kpi_queries import load_kpi_functions, load_kpi_queries, load_kpi_views
+
+    for name, sql in load_kpi_queries():
+        ...
+    for view, statements in load_kpi_views():
+        ...
+    for function, statement in load_kpi_functions():
+        ...
+"""
+
+import re
+from pathlib import Path
+
+KPI_SQL = Path(__file__).resolve().parents[2] / "db" / "kpi.sql"
+KPI_VIEWS_SQL = KPI_SQL.with_name("kpi_views.sql")
+KPI_FUNCTIONS_SQL = KPI_SQL.with_name("kpi_functions.sql")
+
+_QUERY_START = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_VIEW_START = re.compile(r"^\s*CREATE MATERIALIZED VIEW (?:IF NOT EXISTS )?(\w+)", re.IGNORECASE)
+_FUNCTION_START = re.compile(r"^\s*CREATE (?:OR REPLACE )?FUNCTION (\w+)", re.IGNORECASE)
+
+
+def split_kpi_sql(sql_text):
+    """Texte SQL -> liste de (nom, requête) dans l'ordre du fichier"""
+    queries = []
+    title, buffer = None, []
+
+    def flush():
+        nonlocal buffer
+        sql = "\n".join(buffer).strip()
+        if sql and _QUERY_START.match(sql):
+            queries.append((title or f"requête {len(queries) + 1}", sql))
+        buffer = []
+
+    for line in sql_text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("#") or stripped.startswith("--"):
+            if any(part.strip() for part in buffer):
+                flush()
+                title = None
+            if stripped.startswith("#"):
+                title = None
+            elif title is None:
+                title = re.sub(r"^\d+\s+", "", stripped.lstrip("-").strip())
+            continue
+
+        # Un ';' peut apparaître en milieu de ligne
+        parts = line.split(";")
+        for i, part in enumerate(parts):
+            buffer.append(part)
+            if i < len(parts) - 1:
+                flush()
+                title = None
+
+    flush()
+    return _dedupe_names(queries)
+
+
+def _dedupe_names(queries):
+    seen = {}
+    named = []
+    for name, sql in queries:
+        seen[name] = seen.get(name, 0) + 1
+        named.append((name if seen[name] == 1 else f"{name} ({seen[name]})", sql))
+    return named
+
+
+def load_kpi_queries(path=KPI_SQL):
+    """Requêtes nommées de db/kpi.sql"""
+    return split_kpi_sql(Path(path).read_text(encoding="utf-8"))
+
+
+def load_kpi_views(path=KPI_VIEWS_SQL):
+    """Vues matérialisées de db/kpi_views.sql -> [(vue, [CREATE VIEW, CREATE INDEX...])]"""
+    lines = [line for line in Path(path).read_text(encoding="utf-8").splitlines()
+             if not line.strip().startswith("--")]
+    views = []
+    for statement in "\n".join(lines).split(";"):
+        statement = statement.strip()
+        if not statement:
+            continue
+        match = _VIEW_START.match(statement)
+        if match:
+            views.append((match.group(1), [statement]))
+        elif views:
+            views[-1][1].append(statement)
+    return views
+
+
+def load_kpi_functions(path=KPI_FUNCTIONS_SQL):
+    """Fonctions de db/kpi_functions.sql -> [(fonction, CREATE OR REPLACE FUNCTION ...)]
+
+    Une instruction se termine par `;` en fin de ligne hors corps $$...$$.
+    """
+    functions, buffer = [], []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        if not buffer and (not line.strip() or line.strip().startswith("--")):
+            continue
+        buffer.append(line)
+        body = "\n".join(buffer)
+        if line.rstrip().endswith(";") and body.count("$$") % 2 == 0:
+            match = _FUNCTION_START.match(body)
+            if match:
+                functions.append((match.group(1), body.rstrip().rstrip(";")))
+            buffer = []
+    return functions
+
+
+def _plan_nodes(node, found):
+    """Parcours d'un nœud de plan JSON : accès aux tables et jointures"""
+    node_type = node["Node Type"]
+    target = node.get("Index Name") or node.get("Relation Name")
+    if target or "Join" in node_type or node_type == "Nested Loop":
+        found.append(f"{node_type}({target})" if target else node_type)
+    for child in node.get("Plans", []):
+        _plan_nodes(child, found)
+    return found
+
+
+def plan_summary(plan_json):
+    """EXPLAIN (FORMAT JSON) -> (coût total estimé, nœuds d'accès/jointure triés)"""
+    plan = plan_json[0]["Plan"]
+    return plan["Total Cost"], sorted(set(_plan_nodes(plan, [])))
+
+
+def explain_queries(engine, queries, schema=None):
+    """
+    EXPLAIN de chaque requête nommée (sans l'exécuter).
+
+    schema : résoudre les tables dans ce schéma (staging) le temps de l'EXPLAIN.
+    Renvoie {nom: (coût, nœuds)} ou {nom: "erreur: ..."} pour les requêtes
+    non exécutables (table absente, fragment invalide).
+    """
+    from sqlalchemy import text
+
+    plans = {}
+    for name, sql in queries:
+        try:
+            with engine.connect() as conn:
+                if schema:
+                    # SET LOCAL : limité à la transaction, la connexion rendue au pool reste intacte
+                    conn.execute(text(f"SET LOCAL search_path TO {schema}"))
+                plan_json = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+            plans[name] = plan_summary(plan_json)
+        except Exception as e:
+            plans[name] = "erreur: " + str(e).splitlines()[0]
+    return plans
+
+
+def collapse_partitions(nodes, parents):
+    """Nœuds de partitions `<parent>_<compétition>_<édition>` regroupés : « Seq Scan(parent) x38 »"""
+    counts = {}
+    for node in nodes:
+        for parent in parents:
+            node = re.sub(rf"\(({parent})_\w+\)$", r"(\1)", node)
+        counts[node] = counts.get(node, 0) + 1
+    return sorted(node if n == 1 else f"{node} x{n}" for node, n in counts.items())
+
+
+def analyze_query(engine, sql, parents=()):
+    """
+    Une requête : durée réelle (exécution + lecture des lignes) puis
+    EXPLAIN (ANALYZE, BUFFERS) sur la même connexion.
+
+    parents : tables partitionnées dont les partitions sont regroupées dans `nodes`.
+    Renvoie {wall_ms, rows, planning_ms, execution_ms, shared_hit, shared_read,
+    cost, nodes}. Les blocs lus sont ceux de l'EXPLAIN, exécuté juste après
+    la requête (cache chaud : shared_read ~ 0 sauf si la table dépasse shared_buffers).
+    """
+    import time
+
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        start = time.perf_counter()
+        rows = len(conn.execute(text(sql)).fetchall())
+        wall_ms = (time.perf_counter() - start) * 1000
+        plan_json = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")).scalar()
+    plan = plan_json[0]["Plan"]
+    cost = plan["Total Cost"]
+    return {
+        "wall_ms": round(wall_ms, 3),
+        "rows": rows,
+        "planning_ms": plan_json[0]["Planning Time"],
+        "execution_ms": plan_json[0]["Execution Time"],
+        "shared_hit": plan.get("Shared Hit Blocks", 0),
+        "shared_read": plan.get("Shared Read Blocks", 0),
+        "cost": cost,
+        "nodes": collapse_partitions(_plan_nodes(plan, []), parents),
+    }
+
+
+def analyze_queries(engine, queries, workers=4, parents=()):
+    """
+    analyze_query de chaque requête nommée, en parallèle sur `workers`
+    connexions du pool (ordre du fichier conservé dans le résultat).
+
+    Renvoie {nom: mesures} ou {nom: "erreur: ..."}.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def run(sql):
+        try:
+            return analyze_query(engine, sql, parents)
+        except Exception as e:
+            return "erreur: " + str(e).splitlines()[0]
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [(name, executor.submit(run, sql)) for name, sql in queries]
+        return {name: future.result() for name, future in futures}
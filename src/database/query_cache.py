@@ -0,0 +1,150 @@
+"""
+Cache des résultats de requêtes - LRU + TTL, mémoire et disque
+==============================================================
+
+Les notebooks et le rapport KPI relancent les mêmes agrégats alors que les
+données ne changent qu'à chaque run_setup.py. DatabaseManager.query() passe
+par ce cache :
+  - clé = SQL normalisé (commentaires et espaces retirés) + paramètres
+    + version des données (table data_version, incrémentée par chaque chargement),
+  - mémoire : OrderedDict LRU de `max_entries` résultats,
+  - disque : un pickle par entrée dans `directory` (partagé entre processus
+    et sessions de notebook), les moins récemment lus supprimés au-delà de
+    `max_entries`,
+  - chaque entrée expire après `ttl` secondes.
+
+Un rechargement change la version : toutes les entrées deviennent
+inaccessibles d'un coup (les anciennes sortent ensuite par LRU).
+
+Usage:
+    cache = QueryCache(max_entries=256, ttl=3600, directory=Path(".cache/queries"))
+    key = cache_key(sql, params, version)
+    df = cache.get(key)
+    if df is None:
+        df = ...
+        cache.put(key, df)
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+_COMMENT = re.compile(r"--[^\n]*")
+
+
+def normalize_sql(sql):
+    """SQL -> forme canonique de la clé (commentaires `--`, espaces et `;` final retirés)"""
+    return " ".join(_COMMENT.sub(" ", sql).split()).rstrip(";").strip()
+
+
+def cache_key(sql, params, version):
+    """Clé de cache : sha1 du SQL normalisé, des paramètres et de la version des données"""
+    payload = json.dumps([normalize_sql(sql), params or {}, version], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _mtime(path):
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:   # supprimé par un autre processus
+        return 0
+
+
+class QueryCache:
+    """Cache LRU/TTL de DataFrames, en mémoire et (optionnellement) sur disque"""
+
+    def __init__(self, max_entries=256, ttl=3600, directory=None):
+        """directory : répertoire du cache disque (None : mémoire seulement)"""
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.directory = Path(directory) if directory else None
+        self._memory = OrderedDict()   # clé -> (créé à, DataFrame)
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def _path(self, key):
+        return self.directory / f"{key}.pkl"
+
+    def _expired(self, created):
+        return time.time() - created > self.ttl
+
+    def get(self, key):
+        """Résultat en cache (copie) ou None si absent / expiré"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and self._expired(entry[0]):
+                del self._memory[key]
+                entry = None
+            if entry is None:
+                entry = self._read_disk(key)
+                if entry is not None:
+                    self._remember(key, entry)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return entry[1].copy()
+
+    def put(self, key, df):
+        """Mettre un résultat en cache (mémoire + disque)"""
+        entry = (time.time(), df.copy())
+        with self._lock:
+            self._remember(key, entry)
+            self._write_disk(key, entry)
+
+    def clear(self):
+        """Vider le cache (mémoire et disque)"""
+        with self._lock:
+            self._memory.clear()
+            if self.directory and self.directory.exists():
+                for path in self.directory.glob("*.pkl"):
+                    path.unlink(missing_ok=True)
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if self._expired(entry[0]):
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            os.utime(path)   # date de dernier accès : ordre LRU sur disque
+        except OSError:
+            pass
+        return entry
+
+    def _write_disk(self, key, entry):
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Écriture puis renommage : un lecteur concurrent ne voit jamais de fichier partiel
+        tmp = self._path(key).with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+
+        # Compte d'abord (listage seul) : stat et tri seulement au-delà de max_entries
+        names = [name for name in os.listdir(self.directory) if name.endswith(".pkl")]
+        if len(names) <= self.max_entries:
+            return
+        files = sorted((self.directory / name for name in names), key=_mtime)
+        for path in files[:len(files) - self.max_entries]:
+            path.unlink(missing_ok=True)
@@ -3,25 +3,543 @@ DatabaseManager - Gestionnaire PostgreSQL FIFA World Cup
 ========================================================
 
 Classe simplifiée pour charger les tables normalisées FIFA World Cup
-dans PostgreSQL Render sans contraintes.
+dans PostgreSQL Render sans contraintes. Les chargements passent par
+COPY FROM STDIN dans les tables typées créées par create_simple_tables.
+API commune avec la base embarquée (database.embedded) : BaseDatabaseManager.
 
 Usage:
     db = DatabaseManager()
     db.connect_database()
     db.create_simple_tables() 
     db.load_single_table('teams_reference', df)
+    db.append_rows('matches_normalized', batch_df)
+    db.replace_competition('matches_normalized', 'wc_men', df)
+    db.bulk_load('home_stats', 'data/clean/home_stats_normalized.csv')
+    db.load_tables_concurrently({'home_stats': df1, 'away_stats': df2}, 'wc_men')
+    db.build_post_load_objects()     # PK, FK, index + ANALYZE après chargement
+    db.apply_delta('wc_men', deltas) # chargement incrémental (voir database.incremental)
+    db.refresh_kpi_views()           # vues matérialisées db/kpi_views.sql
+    db.create_kpi_functions()        # fonctions paramétrées db/kpi_functions.sql
+    db.load_group_standings('data/clean/group_standings.csv', 'wc_men')   # classements (étape 07b)
+    db.group_qualifiers(2022)                # qui est sorti de quel groupe
+    db.replace_edition('wc_men', 2022, tables)  # une édition : détachement / rattachement
+    db.bump_data_version()           # après chaque chargement : invalide le cache des requêtes
+    df = db.query(sql, {"team": "France"})   # lecture, résultat en cache (voir database.query_cache)
+    db.team_record('France')                 # une équipe / une paire : un aller-retour servi par index
+    db.head_to_head('France', 'Germany')
+    for batch in db.iter_query(sql, batch_rows=50_000):  # lecture en flux, mémoire bornée
+        ...
+    db.export_tables('backups/2024-06', fmt='csv.gz')   # COPY TO STDOUT, tables en parallèle
+    db.restore_tables('backups/2024-06')                # rechargement d'un export
+
+Rechargement sans interruption (schéma de staging) :
+    db.create_staging_tables()                       # tables UNLOGGED dans fifa_staging
+    db.copy_live_rows(exclude=['wc_women'])          # compétitions non rechargées
+    db.bulk_load(staging_table('home_stats'), df)
+    db.build_post_load_objects(schema=STAGING_SCHEMA)
+    db.swap_staging()                                # seul instant bloquant pour les lecteurs
+
+Partitionnement : les tables par match sont partitionnées par compétition
+puis par édition (LIST). Le COPY écrit directement dans la partition feuille,
+les requêtes filtrées sur edition n'ouvrent que les partitions concernées.
 
 Prérequis: .env avec RENDER_DATABASE_URL
+
+Pool de connexions (optionnel, .env) : RENDER_DB_POOL_SIZE,
+RENDER_DB_MAX_OVERFLOW, RENDER_DB_POOL_RECYCLE (s), RENDER_DB_POOL_TIMEOUT (s),
+RENDER_DB_POOL_PRE_PING (1/0). Un seul engine (et donc un seul pool) est
+partagé par URL dans le processus.
+
+Cache des requêtes (optionnel, .env) : RENDER_DB_CACHE_SIZE (entrées),
+RENDER_DB_CACHE_TTL (s), RENDER_DB_CACHE_DIR (vide : mémoire seulement),
+RENDER_DB_VERSION_TTL (s entre deux lectures de la version des données).
 """
 
+import gzip
+import hashlib
+import io
+import json
 import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import pandas as pd
 import psycopg2
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
+from database.batches import arrow_batch, frame_batch, require_pyarrow
+from database.kpi_queries import load_kpi_functions, load_kpi_views
+from database.query_cache import QueryCache, cache_key
+from pipeline.paths import DEFAULT_COMPETITION
+
+# Colonnes des tables ; `competition` partitionne les chargements,
+# `row_hash` (calculé au chargement) sert à détecter les lignes modifiées.
+# `edition` des tables par match : clé de partition (ajoutée au chargement, voir add_edition)
+TABLE_DEFINITIONS = {
+    'teams_reference': """
+        id_team      INTEGER,
+        "Team_name"  VARCHAR(100),
+        competition  VARCHAR(32),
+        row_hash     CHAR(32)
+    """,
+    'matches_normalized': """
+        id_match     INTEGER,
+        result       INTEGER,
+        date         DATE,
+        round        VARCHAR(50),
+        city         VARCHAR(100),
+        edition      VARCHAR(4),
+        is_final     BOOLEAN,
+        competition  VARCHAR(32),
+        match_uid    CHAR(40),
+        row_hash     CHAR(32)
+    """,
+    'home_stats': """
+        id_match                      INTEGER,
+        id_team                       INTEGER,
+        "Number_of_goals_scored"      INTEGER,
+        "Number_of_goals_conceded"    INTEGER,
+        edition                       VARCHAR(4),
+        competition                   VARCHAR(32),
+        match_uid                     CHAR(40),
+        row_hash                      CHAR(32)
+    """,
+    'away_stats': """
+        id_match                      INTEGER,
+        id_team                       INTEGER,
+        "Number_of_goals_scored"      INTEGER,
+        "Number_of_goals_conceded"    INTEGER,
+        edition                       VARCHAR(4),
+        competition                   VARCHAR(32),
+        match_uid                     CHAR(40),
+        row_hash                      CHAR(32)
+    """,
+    # Format long : une ligne par équipe et par match (outcome W/D/L, NULL si score manquant)
+    'team_match': """
+        id_match       INTEGER,
+        id_team        INTEGER,
+        is_home        BOOLEAN,
+        goals_for      INTEGER,
+        goals_against  INTEGER,
+        goal_diff      INTEGER,
+        outcome        CHAR(1),
+        edition        VARCHAR(4),
+        competition    VARCHAR(32),
+        match_uid      CHAR(40),
+        row_hash       CHAR(32)
+    """,
+}
+
+# Tables partitionnées : LIST (competition) puis LIST (edition), une partition
+# feuille par compétition et par édition (créée au premier chargement)
+PARTITIONED_TABLES = ['matches_normalized', 'home_stats', 'away_stats', 'team_match']
+# Tables référencées par les FK de POST_LOAD_OBJECTS : chargées avant les autres quand les clés sont en place
+REFERENCED_TABLES = ['teams_reference', 'matches_normalized']
+
+# Clé naturelle de chaque table (avec competition) : cible des upserts incrémentaux.
+# Un index unique de table partitionnée contient les clés de partition : edition incluse.
+UPSERT_KEYS = {
+    'teams_reference': ['Team_name'],
+    'matches_normalized': ['match_uid', 'edition'],
+    'home_stats': ['match_uid', 'edition'],
+    'away_stats': ['match_uid', 'edition'],
+    'team_match': ['match_uid', 'is_home', 'edition'],
+}
+ROW_HASH_COLUMN = 'row_hash'
+
+# Étape post-chargement : (nom, table, requête). Créés APRÈS le COPY (un tri
+# par index au lieu d'une mise à jour ligne à ligne), supprimés avant un rechargement.
+# Tables partitionnées : clés sur (..., edition, competition), propagées à chaque partition.
+POST_LOAD_OBJECTS = [
+    ('pk_teams_reference', 'teams_reference',
+     'ALTER TABLE teams_reference ADD CONSTRAINT pk_teams_reference PRIMARY KEY (id_team, competition)'),
+    ('pk_matches_normalized', 'matches_normalized',
+     'ALTER TABLE matches_normalized ADD CONSTRAINT pk_matches_normalized PRIMARY KEY (id_match, edition, competition)'),
+    ('pk_home_stats', 'home_stats',
+     'ALTER TABLE home_stats ADD CONSTRAINT pk_home_stats PRIMARY KEY (id_match, edition, competition)'),
+    ('pk_away_stats', 'away_stats',
+     'ALTER TABLE away_stats ADD CONSTRAINT pk_away_stats PRIMARY KEY (id_match, edition, competition)'),
+    # (id_team, id_match) en tête : historique d'une équipe par parcours d'index
+    ('pk_team_match', 'team_match',
+     'ALTER TABLE team_match ADD CONSTRAINT pk_team_match PRIMARY KEY (id_team, id_match, edition, competition)'),
+    ('fk_home_stats_match', 'home_stats',
+     'ALTER TABLE home_stats ADD CONSTRAINT fk_home_stats_match FOREIGN KEY (id_match, edition, competition) '
+     'REFERENCES matches_normalized (id_match, edition, competition)'),
+    ('fk_away_stats_match', 'away_stats',
+     'ALTER TABLE away_stats ADD CONSTRAINT fk_away_stats_match FOREIGN KEY (id_match, edition, competition) '
+     'REFERENCES matches_normalized (id_match, edition, competition)'),
+    ('fk_home_stats_team', 'home_stats',
+     'ALTER TABLE home_stats ADD CONSTRAINT fk_home_stats_team FOREIGN KEY (id_team, competition) '
+     'REFERENCES teams_reference (id_team, competition)'),
+    ('fk_away_stats_team', 'away_stats',
+     'ALTER TABLE away_stats ADD CONSTRAINT fk_away_stats_team FOREIGN KEY (id_team, competition) '
+     'REFERENCES teams_reference (id_team, competition)'),
+    ('fk_team_match_match', 'team_match',
+     'ALTER TABLE team_match ADD CONSTRAINT fk_team_match_match FOREIGN KEY (id_match, edition, competition) '
+     'REFERENCES matches_normalized (id_match, edition, competition)'),
+    ('fk_team_match_team', 'team_match',
+     'ALTER TABLE team_match ADD CONSTRAINT fk_team_match_team FOREIGN KEY (id_team, competition) '
+     'REFERENCES teams_reference (id_team, competition)'),
+    ('idx_home_stats_team', 'home_stats',
+     'CREATE INDEX idx_home_stats_team ON home_stats (id_team, competition)'),
+    ('idx_away_stats_team', 'away_stats',
+     'CREATE INDEX idx_away_stats_team ON away_stats (id_team, competition)'),
+    ('idx_matches_edition_final', 'matches_normalized',
+     'CREATE INDEX idx_matches_edition_final ON matches_normalized (edition, is_final)'),
+    ('idx_matches_date', 'matches_normalized',
+     'CREATE INDEX idx_matches_date ON matches_normalized (date)'),
+    ('uq_teams_reference_name', 'teams_reference',
+     'CREATE UNIQUE INDEX uq_teams_reference_name ON teams_reference ("Team_name", competition)'),
+    ('uq_matches_uid', 'matches_normalized',
+     'CREATE UNIQUE INDEX uq_matches_uid ON matches_normalized (match_uid, edition, competition)'),
+    ('uq_home_stats_uid', 'home_stats',
+     'CREATE UNIQUE INDEX uq_home_stats_uid ON home_stats (match_uid, edition, competition)'),
+    ('uq_away_stats_uid', 'away_stats',
+     'CREATE UNIQUE INDEX uq_away_stats_uid ON away_stats (match_uid, edition, competition)'),
+    ('uq_team_match_uid', 'team_match',
+     'CREATE UNIQUE INDEX uq_team_match_uid ON team_match (match_uid, is_home, edition, competition)'),
+]
+
+# Rechargement par bascule : tables construites hors ligne dans STAGING_SCHEMA,
+# les tables en service passent dans RETIRED_SCHEMA le temps de la bascule
+STAGING_SCHEMA = 'fifa_staging'
+# Tables de staging créées LOGGED : référencées par les FK des parents
+# partitionnés (permanents), qui refusent une table UNLOGGED. Quelques
+# centaines de lignes ; les partitions feuilles restent UNLOGGED.
+STAGING_LOGGED_TABLES = {'teams_reference'}
+RETIRED_SCHEMA = 'fifa_retired'
+SWAP_LOCK_TIMEOUT = '5s'     # abandon de la bascule plutôt que de bloquer les lectures
+# Échange d'une édition : LOCK ... NOWAIT retenté (jamais d'attente en tenant un verrou,
+# donc pas d'interblocage avec les lecteurs)
+EDITION_LOCK_ATTEMPTS = 50
+EDITION_LOCK_RETRY_DELAY = 0.1   # s
+
+# Version des données : incrémentée par chaque chargement, fait partie des clés du cache
+DATA_VERSION_TABLE = 'data_version'
+
+COPY_CHUNK_ROWS = 100_000    # lignes par tampon COPY
+FALLBACK_CHUNK_ROWS = 1000   # lignes par INSERT multi-VALUES (repli)
+STREAM_BATCH_ROWS = 10_000   # lignes par FETCH d'un curseur serveur (iter_query)
+
+# Export (export_tables) : un fichier par table, ordre stable d'un export à l'autre
+EXPORT_FORMATS = ('csv.gz', 'parquet')
+EXPORT_MANIFEST = 'manifest.json'
+EXPORT_GZIP_LEVEL = 6
+EXPORT_ORDER = {
+    'teams_reference': 'competition, id_team',
+    'matches_normalized': 'competition, id_match',
+    'home_stats': 'competition, id_match',
+    'away_stats': 'competition, id_match',
+    'team_match': 'competition, id_match, is_home DESC',
+}
+
+# Table dérivée de l'étape 07b : classements des groupes. Hors TABLE_DEFINITIONS
+# (ni partitions, ni row_hash, ni staging) : remplacée par compétition après le
+# chargement des tables, équipes désignées par "Team_name" (ids non repris).
+STANDINGS_TABLE = 'group_standings'
+STANDINGS_FILE = 'group_standings.csv'
+STANDINGS_DEFINITION = """
+    competition    VARCHAR(32),
+    edition        VARCHAR(4),
+    group_name     VARCHAR(4),
+    rank           INTEGER,
+    "Team_name"    VARCHAR(100),
+    played         INTEGER,
+    wins           INTEGER,
+    draws          INTEGER,
+    losses         INTEGER,
+    goals_for      INTEGER,
+    goals_against  INTEGER,
+    goal_diff      INTEGER,
+    points         INTEGER,
+    qualified      BOOLEAN
+"""
+STANDINGS_INDEXES = [
+    f'CREATE UNIQUE INDEX IF NOT EXISTS uq_group_standings ON {STANDINGS_TABLE} '
+    '(competition, edition, group_name, rank)',
+    # Qualifiés de chaque groupe : index partiel, seules les lignes qualified y figurent
+    f'CREATE INDEX IF NOT EXISTS idx_group_standings_qualified ON {STANDINGS_TABLE} '
+    '(competition, edition, group_name, rank) WHERE qualified',
+    f'CREATE INDEX IF NOT EXISTS idx_group_standings_team ON {STANDINGS_TABLE} (competition, "Team_name")',
+]
+
+
+def staging_table(table_name):
+    """Nom qualifié d'une table dans le schéma de staging"""
+    return f"{STAGING_SCHEMA}.{table_name}"
+
+
+def partition_name(table_name, competition, edition=None):
+    """Partition d'une compétition (niveau 1) ou d'une édition de cette compétition (feuille)"""
+    name = f"{table_name}_{competition}"
+    return name if edition is None else f"{name}_{edition}"
+
+
+def create_table_sql(table_name, unlogged=False):
+    """CREATE TABLE d'une table du projet (nom éventuellement qualifié par un schéma)
+
+    Tables partitionnées : seul le parent est créé (pas de stockage, donc
+    jamais UNLOGGED), les partitions le sont au chargement (partition_ddl).
+    """
+    base = table_name.rsplit('.', 1)[-1]
+    columns = TABLE_DEFINITIONS[base]
+    if base in PARTITIONED_TABLES:
+        return f"CREATE TABLE IF NOT EXISTS {table_name} ({columns}) PARTITION BY LIST (competition)"
+    return f"CREATE {'UNLOGGED ' if unlogged else ''}TABLE IF NOT EXISTS {table_name} ({columns})"
+
+
+def partition_ddl(table_name, pairs, leaves=True):
+    """CREATE TABLE IF NOT EXISTS des partitions de couples (competition, edition)
+
+    leaves=False : partitions de compétition seulement (rattachement d'une
+    feuille construite à part, voir replace_edition). Les feuilles du schéma
+    de staging sont UNLOGGED (repassées en LOGGED à la bascule).
+    """
+    schema, _, base = table_name.rpartition('.')
+    prefix = f"{schema}." if schema else ""
+    unlogged = "UNLOGGED " if schema == STAGING_SCHEMA else ""
+    statements = [
+        f"CREATE TABLE IF NOT EXISTS {prefix}{partition_name(base, competition)} PARTITION OF {table_name} "
+        f"FOR VALUES IN ('{competition}') PARTITION BY LIST (edition)"
+        for competition in sorted({competition for competition, _ in pairs})
+    ]
+    if leaves:
+        statements += [
+            f"CREATE {unlogged}TABLE IF NOT EXISTS {prefix}{partition_name(base, competition, edition)} "
+            f"PARTITION OF {prefix}{partition_name(base, competition)} FOR VALUES IN ('{edition}')"
+            for competition, edition in sorted(pairs)
+        ]
+    return statements
+
+
+_LEAF_CONSTRAINT = re.compile(r"^ALTER TABLE \w+ ADD CONSTRAINT \w+ (.*)$")
+_LEAF_INDEX = re.compile(r"^CREATE (UNIQUE )?INDEX \w+ ON \w+ (.*)$")
+_REFERENCES = re.compile(r"REFERENCES (\w+)")
+
+
+def leaf_objects_sql(table_name, leaf, present=None):
+    """Clés et index de POST_LOAD_OBJECTS d'une table partitionnée, recréés sur une table autonome
+
+    Construits avant ATTACH PARTITION, ils sont adoptés par les index et FK
+    du parent au lieu d'être créés sous verrou (noms choisis par PostgreSQL).
+    FK vers une table partitionnée ignorées : les lignes référencées de
+    l'édition ne sont visibles qu'une fois rattachées (vérifiées par ATTACH).
+    present : objets existants sur le parent (None : tous).
+    """
+    statements = []
+    for name, target, sql in POST_LOAD_OBJECTS:
+        if target != table_name or (present is not None and name not in present):
+            continue
+        referenced = _REFERENCES.search(sql)
+        if referenced and referenced.group(1) in PARTITIONED_TABLES:
+            continue
+        constraint = _LEAF_CONSTRAINT.match(sql)
+        if constraint:
+            statements.append(f"ALTER TABLE {leaf} ADD {constraint.group(1)}")
+        else:
+            unique, columns = _LEAF_INDEX.match(sql).groups()
+            statements.append(f"CREATE {unique or ''}INDEX ON {leaf} {columns}")
+    return statements
+
+
+def partition_pairs(df):
+    """Couples (competition, edition) présents dans un DataFrame"""
+    if 'edition' not in df.columns:
+        raise ValueError("colonne edition (clé de partition) manquante : voir add_edition")
+    keys = df[['competition', 'edition']].astype(str).drop_duplicates()
+    return set(keys.itertuples(index=False, name=None))
+
+
+def add_edition(tables):
+    """Tables normalisées d'une compétition + edition (clé de partition) sur les tables par match
+
+    Les CSV de l'étape 09 ne répètent pas l'édition dans les tables de stats :
+    elle est reprise de matches_normalized par id_match.
+    """
+    edition_of = dict(zip(tables['matches_normalized']['id_match'], tables['matches_normalized']['edition']))
+    tables = dict(tables)
+    for table_name in PARTITIONED_TABLES:
+        df = tables[table_name]
+        if 'edition' not in df.columns:
+            df = df.copy()
+            df.insert(df.columns.get_loc('competition'), 'edition', df['id_match'].map(edition_of))
+            tables[table_name] = df
+    return tables
+
+
+def iter_chunks(source, chunk_rows=COPY_CHUNK_ROWS):
+    """DataFrame ou chemin CSV (éventuellement .gz) / Parquet -> DataFrames d'au plus `chunk_rows` lignes"""
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunk_rows):
+            yield source.iloc[start:start + chunk_rows]
+    elif str(source).endswith('.parquet'):
+        require_pyarrow()
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, chunksize=chunk_rows)
+
+
+def to_copy_buffer(df):
+    """DataFrame -> tampon CSV pour COPY (NaN -> NULL, flottants entiers -> entiers)"""
+    # Une colonne entière avec des NaN est lue en float ("3.0") : refusée par COPY vers INTEGER
+    integral = {
+        col: df[col].astype('Int64') for col in df.columns
+        if df[col].dtype.kind == 'f' and (df[col].dropna() % 1 == 0).all()
+    }
+    if integral:
+        df = df.assign(**integral)
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    return buffer
+
+
+def row_hashes(df):
+    """md5 de chaque ligne : texte CSV envoyé à COPY, colonnes triées par nom (row_hash exclu)"""
+    columns = sorted(c for c in df.columns if c != ROW_HASH_COLUMN)
+    lines = to_copy_buffer(df[columns]).getvalue().splitlines()
+    return pd.Series([hashlib.md5(line.encode('utf-8')).hexdigest() for line in lines],
+                     index=df.index, dtype=object)
 
-class DatabaseManager:
+
+def with_row_hash(df):
+    """DataFrame + colonne row_hash"""
+    return df.assign(**{ROW_HASH_COLUMN: row_hashes(df)})
+
+# Pool partagé : valeurs par défaut, surchargeables dans .env
+POOL_DEFAULTS = {
+    'RENDER_DB_POOL_SIZE': '5',
+    'RENDER_DB_MAX_OVERFLOW': '5',
+    'RENDER_DB_POOL_RECYCLE': '1800',   # < coupure des connexions inactives côté hébergeur
+    'RENDER_DB_POOL_TIMEOUT': '30',
+    'RENDER_DB_POOL_PRE_PING': '1',
+}
+
+_ENGINES = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+def pool_settings():
+    """Paramètres du pool SQLAlchemy lus dans l'environnement"""
+    env = {key: os.getenv(key, default) for key, default in POOL_DEFAULTS.items()}
+    return {
+        'pool_size': int(env['RENDER_DB_POOL_SIZE']),
+        'max_overflow': int(env['RENDER_DB_MAX_OVERFLOW']),
+        'pool_recycle': int(env['RENDER_DB_POOL_RECYCLE']),
+        'pool_timeout': int(env['RENDER_DB_POOL_TIMEOUT']),
+        'pool_pre_ping': env['RENDER_DB_POOL_PRE_PING'] not in ('0', 'false', 'False'),
+    }
+
+
+# Cache des résultats de DatabaseManager.query (valeurs par défaut, surchargeables dans .env)
+CACHE_DEFAULTS = {
+    'RENDER_DB_CACHE_SIZE': '256',
+    'RENDER_DB_CACHE_TTL': '86400',      # les données ne changent qu'au chargement
+    'RENDER_DB_CACHE_DIR': '.cache/queries',
+    'RENDER_DB_VERSION_TTL': '30',       # rechargement vu par les autres processus après 30 s au plus
+}
+
+
+def cache_settings(root):
+    """Paramètres du cache des requêtes lus dans l'environnement (répertoire relatif à root)"""
+    env = {key: os.getenv(key, default) for key, default in CACHE_DEFAULTS.items()}
+    return {
+        'max_entries': int(env['RENDER_DB_CACHE_SIZE']),
+        'ttl': float(env['RENDER_DB_CACHE_TTL']),
+        'directory': root / env['RENDER_DB_CACHE_DIR'] if env['RENDER_DB_CACHE_DIR'] else None,
+        'version_ttl': float(env['RENDER_DB_VERSION_TTL']),
+    }
+
+
+def get_engine(db_url):
+    """Engine partagé par URL : tous les appelants réutilisent le même pool"""
+    with _ENGINES_LOCK:
+        if db_url not in _ENGINES:
+            _ENGINES[db_url] = create_engine(db_url, **pool_settings())
+        return _ENGINES[db_url]
+
+class BaseDatabaseManager(ABC):
+    """API commune des gestionnaires de base : chargement par compétition et lecture
+
+    Implémentée par DatabaseManager (PostgreSQL) et database.embedded.EmbeddedDatabaseManager
+    (DuckDB / SQLite). Partitions, staging, incrémental, export et fonctions
+    KPI paramétrées restent propres à DatabaseManager.
+    """
+
+    @abstractmethod
+    def connect_database(self):
+        """Ouvrir la connexion (ou la base locale)"""
+
+    @abstractmethod
+    def create_simple_tables(self, drop=True):
+        """Créer les tables de TABLE_DEFINITIONS sans contraintes (drop=False : seulement si absentes)"""
+
+    @abstractmethod
+    def drop_post_load_objects(self):
+        """Supprimer clés et index avant un chargement"""
+
+    @abstractmethod
+    def build_post_load_objects(self, only_missing=False, schema=None):
+        """Créer clés et index de POST_LOAD_OBJECTS puis ANALYZE -> {nom: secondes}
+
+        schema : tables de ce schéma (staging) au lieu des tables en service.
+        """
+
+    @abstractmethod
+    def bulk_load(self, table_name, source, competition=None, truncate=False, chunk_rows=COPY_CHUNK_ROWS):
+        """Charger un DataFrame ou un CSV dans une table déjà créée, une transaction -> lignes chargées"""
+
+    @abstractmethod
+    def delete_competition(self, competition):
+        """Supprimer les lignes d'une compétition dans toutes les tables (une transaction)"""
+
+    @abstractmethod
+    def load_tables_concurrently(self, tables, competition, keys_in_place=False):
+        """Remplacer une compétition dans plusieurs tables ({table: DataFrame}) -> {table: lignes}"""
+
+    @abstractmethod
+    def load_group_standings(self, source, competition):
+        """Classements des groupes d'une compétition -> table group_standings"""
+
+    @abstractmethod
+    def refresh_kpi_views(self):
+        """Vues KPI de db/kpi_views.sql -> {vue: (action, secondes)}"""
+
+    @abstractmethod
+    def query(self, sql, params=None, cache=True):
+        """Requête de lecture -> DataFrame (cache=False : lecture directe)"""
+
+    @abstractmethod
+    def group_qualifiers(self, edition=None, competition=DEFAULT_COMPETITION, cache=True):
+        """Équipes qualifiées de chaque groupe (toutes éditions ou une)"""
+
+    def replace_competition(self, table_name, competition, df):
+        """Remplacer les lignes d'une compétition : DELETE + chargement dans une transaction"""
+        n = self.bulk_load(table_name, df, competition=competition)
+        print(f"✅ {table_name} [{competition}]: {n} lignes chargées")
+        return n
+
+    def append_rows(self, table_name, df):
+        """Ajouter un lot de lignes dans une table déjà créée (mode streaming)"""
+        return self.bulk_load(table_name, df)
+
+    def load_single_table(self, table_name, df):
+        """Charger un DataFrame dans une table (vidée puis chargée, types conservés)"""
+        try:
+            n = self.bulk_load(table_name, df, truncate=True)
+            print(f"✅ {table_name}: {n} lignes chargées")
+            return n
+        except Exception as e:
+            print(f"❌ Erreur {table_name}: {e}")
+            return 0
+
+class DatabaseManager(BaseDatabaseManager):
     """Gestionnaire simple base PostgreSQL Render"""
     
     def __init__(self):
@@ -29,6 +547,10 @@ class DatabaseManager:
         self.root = Path(__file__).resolve().parents[2]
         self.env_file = self.root / ".env"
         self.engine = None
+        self.max_connections = 1
+        self.cache = None
+        self.version_ttl = 0
+        self._version = (None, 0.0)   # (version des données, lue à)
     
     def check_env_file(self):
         """1. Vérifier existence .env (ne crée PAS de fichier)"""
@@ -50,66 +572,786 @@ class DatabaseManager:
         if not db_url:
             raise ValueError("RENDER_DATABASE_URL manquante dans .env")
             
-        self.engine = create_engine(db_url)
-        print("✅ Connexion PostgreSQL établie")
+        self.engine = get_engine(db_url)
+        settings = cache_settings(self.root)
+        self.version_ttl = settings.pop('version_ttl')
+        self.cache = QueryCache(**settings)
+        settings = pool_settings()
+        self.max_connections = settings['pool_size'] + settings['max_overflow']
+        print(f"✅ Connexion PostgreSQL établie (pool {settings['pool_size']} + {settings['max_overflow']} overflow)")
         return True
     
-    def create_simple_tables(self):
-        """Créer tables simples SANS contraintes ni index"""
-        sql_commands = [
-            """
-            DROP TABLE IF EXISTS teams_reference CASCADE;
-            CREATE TABLE teams_reference (
-                id_team      INTEGER,
-                team_name    VARCHAR(100)
-            );
-            """,
-            """
-            DROP TABLE IF EXISTS matches_normalized CASCADE;
-            CREATE TABLE matches_normalized (
-                id_match     INTEGER,
-                result       INTEGER,
-                date         DATE,
-                round        VARCHAR(50),
-                city         VARCHAR(100),
-                edition      VARCHAR(4),
-                is_final     BOOLEAN
-            );
-            """,
-            """
-            DROP TABLE IF EXISTS home_stats CASCADE;
-            CREATE TABLE home_stats (
-                id_match                    INTEGER,
-                id_team                     INTEGER,
-                number_of_goals_scored      INTEGER,
-                number_of_goals_conceded    INTEGER
-            );
-            """,
-            """
-            DROP TABLE IF EXISTS away_stats CASCADE;
-            CREATE TABLE away_stats (
-                id_match                    INTEGER,
-                id_team                     INTEGER,
-                number_of_goals_scored      INTEGER,
-                number_of_goals_conceded    INTEGER
-            );
-            """
-        ]
-        
+    def create_simple_tables(self, drop=True):
+        """Créer tables simples SANS contraintes ni index (ajoutés après
+        chargement par build_post_load_objects)
+
+        Tables par match partitionnées (PARTITIONED_TABLES) : partitions
+        créées au chargement de chaque compétition / édition.
+        drop=False : tables créées seulement si absentes (rechargement
+        d'une compétition sans toucher aux autres)
+        """
         with self.engine.connect() as conn:
-            for sql in sql_commands:
-                conn.execute(text(sql))
+            for table_name in TABLE_DEFINITIONS:
+                if drop:
+                    conn.execute(text(f"DROP TABLE IF EXISTS {table_name} CASCADE"))
+                conn.execute(text(create_table_sql(table_name)))
             conn.commit()
         
         print("✅ Tables simples créées (sans contraintes)")
         return True
     
-    def load_single_table(self, table_name, df):
-        """Charger un DataFrame dans une table"""
+    def drop_post_load_objects(self):
+        """Supprimer clés et index avant un chargement (COPY sans maintenance d'index ni contrôle FK)"""
+        with self.engine.begin() as conn:
+            for name, table_name, sql in reversed(POST_LOAD_OBJECTS):
+                if sql.startswith('CREATE'):
+                    conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+                else:
+                    conn.execute(text(f"ALTER TABLE IF EXISTS {table_name} DROP CONSTRAINT IF EXISTS {name}"))
+        return True
+
+    def post_load_objects_present(self):
+        """Noms des clés et index post-chargement déjà présents (schéma courant)"""
+        with self.engine.connect() as conn:
+            return set(conn.execute(text(
+                "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() "
+                "UNION SELECT conname FROM pg_constraint WHERE connamespace = current_schema()::regnamespace"
+            )).scalars())
+
+    def build_post_load_objects(self, only_missing=False, schema=None):
+        """Créer PK, FK et index une fois les données en place, puis ANALYZE
+
+        schema       : construire sur les tables de ce schéma (staging) au lieu
+                       des tables en service. Les feuilles du staging restent
+                       UNLOGGED : index et ANALYZE sans WAL, passage en LOGGED
+                       à la bascule seulement (swap_staging).
+        only_missing : ne créer que les objets absents (rien à faire -> pas d'ANALYZE)
+        Renvoie la durée de chaque création ({nom: secondes}, 'ANALYZE' compris).
+        """
+        objects = POST_LOAD_OBJECTS
+        if only_missing:
+            present = self.post_load_objects_present()
+            objects = [obj for obj in POST_LOAD_OBJECTS if obj[0] not in present]
+            if not objects:
+                return {}
+
+        timings = {}
+        with self.engine.begin() as conn:
+            if schema:
+                conn.execute(text(f"SET LOCAL search_path TO {schema}"))
+            for name, table_name, sql in objects:
+                start = time.perf_counter()
+                conn.execute(text(sql))
+                timings[name] = time.perf_counter() - start
+            start = time.perf_counter()
+            conn.execute(text("ANALYZE " + ", ".join(TABLE_DEFINITIONS)))
+            timings['ANALYZE'] = time.perf_counter() - start
+        return timings
+
+    def create_staging_tables(self):
+        """(Re)créer le schéma de staging : tables UNLOGGED, sans contraintes
+
+        UNLOGGED (partitions feuilles et tables simples hors
+        STAGING_LOGGED_TABLES) : ni le COPY ni la construction des index
+        n'écrivent de WAL ; les tables repassent en LOGGED juste avant la
+        bascule (swap_staging).
+        Une bascule interrompue est d'abord terminée : partitions des tables
+        déjà en service rapatriées avant la suppression du staging.
+        """
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {RETIRED_SCHEMA} CASCADE"))
+        self._adopt_staging_partitions()
+
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {STAGING_SCHEMA} CASCADE"))
+            conn.execute(text(f"CREATE SCHEMA {STAGING_SCHEMA}"))
+            for table_name in TABLE_DEFINITIONS:
+                conn.execute(text(create_table_sql(
+                    staging_table(table_name), unlogged=table_name not in STAGING_LOGGED_TABLES)))
+
+        print(f"✅ Tables de staging créées ({STAGING_SCHEMA}, UNLOGGED)")
+        return True
+
+    def copy_live_rows(self, exclude):
+        """Recopier en staging les compétitions en service non rechargées
+
+        exclude : compétitions rechargées (leurs lignes ne sont pas recopiées).
+        Simple lecture des tables en service : les lecteurs ne sont pas bloqués.
+        """
+        counts = {}
+        with self.engine.begin() as conn:
+            for table_name in TABLE_DEFINITIONS:
+                if conn.execute(text("SELECT to_regclass(:t)"), {"t": table_name}).scalar() is None:
+                    continue
+                if table_name in PARTITIONED_TABLES:
+                    pairs = conn.execute(text(
+                        f"SELECT DISTINCT competition, edition FROM {table_name} WHERE competition <> ALL(:exclude)"
+                    ), {"exclude": list(exclude)}).all()
+                    for statement in partition_ddl(staging_table(table_name), set(map(tuple, pairs))):
+                        conn.execute(text(statement))
+                columns = ", ".join(
+                    f'"{c}"' for c in conn.execute(text(
+                        "SELECT column_name FROM information_schema.columns "
+                        "WHERE table_schema = :schema AND table_name = :table ORDER BY ordinal_position"
+                    ), {"schema": STAGING_SCHEMA, "table": table_name}).scalars()
+                )
+                result = conn.execute(text(
+                    f"INSERT INTO {staging_table(table_name)} ({columns}) "
+                    f"SELECT {columns} FROM {table_name} WHERE competition <> ALL(:exclude)"
+                ), {"exclude": list(exclude)})
+                counts[table_name] = result.rowcount
+        return counts
+
+    def swap_staging(self):
+        """Mettre les tables de staging en service en une transaction courte
+
+        1. tables de staging repassées en LOGGED (réécriture des tables et de
+           leurs index dans le WAL, hors verrou des tables en service),
+        2. une transaction : tables et vues KPI en service -> RETIRED_SCHEMA,
+           tables et vues de staging -> schéma courant (index, clés et
+           statistiques suivent). Seuls les parents changent de schéma : les
+           partitions suivent leur parent quel que soit leur propre schéma,
+        3. anciennes tables (et leurs partitions) supprimées, puis partitions
+           des nouvelles tables rapatriées du staging une à une.
+
+        Seule l'étape 2 prend un verrou exclusif sur les tables lues ; elle est
+        abandonnée au bout de SWAP_LOCK_TIMEOUT si une lecture longue la bloque
+        (les tables en service restent alors intactes).
+        Renvoie la durée de la bascule (s).
+        """
+        self._set_staging_logged()
+
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {RETIRED_SCHEMA} CASCADE"))
+            conn.execute(text(f"CREATE SCHEMA {RETIRED_SCHEMA}"))
+
+        start = time.perf_counter()
+        with self.engine.begin() as conn:
+            conn.execute(text(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'"))
+            live_schema = conn.execute(text("SELECT current_schema()")).scalar()
+            for table_name in TABLE_DEFINITIONS:
+                conn.execute(text(f"ALTER TABLE IF EXISTS {live_schema}.{table_name} SET SCHEMA {RETIRED_SCHEMA}"))
+                conn.execute(text(f"ALTER TABLE {staging_table(table_name)} SET SCHEMA {live_schema}"))
+            for view, _ in load_kpi_views():
+                conn.execute(text(f"ALTER MATERIALIZED VIEW IF EXISTS {live_schema}.{view} SET SCHEMA {RETIRED_SCHEMA}"))
+                conn.execute(text(f"ALTER MATERIALIZED VIEW IF EXISTS {staging_table(view)} SET SCHEMA {live_schema}"))
+        elapsed = time.perf_counter() - start
+
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {RETIRED_SCHEMA} CASCADE"))
+        self._adopt_staging_partitions()
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {STAGING_SCHEMA}"))
+        return elapsed
+
+    def _adopt_staging_partitions(self):
+        """Partitions restées en staging alors que leur table est en service -> schéma courant
+
+        Une transaction par partition : verrou bref sur chacune, jamais sur
+        toutes à la fois. Renvoie le nombre de partitions déplacées.
+        """
+        with self.engine.connect() as conn:
+            live_schema = conn.execute(text("SELECT current_schema()")).scalar()
+            names = conn.execute(text(
+                "SELECT c.relname FROM pg_class c JOIN pg_class r ON r.oid = pg_partition_root(c.oid) "
+                "WHERE c.relispartition AND c.relkind IN ('r', 'p') AND c.relnamespace = to_regnamespace(:schema) "
+                "AND r.relnamespace <> c.relnamespace"
+            ), {"schema": STAGING_SCHEMA}).scalars().all()
+        for name in names:
+            with self.engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {staging_table(name)} SET SCHEMA {live_schema}"))
+        return len(names)
+
+    def _set_staging_logged(self):
+        """Tables de staging repassées en LOGGED (sans effet si déjà LOGGED)"""
+        with self.engine.begin() as conn:
+            for table_name in TABLE_DEFINITIONS:
+                if table_name in PARTITIONED_TABLES:
+                    # Un parent partitionné n'a pas de stockage : seules les feuilles sont UNLOGGED
+                    names = [name for name, leaf in self._partitions(conn, staging_table(table_name)) if leaf]
+                else:
+                    names = [table_name]
+                for name in names:
+                    conn.execute(text(f"ALTER TABLE {staging_table(name)} SET LOGGED"))
+
+    @staticmethod
+    def _partitions(conn, table_name):
+        """Partitions d'une table (tous niveaux, parents d'abord) : [(nom, feuille)]
+
+        Table absente ou non partitionnée : liste vide.
+        """
+        return conn.execute(text(
+            "SELECT c.relname, p.isleaf FROM pg_partition_tree(to_regclass(:table)) p "
+            "JOIN pg_class c ON c.oid = p.relid WHERE p.level > 0 ORDER BY p.level, c.relname"
+        ), {"table": table_name}).all()
+
+    def replace_edition(self, competition, edition, tables):
+        """Remplacer une édition d'une compétition par détachement / rattachement de partitions
+
+        tables : {table partitionnée: lignes de l'édition}, ids déjà alignés
+        sur la base (voir database.incremental.plan_edition).
+        1. chaque table est chargée par COPY dans une table autonome
+           <feuille>_next, hors verrou : les lecteurs voient l'ancienne édition.
+           Y sont aussi construits, toujours hors verrou, un CHECK égal à la
+           contrainte de partition (ATTACH ne parcourt pas la table) et les
+           clés / index du parent (adoptés par ATTACH, voir leaf_objects_sql),
+        2. une transaction : tables racines et partitions de la compétition
+           verrouillées d'un coup (NOWAIT, retenté), anciennes feuilles
+           détachées (tables référençantes d'abord) et supprimées, tables
+           _next renommées et rattachées, CHECK supprimés.
+        Sous verrou ne restent que les FK vers matches_normalized (une
+        recherche d'index par ligne de l'édition) : les lecteurs de la
+        compétition attendent de l'ordre de la taille d'une édition, pas de la
+        construction de ses index.
+        Les autres éditions et compétitions ne sont pas touchées.
+        Renvoie {table: lignes chargées}.
+        """
+        counts = {}
+        present = self.post_load_objects_present()
+        raw = self.engine.raw_connection()
         try:
-            df.to_sql(table_name, self.engine, if_exists='replace', index=False)
-            print(f"✅ {table_name}: {len(df)} lignes chargées")
-            return len(df)
-        except Exception as e:
-            print(f"❌ Erreur {table_name}: {e}")
-            return 0
\ No newline at end of file
+            cursor = raw.cursor()
+            for table_name in PARTITIONED_TABLES:
+                df = tables[table_name]
+                if ROW_HASH_COLUMN not in df.columns:
+                    df = with_row_hash(df)
+                leaf = partition_name(table_name, competition, edition)
+                cursor.execute(f"DROP TABLE IF EXISTS {leaf}_next")
+                cursor.execute(f"CREATE TABLE {leaf}_next (LIKE {table_name})")
+                columns = ", ".join(f'"{c}"' for c in df.columns)
+                cursor.copy_expert(f"COPY {leaf}_next ({columns}) FROM STDIN WITH (FORMAT csv)",
+                                   to_copy_buffer(df))
+                counts[table_name] = len(df)
+                cursor.execute(f"ALTER TABLE {leaf}_next ADD CONSTRAINT {leaf}_bound CHECK ("
+                               f"competition IS NOT NULL AND competition = '{competition}' "
+                               f"AND edition IS NOT NULL AND edition = '{edition}')")
+                for statement in leaf_objects_sql(table_name, f"{leaf}_next", present):
+                    cursor.execute(statement)
+                for statement in partition_ddl(table_name, {(competition, str(edition))}, leaves=False):
+                    cursor.execute(statement)
+            raw.commit()
+
+            # Tables racines aussi : détacher / supprimer une feuille retire ses triggers de FK
+            self._lock_nowait(raw, [f"ONLY {table_name}" for table_name in TABLE_DEFINITIONS]
+                              + [partition_name(table_name, competition) for table_name in PARTITIONED_TABLES])
+            for table_name in reversed(PARTITIONED_TABLES):
+                leaf = partition_name(table_name, competition, edition)
+                cursor.execute("SELECT to_regclass(%s)", (leaf,))
+                if cursor.fetchone()[0] is not None:
+                    cursor.execute(f"ALTER TABLE {partition_name(table_name, competition)} DETACH PARTITION {leaf}")
+                    cursor.execute(f"DROP TABLE {leaf}")
+            for table_name in PARTITIONED_TABLES:
+                leaf = partition_name(table_name, competition, edition)
+                cursor.execute(f"ALTER TABLE {leaf}_next RENAME TO {leaf}")
+                cursor.execute(f"ALTER TABLE {partition_name(table_name, competition)} "
+                               f"ATTACH PARTITION {leaf} FOR VALUES IN ('{edition}')")
+                cursor.execute(f"ALTER TABLE {leaf} DROP CONSTRAINT {leaf}_bound")
+            raw.commit()
+
+            cursor.execute("ANALYZE " + ", ".join(
+                partition_name(table_name, competition, edition) for table_name in PARTITIONED_TABLES))
+            raw.commit()
+            return counts
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+
+    @staticmethod
+    def _lock_nowait(raw, tables):
+        """ACCESS EXCLUSIVE sur `tables` en une instruction NOWAIT, retentée jusqu'à EDITION_LOCK_ATTEMPTS fois
+
+        Ouvre la transaction qui garde les verrous (à valider par l'appelant).
+        """
+        cursor = raw.cursor()
+        for attempt in range(EDITION_LOCK_ATTEMPTS):
+            try:
+                cursor.execute(f"LOCK TABLE {', '.join(tables)} IN ACCESS EXCLUSIVE MODE NOWAIT")
+                return
+            except psycopg2.errors.LockNotAvailable:
+                raw.rollback()
+                if attempt == EDITION_LOCK_ATTEMPTS - 1:
+                    raise
+                time.sleep(EDITION_LOCK_RETRY_DELAY)
+
+    def refresh_kpi_views(self, schema=None):
+        """Vues matérialisées KPI : créées si absentes, sinon REFRESH CONCURRENTLY
+
+        CONCURRENTLY : les lecteurs continuent de lire l'ancienne version
+        pendant le rafraîchissement (index unique requis, défini avec la vue).
+        ANALYZE ensuite : le planificateur choisit les index de lecture.
+        schema : vues créées / rafraîchies dans ce schéma (staging).
+        Renvoie {vue: ('créée' | 'rafraîchie', secondes)}.
+        """
+        timings = {}
+        with self.engine.begin() as conn:
+            if schema:
+                conn.execute(text(f"SET LOCAL search_path TO {schema}"))
+            for view, statements in load_kpi_views():
+                start = time.perf_counter()
+                if conn.execute(text("SELECT to_regclass(:view)"), {"view": view}).scalar() is None:
+                    for statement in statements:
+                        conn.execute(text(statement))
+                    action = 'créée'
+                else:
+                    # Index éventuellement ajoutés depuis la création (IF NOT EXISTS)
+                    for statement in statements[1:]:
+                        conn.execute(text(statement))
+                    conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+                    action = 'rafraîchie'
+                conn.execute(text(f"ANALYZE {view}"))
+                timings[view] = (action, time.perf_counter() - start)
+        return timings
+
+    def create_kpi_functions(self):
+        """Fonctions KPI paramétrées (db/kpi_functions.sql) créées ou remplacées
+
+        Corps résolus à l'exécution : créées une fois dans le schéma courant,
+        elles lisent les tables et vues en service, y compris après une bascule.
+        Renvoie la liste des fonctions.
+        """
+        functions = load_kpi_functions()
+        with self.engine.begin() as conn:
+            for _, statement in functions:
+                conn.execute(text(statement))
+        return [name for name, _ in functions]
+
+    def load_group_standings(self, source, competition):
+        """Classements des groupes d'une compétition (CSV ou DataFrame de l'étape 07b)
+
+        Table et index créés si absents, lignes de la compétition remplacées
+        (DELETE + COPY dans une transaction : jamais de classement partiel
+        visible), puis ANALYZE. Renvoie le nombre de lignes chargées.
+        """
+        with self.engine.begin() as conn:
+            conn.execute(text(f"CREATE TABLE IF NOT EXISTS {STANDINGS_TABLE} ({STANDINGS_DEFINITION})"))
+            for statement in STANDINGS_INDEXES:
+                conn.execute(text(statement))
+        n = self.bulk_load(STANDINGS_TABLE, source, competition=competition)
+        with self.engine.begin() as conn:
+            conn.execute(text(f"ANALYZE {STANDINGS_TABLE}"))
+        return n
+
+    def bump_data_version(self):
+        """Nouvelle version des données (après un chargement) : toutes les entrées du cache périment"""
+        with self.engine.begin() as conn:
+            conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DATA_VERSION_TABLE} "
+                              "(id INTEGER PRIMARY KEY, version BIGINT NOT NULL, loaded_at TIMESTAMPTZ NOT NULL)"))
+            version = conn.execute(text(
+                f"INSERT INTO {DATA_VERSION_TABLE} VALUES (1, 1, now()) "
+                f"ON CONFLICT (id) DO UPDATE SET version = {DATA_VERSION_TABLE}.version + 1, loaded_at = now() "
+                "RETURNING version"
+            )).scalar()
+        self._version = (version, time.monotonic())
+        return version
+
+    def data_version(self):
+        """Version des données en base, relue au plus toutes les `version_ttl` secondes
+
+        0 si aucun chargement ne l'a encore écrite.
+        """
+        version, read_at = self._version
+        if version is not None and time.monotonic() - read_at < self.version_ttl:
+            return version
+        with self.engine.connect() as conn:
+            if conn.execute(text("SELECT to_regclass(:t)"), {"t": DATA_VERSION_TABLE}).scalar() is None:
+                version = 0
+            else:
+                version = conn.execute(text(f"SELECT version FROM {DATA_VERSION_TABLE} WHERE id = 1")).scalar() or 0
+        self._version = (version, time.monotonic())
+        return version
+
+    def query(self, sql, params=None, cache=True):
+        """Requête de lecture -> DataFrame, résultat en cache (LRU/TTL, mémoire et disque)
+
+        Clé : SQL normalisé + paramètres + version des données. Tant que la
+        version est récente (version_ttl), un résultat en cache ne touche pas la base.
+        cache=False : lecture directe, résultat non mis en cache.
+        """
+        if not cache:
+            with self.engine.connect() as conn:
+                return pd.read_sql(text(sql), conn, params=params)
+        key = cache_key(sql, params, self.data_version())
+        df = self.cache.get(key)
+        if df is None:
+            with self.engine.connect() as conn:
+                df = pd.read_sql(text(sql), conn, params=params)
+            self.cache.put(key, df)
+        return df
+
+    def team_record(self, team, competition=DEFAULT_COMPETITION, cache=True):
+        """Bilan d'une équipe (une ligne de mv_team_record, vide si équipe inconnue)"""
+        return self.query("SELECT * FROM kpi_team_record(:competition, :team)",
+                          {"competition": competition, "team": team}, cache=cache)
+
+    def team_matches(self, team, competition=DEFAULT_COMPETITION, cache=True):
+        """Matchs d'une équipe avec adversaire et score, par date"""
+        return self.query("SELECT * FROM kpi_team_matches(:competition, :team)",
+                          {"competition": competition, "team": team}, cache=cache)
+
+    def head_to_head(self, team_1, team_2, competition=DEFAULT_COMPETITION, cache=True):
+        """Bilan des confrontations du point de vue de team_1 (une ligne, à zéro si jamais rencontrées)"""
+        return self.query("SELECT * FROM kpi_head_to_head(:competition, :team_1, :team_2)",
+                          {"competition": competition, "team_1": team_1, "team_2": team_2}, cache=cache)
+
+    def head_to_head_matches(self, team_1, team_2, competition=DEFAULT_COMPETITION, cache=True):
+        """Matchs entre deux équipes du point de vue de team_1, par date"""
+        return self.query("SELECT * FROM kpi_head_to_head_matches(:competition, :team_1, :team_2)",
+                          {"competition": competition, "team_1": team_1, "team_2": team_2}, cache=cache)
+
+    def group_qualifiers(self, edition=None, competition=DEFAULT_COMPETITION, cache=True):
+        """Équipes qualifiées de chaque groupe (toutes éditions ou une), lues par l'index partiel"""
+        params = {"competition": competition}
+        where = "competition = :competition AND qualified"
+        if edition is not None:
+            where += " AND edition = :edition"
+            params["edition"] = str(edition)
+        return self.query(f'SELECT edition, group_name, rank, "Team_name", points FROM {STANDINGS_TABLE} '
+                          f'WHERE {where} ORDER BY edition, group_name, rank', params, cache=cache)
+
+    def iter_query(self, sql, params=None, batch_rows=STREAM_BATCH_ROWS, arrow=False):
+        """Lire un résultat en flux : lots typés de `batch_rows` lignes au plus
+
+        Curseur serveur nommé (DECLARE CURSOR + FETCH `batch_rows`) : le client
+        ne garde qu'un lot en mémoire quelle que soit la taille du résultat, et
+        le premier lot arrive sans attendre la fin de la requête.
+        Au moins un lot est renvoyé (vide si aucune ligne).
+        Paramètres au format SQLAlchemy (:nom), comme query().
+        arrow=True : lots pyarrow.RecordBatch au lieu de DataFrames.
+        Le curseur et la transaction sont fermés à la fin ou si l'appelant s'arrête avant.
+        """
+        if arrow:
+            require_pyarrow()
+        raw = self.engine.raw_connection()
+        try:
+            yield from self._cursor_batches(raw, sql, params, batch_rows, arrow)
+        finally:
+            raw.rollback()
+            raw.close()
+
+    def _cursor_batches(self, raw, sql, params, batch_rows, arrow):
+        """Lots d'un curseur serveur nommé ouvert dans la transaction en cours de `raw`"""
+        to_batch = arrow_batch if arrow else frame_batch
+        compiled = text(sql).compile(dialect=self.engine.dialect)
+        with raw.cursor(name=f"iter_query_{id(raw)}_{time.monotonic_ns()}") as cursor:
+            cursor.itersize = batch_rows
+            cursor.execute(compiled.string, compiled.construct_params(params or {}))
+            rows = cursor.fetchmany(batch_rows)
+            # Résultat vide : un lot vide (colonnes typées) est quand même renvoyé
+            yield to_batch(rows, cursor.description)
+            while len(rows) == batch_rows:
+                rows = cursor.fetchmany(batch_rows)
+                if not rows:
+                    break
+                yield to_batch(rows, cursor.description)
+
+    def export_tables(self, directory, fmt='csv.gz', tables=None, competitions=None, workers=None):
+        """Exporter les tables dans `directory` : un fichier par table + manifest.json
+
+        fmt : 'csv.gz' (COPY ... TO STDOUT, CSV avec en-tête compressé à la volée)
+              ou 'parquet' (curseur serveur, lots Arrow typés ; pip install pyarrow).
+        Tables exportées en parallèle sur des connexions du pool, toutes dans le
+        même instantané (pg_export_snapshot) : l'export est cohérent même si un
+        chargement a lieu pendant. Fichiers relisibles par bulk_load / restore_tables.
+        Renvoie {table: lignes exportées}.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Format d'export inconnu: {fmt!r} (attendu: {', '.join(EXPORT_FORMATS)})")
+        if fmt == 'parquet':
+            require_pyarrow()
+        tables = tables or list(TABLE_DEFINITIONS)
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        # Transaction coordinatrice : garde l'instantané ouvert pendant l'export
+        coordinator = self.engine.raw_connection()
+        try:
+            cursor = coordinator.cursor()
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+            cursor.execute("SELECT pg_export_snapshot()")
+            snapshot = cursor.fetchone()[0]
+            cursor.execute(f"SELECT version FROM {DATA_VERSION_TABLE} WHERE id = 1"
+                           if self._has_table(cursor, DATA_VERSION_TABLE) else "SELECT 0")
+            version = cursor.fetchone()[0]
+
+            workers = workers or max(1, min(len(tables), self.max_connections - 1))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    table_name: executor.submit(self._export_table, table_name, directory, fmt,
+                                                snapshot, competitions)
+                    for table_name in tables
+                }
+                counts = {table_name: future.result() for table_name, future in futures.items()}
+        finally:
+            coordinator.rollback()
+            coordinator.close()
+
+        manifest = {
+            'format': fmt,
+            'data_version': version,
+            'exported_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'competitions': competitions,
+            'tables': {table_name: {'file': f"{table_name}.{fmt}", 'rows': n} for table_name, n in counts.items()},
+        }
+        (directory / EXPORT_MANIFEST).write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+        return counts
+
+    @staticmethod
+    def _has_table(cursor, table_name):
+        cursor.execute("SELECT to_regclass(%s)", (table_name,))
+        return cursor.fetchone()[0] is not None
+
+    def _export_table(self, table_name, directory, fmt, snapshot, competitions):
+        """Exporter une table dans l'instantané `snapshot` (une connexion du pool)"""
+        where = "WHERE competition = ANY(%(competitions)s)" if competitions else ""
+        sql = f"SELECT * FROM {table_name} {where} ORDER BY {EXPORT_ORDER[table_name]}"
+        path = directory / f"{table_name}.{fmt}"
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+            cursor.execute("SET TRANSACTION SNAPSHOT %s", (snapshot,))
+            if fmt == 'parquet':
+                import pyarrow.parquet as pq
+
+                writer, n = None, 0
+                sql = sql.replace("%(competitions)s", ":competitions")
+                try:
+                    for batch in self._cursor_batches(raw, sql, {"competitions": competitions},
+                                                      STREAM_BATCH_ROWS, arrow=True):
+                        writer = writer or pq.ParquetWriter(path, batch.schema)
+                        writer.write_batch(batch)
+                        n += batch.num_rows
+                finally:
+                    if writer:
+                        writer.close()
+                return n
+            # COPY vers un CSV compressé : le serveur produit le texte, le client ne fait que l'écrire
+            query = cursor.mogrify(sql, {"competitions": competitions}).decode()
+            with gzip.open(path, 'wb', compresslevel=EXPORT_GZIP_LEVEL) as f:
+                cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", f)
+            return cursor.rowcount
+        finally:
+            raw.rollback()
+            raw.close()
+
+    def restore_tables(self, directory):
+        """Recharger un export (export_tables) : tables recréées, COPY, clés et index, vues
+
+        Les row_hash exportés sont conservés. Renvoie {table: lignes chargées}.
+        """
+        directory = Path(directory)
+        manifest = json.loads((directory / EXPORT_MANIFEST).read_text(encoding='utf-8'))
+        self.create_simple_tables(drop=True)
+        self.drop_post_load_objects()
+        counts = {}
+        # Ordre de TABLE_DEFINITIONS : référentiel avant les tables par match
+        for table_name in [t for t in TABLE_DEFINITIONS if t in manifest['tables']]:
+            counts[table_name] = self.bulk_load(table_name, directory / manifest['tables'][table_name]['file'])
+            print(f"✅ {table_name}: {counts[table_name]} lignes restaurées")
+        self.build_post_load_objects()
+        self.refresh_kpi_views()
+        self.create_kpi_functions()
+        self.bump_data_version()
+        return counts
+
+    def fetch_state(self, competition, columns):
+        """Colonnes demandées ({table: [colonnes]}) des lignes d'une compétition en base"""
+        state = {}
+        with self.engine.connect() as conn:
+            for table_name, table_columns in columns.items():
+                selected = ", ".join(f'"{c}"' for c in table_columns)
+                state[table_name] = pd.read_sql(
+                    text(f"SELECT {selected} FROM {table_name} WHERE competition = :competition"),
+                    conn, params={"competition": competition},
+                )
+        return state
+
+    def apply_delta(self, competition, deltas):
+        """Appliquer un delta d'une compétition en une transaction
+
+        deltas : {table: (lignes à insérer ou mettre à jour, clés supprimées)},
+        clés supprimées = DataFrame des colonnes de UPSERT_KEYS ; tables
+        absentes du dict non touchées. Partitions manquantes créées avant l'upsert.
+        Upserts (COPY dans une table temporaire puis INSERT ... ON CONFLICT sur
+        la clé naturelle) dans l'ordre des FK, puis DELETE ciblés (clés copiées
+        dans une table temporaire) en ordre inverse. Les lignes inchangées ne
+        sont pas touchées.
+        Nécessite les index uniques post-chargement (uq_*).
+        """
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            for table_name in [t for t in TABLE_DEFINITIONS if t in deltas]:
+                upserts = deltas[table_name][0]
+                if not len(upserts):
+                    continue
+                if table_name in PARTITIONED_TABLES:
+                    for statement in partition_ddl(table_name, partition_pairs(upserts)):
+                        cursor.execute(statement)
+                keys = UPSERT_KEYS[table_name]
+                columns = ", ".join(f'"{c}"' for c in upserts.columns)
+                conflict = ", ".join(f'"{c}"' for c in keys)
+                updates = ", ".join(f'"{c}" = EXCLUDED."{c}"' for c in upserts.columns
+                                    if c not in (*keys, 'competition'))
+                cursor.execute(f"CREATE TEMP TABLE delta_{table_name} (LIKE {table_name}) ON COMMIT DROP")
+                cursor.copy_expert(f"COPY delta_{table_name} ({columns}) FROM STDIN WITH (FORMAT csv)",
+                                   to_copy_buffer(upserts))
+                cursor.execute(
+                    f"INSERT INTO {table_name} ({columns}) SELECT {columns} FROM delta_{table_name} "
+                    f"ON CONFLICT ({conflict}, competition) DO UPDATE SET {updates}"
+                )
+            for table_name in [t for t in reversed(TABLE_DEFINITIONS) if t in deltas]:
+                deleted = deltas[table_name][1]
+                if not len(deleted):
+                    continue
+                keys = UPSERT_KEYS[table_name]
+                key_columns = ", ".join(f'"{c}"' for c in keys)
+                cursor.execute(f"CREATE TEMP TABLE gone_{table_name} (LIKE {table_name}) ON COMMIT DROP")
+                cursor.copy_expert(f"COPY gone_{table_name} ({key_columns}) FROM STDIN WITH (FORMAT csv)",
+                                   to_copy_buffer(deleted[keys]))
+                matched = " AND ".join(f't."{c}" = g."{c}"' for c in keys)
+                cursor.execute(
+                    f"DELETE FROM {table_name} t USING gone_{table_name} g "
+                    f"WHERE t.competition = %s AND {matched}",
+                    (competition,),
+                )
+            raw.commit()
+            return True
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+
+    def delete_competition(self, competition):
+        """Supprimer les lignes d'une compétition dans toutes les tables (une transaction)
+
+        Tables filles d'abord, teams_reference en dernier : valable avec les FK en place.
+        """
+        with self.engine.begin() as conn:
+            for table_name in reversed(TABLE_DEFINITIONS):
+                conn.execute(text(f"DELETE FROM {table_name} WHERE competition = :competition"),
+                             {"competition": competition})
+        return True
+
+    def load_tables_concurrently(self, tables, competition, keys_in_place=False):
+        """Charger des tables indépendantes en parallèle, une connexion du pool chacune
+
+        tables : {nom_table: DataFrame}. Le temps total tend vers celui de la
+        plus grosse table (latence réseau recouverte).
+        keys_in_place : FK présentes (rechargement d'une compétition) : lignes de
+        la compétition supprimées d'abord, puis REFERENCED_TABLES chargées en
+        parallèle avant les tables qui les référencent.
+        """
+        waves = [tables]
+        if keys_in_place:
+            self.delete_competition(competition)
+            referenced = {t: df for t, df in tables.items() if t.rsplit('.', 1)[-1] in REFERENCED_TABLES}
+            waves = [referenced, {t: df for t, df in tables.items() if t not in referenced}]
+
+        loaded = {}
+        workers = max(1, min(len(tables), self.max_connections))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for wave in waves:
+                futures = {
+                    table_name: executor.submit(self.replace_competition, table_name, competition, df)
+                    for table_name, df in wave.items()
+                }
+                loaded.update({table_name: future.result() for table_name, future in futures.items()})
+        return {table_name: loaded[table_name] for table_name in tables}
+
+    def analyze_competitions(self, competitions):
+        """ANALYZE des seules données rechargées : teams_reference et les partitions de ces compétitions"""
+        partitions = [partition_name(table_name, competition)
+                      for table_name in PARTITIONED_TABLES for competition in competitions]
+        with self.engine.begin() as conn:
+            targets = ['teams_reference'] + [
+                name for name in partitions
+                if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None
+            ]
+            start = time.perf_counter()
+            conn.execute(text("ANALYZE " + ", ".join(targets)))
+        return time.perf_counter() - start
+
+    def bulk_load(self, table_name, source, competition=None, truncate=False, chunk_rows=COPY_CHUNK_ROWS):
+        """Charger un DataFrame ou un CSV via COPY FROM STDIN dans une table déjà créée
+
+        Les données partent par tampons de `chunk_rows` lignes (mémoire bornée),
+        dans une seule transaction : soit tout est chargé, soit rien.
+        competition : lignes de cette compétition supprimées avant chargement
+        truncate    : table vidée avant chargement
+        Tables partitionnées : partitions manquantes créées, puis un COPY par
+        partition feuille (pas de routage ligne à ligne par le parent).
+        Repli INSERT multi-VALUES par chunks si le serveur refuse COPY
+        (NotSupportedError, ex. proxy ou pooler). Les tables du projet (nom éventuellement
+        qualifié par un schéma) reçoivent leur row_hash s'il est absent.
+        """
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            if truncate:
+                cursor.execute(f"TRUNCATE {table_name}")
+            if competition is not None:
+                cursor.execute(f"DELETE FROM {table_name} WHERE competition = %s", (competition,))
+
+            n = 0
+            for chunk in self._chunks(table_name, source, chunk_rows):
+                columns = ", ".join(f'"{c}"' for c in chunk.columns)
+                for target, part in self._partition_chunks(cursor, table_name, chunk):
+                    cursor.copy_expert(f"COPY {target} ({columns}) FROM STDIN WITH (FORMAT csv)",
+                                       to_copy_buffer(part))
+                n += len(chunk)
+            raw.commit()
+            return n
+        except psycopg2.NotSupportedError:
+            # COPY refusé (proxy / pooler) : même chargement en INSERT
+            raw.rollback()
+            return self._insert_chunks(table_name, source, competition, truncate, chunk_rows)
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+
+    def _chunks(self, table_name, source, chunk_rows):
+        """Chunks à charger, row_hash ajouté pour les tables du projet"""
+        hashed = table_name.rsplit('.', 1)[-1] in TABLE_DEFINITIONS
+        for chunk in iter_chunks(source, chunk_rows):
+            if hashed and ROW_HASH_COLUMN not in chunk.columns:
+                chunk = with_row_hash(chunk)
+            yield chunk
+
+    @staticmethod
+    def _partition_chunks(cursor, table_name, chunk):
+        """(cible du COPY, lignes) : la table elle-même, ou chaque feuille d'une table partitionnée"""
+        schema, _, base = table_name.rpartition('.')
+        if base not in PARTITIONED_TABLES:
+            yield table_name, chunk
+            return
+        for statement in partition_ddl(table_name, partition_pairs(chunk)):
+            cursor.execute(statement)
+        prefix = f"{schema}." if schema else ""
+        for (competition, edition), part in chunk.groupby(['competition', 'edition'], sort=False):
+            yield prefix + partition_name(base, competition, edition), part
+
+    def _insert_chunks(self, table_name, source, competition, truncate, chunk_rows):
+        """Repli sans COPY : INSERT multi-VALUES par chunks, une transaction"""
+        # to_sql attend le schéma à part : un nom qualifié serait pris pour un nom de table
+        schema, _, base = table_name.rpartition('.')
+        n = 0
+        with self.engine.begin() as conn:
+            if truncate:
+                conn.execute(text(f"TRUNCATE {table_name}"))
+            if competition is not None:
+                conn.execute(text(f"DELETE FROM {table_name} WHERE competition = :competition"),
+                             {"competition": competition})
+            for chunk in self._chunks(table_name, source, chunk_rows):
+                if base in PARTITIONED_TABLES:
+                    for statement in partition_ddl(table_name, partition_pairs(chunk)):
+                        conn.execute(text(statement))
+                chunk.to_sql(base, conn, schema=schema or None, if_exists='append', index=False,
+                             method='multi', chunksize=FALLBACK_CHUNK_ROWS)
+                n += len(chunk)
+        return n
@@ -0,0 +1,159 @@
+"""
+Agrégats KPI précalculés - un fichier Parquet pour le notebook
+==============================================================
+
+Notebook/Vizualisation_KPI.ipynb recalculait ses agrégats à chaque
+exécution depuis les CSV complets (jointures home/away, boucle par match).
+L'étape 10 les calcule une fois, après l'étape 09, à partir des tables
+normalisées de <partition>/clean/ et les écrit dans un seul fichier Parquet
+(colonnes typées, compressé) que le notebook lit hors ligne :
+
+  - edition : par édition du tournoi final (matchs datés, comme le notebook) :
+    matchs, buts, moyenne de buts par match,
+  - team    : par équipe sur ces mêmes matchs (domicile et extérieur) :
+    matchs, victoires / nuls / défaites, buts marqués / encaissés, différence.
+
+Les deux agrégats partagent un schéma (colonne `aggregate`, colonnes non
+concernées à NULL). Le tampon de version est écrit dans les métadonnées du
+fichier : sha1 des CSV sources, compétition, lignes par agrégat. Pas de
+date de génération : mêmes données, même fichier à l'octet près.
+
+Usage:
+    aggregates, stamp = build_aggregates(clean_dir, competition)
+    write_aggregates(aggregates, stamp, clean_dir / AGGREGATES_FILE)
+
+    aggregates, stamp = read_aggregates(path)   # {'edition': df, 'team': df}, dict
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+AGGREGATES_FILE = "kpi_aggregates.parquet"
+STAMP_KEY = b"fifa_kpi_aggregates"
+STAMP_DIGITS = 16   # version : préfixe du sha1 des sources
+
+# Tables de l'étape 09 lues (ordre fixe : entre dans la version)
+SOURCE_FILES = {
+    "matches_normalized": "matches_normalized.csv",
+    "team_match": "team_match_normalized.csv",
+    "teams_reference": "teams_reference_normalized.csv",
+}
+
+# Schéma commun des agrégats (colonnes non concernées à NULL)
+SCHEMA = pa.schema([
+    ("aggregate", pa.dictionary(pa.int8(), pa.string())),
+    ("edition", pa.int16()),
+    ("team", pa.string()),
+    ("matches", pa.int32()),
+    ("wins", pa.int32()),
+    ("draws", pa.int32()),
+    ("losses", pa.int32()),
+    ("goals_scored", pa.int32()),
+    ("goals_conceded", pa.int32()),
+    ("goal_difference", pa.int32()),
+    ("total_goals", pa.int32()),
+    ("avg_goals_per_match", pa.float64()),
+])
+# Entiers Arrow -> entiers pandas nullables (pas de float à cause des NULL du schéma commun)
+PANDAS_TYPES = {pa.int16(): pd.Int16Dtype(), pa.int32(): pd.Int32Dtype()}
+
+
+def data_version(clean_dir: Path) -> tuple[str, dict[str, str]]:
+    """Version des données : (préfixe du sha1 global, {fichier: sha1}) des CSV sources."""
+    digest = hashlib.sha1()
+    sources = {}
+    for name in SOURCE_FILES.values():
+        file_digest = hashlib.sha1((clean_dir / name).read_bytes()).hexdigest()
+        sources[name] = file_digest
+        digest.update(f"{name}:{file_digest}\n".encode("utf-8"))
+    return digest.hexdigest()[:STAMP_DIGITS], sources
+
+
+def final_matches(matches: pd.DataFrame) -> pd.DataFrame:
+    """Matchs du tournoi final datés (filtre des graphiques du notebook)."""
+    return matches[matches["is_final"].astype(bool) & matches["date"].notna()]
+
+
+def edition_aggregates(matches: pd.DataFrame, team_match: pd.DataFrame) -> pd.DataFrame:
+    """Par édition : matchs, buts (somme des deux équipes), moyenne de buts par match."""
+    home = team_match[team_match["is_home"].astype(bool)][["id_match", "goals_for", "goals_against"]]
+    df = final_matches(matches)[["id_match", "edition"]].merge(home, on="id_match", how="inner")
+    df["total_goals"] = df["goals_for"] + df["goals_against"]
+    out = df.groupby("edition").agg(matches=("id_match", "count"), total_goals=("total_goals", "sum"))
+    out["avg_goals_per_match"] = out["total_goals"] / out["matches"]
+    return out.reset_index().sort_values("edition", ignore_index=True)
+
+
+def team_aggregates(matches: pd.DataFrame, team_match: pd.DataFrame, teams: pd.DataFrame) -> pd.DataFrame:
+    """Par équipe (domicile et extérieur) : matchs, bilan, buts ; tri par matchs joués."""
+    df = team_match.merge(final_matches(matches)[["id_match"]], on="id_match", how="inner")
+    df = df.merge(teams[["id_team", "Team_name"]], on="id_team", how="inner")
+    out = df.groupby("Team_name").agg(
+        matches=("id_match", "count"),
+        wins=("outcome", lambda s: int((s == "W").sum())),
+        draws=("outcome", lambda s: int((s == "D").sum())),
+        losses=("outcome", lambda s: int((s == "L").sum())),
+        goals_scored=("goals_for", "sum"),
+        goals_conceded=("goals_against", "sum"),
+    )
+    out["goal_difference"] = out["goals_scored"] - out["goals_conceded"]
+    out = out.reset_index().rename(columns={"Team_name": "team"})
+    return out.sort_values(["matches", "team"], ascending=[False, True], ignore_index=True)
+
+
+def build_aggregates(clean_dir: Path, competition: str) -> tuple[dict[str, pd.DataFrame], dict]:
+    """Tables normalisées de `clean_dir` -> ({agrégat: DataFrame}, tampon de version)."""
+    version, sources = data_version(clean_dir)
+    matches = pd.read_csv(clean_dir / SOURCE_FILES["matches_normalized"])
+    team_match = pd.read_csv(clean_dir / SOURCE_FILES["team_match"])
+    teams = pd.read_csv(clean_dir / SOURCE_FILES["teams_reference"])
+
+    aggregates = {
+        "edition": edition_aggregates(matches, team_match),
+        "team": team_aggregates(matches, team_match, teams),
+    }
+    stamp = {
+        "version": version,
+        "competition": competition,
+        "sources": sources,
+        "rows": {name: len(df) for name, df in aggregates.items()},
+    }
+    return aggregates, stamp
+
+
+def write_aggregates(aggregates: dict[str, pd.DataFrame], stamp: dict, path: Path) -> int:
+    """Écrire les agrégats dans un seul Parquet (zstd), tampon dans les métadonnées ; renvoie la taille."""
+    frames = [df.assign(aggregate=name) for name, df in aggregates.items()]
+    df = pd.concat(frames, ignore_index=True).reindex(columns=SCHEMA.names)
+    table = pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False)
+    table = table.replace_schema_metadata({STAMP_KEY: json.dumps(stamp, sort_keys=True).encode("utf-8")})
+
+    # Écriture puis renommage : le notebook ne lit jamais un fichier partiel
+    tmp = path.with_suffix(".tmp")
+    pq.write_table(table, tmp, compression="zstd")
+    tmp.replace(path)
+    return path.stat().st_size
+
+
+def read_stamp(path: Path) -> dict:
+    """Tampon de version d'un fichier d'agrégats (métadonnées seules, sans lire les données)."""
+    return json.loads(pq.read_schema(path).metadata[STAMP_KEY])
+
+
+def read_aggregates(path: Path) -> tuple[dict[str, pd.DataFrame], dict]:
+    """Fichier d'agrégats -> ({agrégat: DataFrame sans les colonnes NULL}, tampon de version)."""
+    table = pq.read_table(path)
+    stamp = json.loads(table.schema.metadata[STAMP_KEY])
+    df = table.to_pandas(types_mapper=PANDAS_TYPES.get)
+    aggregates = {}
+    for name, part in df.groupby("aggregate", observed=True, sort=False):
+        part = part.drop(columns="aggregate").dropna(axis=1, how="all").reset_index(drop=True)
+        aggregates[str(name)] = part
+    return aggregates, stamp
@@ -0,0 +1,377 @@
+"""
+Cube OLAP en mémoire - édition x équipe x tour x côté
+=====================================================
+
+Chaque nouveau KPI était une requête GROUP BY de plus sur kpi.sql ou les
+CSV. Le cube précalcule une fois les mesures de team_match (une ligne par
+équipe et par match) sur quatre dimensions :
+
+  - edition : année (axe trié),
+  - team    : id_team des tables normalisées (indice = id, stable),
+  - round   : tour (Group, Final, ...), ordre d'apparition conservé,
+  - side    : domicile / extérieur.
+
+Mesures (int32) : played, scored (matchs avec score), wins, draws, losses,
+goals_for, goals_against (additives) et max_goals_for, max_goals_against
+(agrégées par max ; 0 si aucun score).
+
+Tableau dense numpy (mesure, edition, team, round, side), ~6 Mo pour la
+Coupe du Monde masculine, enregistré en .npz (data/clean/kpi_cube.npz,
+étape 10). Les requêtes sont de l'indexation numpy + une réduction : les
+agrégats de kpi.sql en quelques µs, sans base ni pandas.
+
+Mise à jour incrémentale : une empreinte (sha1) des lignes de chaque
+édition est gardée dans le cube. Au recalcul, les éditions d'empreinte
+inchangée sont recopiées de l'ancien cube, seules les éditions nouvelles
+ou modifiées sont agrégées (une édition ajoutée : une édition calculée).
+
+Usage:
+    cube, stats = build_cube(matches, team_match, teams, previous=KpiCube.load(path))
+    cube.save(path)
+
+    cube = KpiCube.load("data/clean/kpi_cube.npz")
+    wins = cube.rollup("wins", by="team", final=True)          # victoires par id_team
+    goals = cube.rollup("goals_for", by=("edition",), final=True)
+    france = cube.select(team="France", final=True)             # sous-cube
+    france.rollup("played", by="edition")
+    rows = KPI_ANSWERS["Nombre total de victoires par équipe"](cube)   # requêtes de kpi.sql
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+
+CUBE_FILE = "kpi_cube.npz"
+
+AXES = ("edition", "team", "round", "side")
+SIDES = ("home", "away")
+MEASURES = (
+    "played", "scored", "wins", "draws", "losses", "goals_for", "goals_against",
+    "max_goals_for", "max_goals_against",
+)
+MAX_MEASURES = {"max_goals_for", "max_goals_against"}   # roll-up par max (les autres : somme)
+OUTCOME_MEASURES = {"W": "wins", "D": "draws", "L": "losses"}
+
+# Colonnes des lignes agrégées (team_match + edition / round / is_final du match)
+ROW_COLUMNS = ["edition", "id_team", "round", "is_final", "is_home", "goals_for", "goals_against", "outcome"]
+
+
+class KpiCube:
+    """Mesures denses (mesure, edition, team, round, side) et libellés de chaque axe"""
+
+    def __init__(self, values, editions, team_ids, team_names, rounds, round_is_final, edition_hashes):
+        self.values = values                      # int32 (len(MEASURES), E, T, R, 2)
+        self.editions = editions                  # int16 (E,), trié
+        self.team_ids = team_ids                  # int32 (T,), trié (cube complet : 0..max id)
+        self.team_names = team_names              # str (T,), '' pour un id sans équipe
+        self.rounds = rounds                      # str (R,)
+        self.round_is_final = round_is_final      # bool (R,) : tour du tournoi final
+        self.edition_hashes = edition_hashes      # str (E,) : empreinte des lignes de l'édition
+        self._index = {}                          # axe -> {libellé: position}, construit à la demande
+        self._rollups = {}                        # (mesure, by, filtres) -> résultat de rollup()
+
+    # --- Lecture / écriture -------------------------------------------------
+
+    @classmethod
+    def load(cls, path):
+        """Cube enregistré par save() (np.load, sans pickle)"""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(*(data[name] for name in (
+                "values", "editions", "team_ids", "team_names", "rounds", "round_is_final", "edition_hashes")))
+
+    def save(self, path):
+        """Enregistrer en .npz compressé (écriture puis renommage) ; renvoie la taille en octets"""
+        path = Path(path)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            np.savez_compressed(
+                f, values=self.values, editions=self.editions, team_ids=self.team_ids,
+                team_names=self.team_names, rounds=self.rounds, round_is_final=self.round_is_final,
+                edition_hashes=self.edition_hashes,
+            )
+        os.replace(tmp, path)
+        return path.stat().st_size
+
+    @property
+    def shape(self):
+        """Taille des axes (edition, team, round, side)"""
+        return self.values.shape[1:]
+
+    # --- Positions sur les axes ---------------------------------------------
+
+    def labels(self, axis):
+        """Libellés d'un axe (edition : années, team : id_team, round : noms, side : home/away)"""
+        return {"edition": self.editions, "team": self.team_ids, "round": self.rounds,
+                "side": np.array(SIDES)}[axis]
+
+    def team_id(self, name):
+        """Nom d'équipe -> id_team"""
+        if "names" not in self._index:
+            self._index["names"] = {n: int(i) for i, n in zip(self.team_ids.tolist(), self.team_names.tolist()) if n}
+        try:
+            return self._index["names"][name]
+        except KeyError:
+            raise KeyError(f"Équipe absente du cube: {name!r}") from None
+
+    def _positions(self, axis, key):
+        """Libellé(s) d'un axe -> positions (équipes par id_team ou par nom)"""
+        if axis not in AXES:
+            raise KeyError(f"Axe inconnu: {axis} (axes: {', '.join(AXES)})")
+        keys = [key] if isinstance(key, (str, int, np.integer)) else list(key)
+        if axis == "team":
+            keys = [self.team_id(k) if isinstance(k, str) else k for k in keys]
+        if axis not in self._index:
+            self._index[axis] = {label: i for i, label in enumerate(self.labels(axis).tolist())}
+        try:
+            return np.array([self._index[axis][k] for k in keys], dtype=np.intp)
+        except KeyError as e:
+            raise KeyError(f"Valeur absente de l'axe {axis}: {e.args[0]!r}") from None
+
+    def _filters(self, edition=None, team=None, round=None, side=None, final=None):
+        """Filtres -> positions retenues par axe (None : axe entier)"""
+        positions = {
+            "edition": None if edition is None else self._positions("edition", edition),
+            "team": None if team is None else self._positions("team", team),
+            "round": None if round is None else self._positions("round", round),
+            "side": None if side is None else self._positions("side", side),
+        }
+        if final is not None:
+            finals = np.flatnonzero(self.round_is_final == bool(final))
+            positions["round"] = finals if positions["round"] is None else np.intersect1d(positions["round"], finals)
+        return positions
+
+    # --- Slice / roll-up ----------------------------------------------------
+
+    def select(self, **filters):
+        """Sous-cube restreint aux libellés demandés (edition, team, round, side, final=True/False)"""
+        positions = self._filters(**filters)
+        values = self.values
+        for axis, pos in enumerate(positions.values(), start=1):
+            if pos is not None:
+                values = _take(values, pos, axis)
+        keep = {axis: (pos if pos is not None else slice(None)) for axis, pos in positions.items()}
+        return KpiCube(
+            values, self.editions[keep["edition"]], self.team_ids[keep["team"]], self.team_names[keep["team"]],
+            self.rounds[keep["round"]], self.round_is_final[keep["round"]], self.edition_hashes[keep["edition"]],
+        )
+
+    def rollup(self, measure, by=(), **filters):
+        """Mesure agrégée sur tous les axes sauf `by` (somme, ou max pour max_*)
+
+        by      : axe ou tuple d'axes conservés, dans l'ordre du résultat.
+        filters : comme select() ; les libellés d'un axe `by` filtré sont
+                  ceux de cube.select(**filters).
+        Renvoie un scalaire numpy (by vide) ou un tableau en lecture seule.
+        Résultats mémorisés par (mesure, by, filtres) : un roll-up déjà
+        demandé est servi sans parcourir le cube.
+        """
+        by = (by,) if isinstance(by, str) else tuple(by)
+        key = (measure, by, tuple(sorted((k, _frozen(v)) for k, v in filters.items())))
+        if key in self._rollups:
+            return self._rollups[key]
+
+        values = self.values[MEASURES.index(measure)]
+        for axis, pos in enumerate(self._filters(**filters).values()):
+            if pos is not None:
+                values = _take(values, pos, axis)
+        reduced = tuple(i for i, axis in enumerate(AXES) if axis not in by)
+        if measure in MAX_MEASURES:
+            out = values.max(axis=reduced, initial=0)
+        else:
+            out = values.sum(axis=reduced, dtype=np.int64)
+        kept = [axis for axis in AXES if axis in by]
+        out = np.transpose(out, [kept.index(axis) for axis in by]) if len(by) > 1 else out
+        if isinstance(out, np.ndarray):
+            out.flags.writeable = False
+        self._rollups[key] = out
+        return out
+
+
+def _frozen(value):
+    """Valeur de filtre -> clé de mémorisation (listes en tuples)"""
+    return value if isinstance(value, (str, int, bool, np.integer)) else tuple(value)
+
+
+def _take(values, positions, axis):
+    """Positions d'un axe : tranche (vue, sans copie) si contiguës, sinon np.take"""
+    if len(positions) and (np.diff(positions) == 1).all():
+        index = [slice(None)] * values.ndim
+        index[axis] = slice(positions[0], positions[-1] + 1)
+        return values[tuple(index)]
+    return np.take(values, positions, axis=axis)
+
+
+def _edition_digest(rows):
+    """Empreinte des lignes d'une édition (indépendante de l'ordre des lignes)"""
+    text = rows.sort_values(["id_team", "round", "is_home", "goals_for", "goals_against"]).to_csv(index=False)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _accumulate(values, cube, rows):
+    """Ajouter les lignes (une ou plusieurs éditions, déjà remises à zéro) au tableau dense"""
+    e = np.searchsorted(cube.editions, rows["edition"].to_numpy())
+    t = rows["id_team"].to_numpy()
+    r = rows["round"].map({name: i for i, name in enumerate(cube.rounds.tolist())}).to_numpy()
+    s = np.where(rows["is_home"].to_numpy(dtype=bool), 0, 1)
+    cells = np.ravel_multi_index((e, t, r, s), cube.shape)
+    size = int(np.prod(cube.shape))
+
+    goals_for = rows["goals_for"].to_numpy(dtype=float)
+    goals_against = rows["goals_against"].to_numpy(dtype=float)
+    scored = ~np.isnan(goals_for) & ~np.isnan(goals_against)
+    outcome = rows["outcome"].to_numpy(dtype=object)
+
+    flat = values.reshape(len(MEASURES), -1)
+    flat[MEASURES.index("played")] += np.bincount(cells, minlength=size).astype(np.int32)
+    flat[MEASURES.index("scored")] += np.bincount(cells[scored], minlength=size).astype(np.int32)
+    for code, measure in OUTCOME_MEASURES.items():
+        flat[MEASURES.index(measure)] += np.bincount(cells[outcome == code], minlength=size).astype(np.int32)
+    for measure, goals in (("goals_for", goals_for), ("goals_against", goals_against)):
+        flat[MEASURES.index(measure)] += np.bincount(
+            cells[scored], weights=goals[scored], minlength=size).astype(np.int32)
+        np.maximum.at(flat[MEASURES.index("max_" + measure)], cells[scored], goals[scored].astype(np.int32))
+
+
+def cube_rows(matches, team_match):
+    """team_match + edition / round / is_final du match -> lignes du cube"""
+    rows = team_match.merge(matches[["id_match", "edition", "round", "is_final"]], on="id_match", how="inner")
+    return rows[ROW_COLUMNS]
+
+
+def build_cube(matches, team_match, teams, previous=None):
+    """Tables normalisées -> (KpiCube, {'computed': [...], 'reused': [...], 'removed': [...]})
+
+    previous : cube précédent ; ses éditions d'empreinte identique sont
+    recopiées au lieu d'être recalculées.
+    """
+    rows = cube_rows(matches, team_match)
+    digests = {int(edition): _edition_digest(part) for edition, part in rows.groupby("edition")}
+    editions = np.array(sorted(digests), dtype=np.int16)
+
+    # Tours : ordre du cube précédent conservé, nouveaux tours ajoutés à la fin
+    finals = dict(zip(previous.rounds.tolist(), previous.round_is_final.tolist())) if previous is not None else {}
+    finals.update(rows.groupby("round", sort=False)["is_final"].first().astype(bool).to_dict())
+    rounds = list(finals)
+
+    max_id = int(max(teams["id_team"].max(), rows["id_team"].max()))
+    team_ids = np.arange(max_id + 1, dtype=np.int32)
+    team_names = np.full(max_id + 1, "", dtype=object)
+    team_names[teams["id_team"].to_numpy()] = teams["Team_name"].to_numpy()
+
+    cube = KpiCube(
+        np.zeros((len(MEASURES), len(editions), max_id + 1, len(rounds), len(SIDES)), dtype=np.int32),
+        editions, team_ids, team_names.astype(str), np.array(rounds, dtype=str),
+        np.array([finals[name] for name in rounds], dtype=bool),
+        np.array([digests[int(e)] for e in editions], dtype=str),
+    )
+
+    reused = []
+    if previous is not None:
+        old = {int(e): i for i, e in enumerate(previous.editions)}
+        teams_kept = min(len(previous.team_ids), len(team_ids))
+        rounds_kept = len(previous.rounds)
+        for i, edition in enumerate(editions.tolist()):
+            j = old.get(edition)
+            if j is not None and previous.edition_hashes[j] == digests[edition]:
+                cube.values[:, i, :teams_kept, :rounds_kept] = previous.values[:, j, :teams_kept]
+                reused.append(edition)
+
+    computed = [e for e in editions.tolist() if e not in reused]
+    if computed:
+        _accumulate(cube.values, cube, rows[rows["edition"].isin(computed)])
+    removed = [] if previous is None else sorted(set(previous.editions.tolist()) - set(editions.tolist()))
+    return cube, {"computed": computed, "reused": reused, "removed": removed}
+
+
+# --- Requêtes de db/kpi.sql servies par le cube ------------------------------
+# Même nom que la requête, mêmes lignes (tuples, édition en texte comme la
+# colonne VARCHAR) et même ordre (ex æquo par nom). Non couvertes :
+# « Équipes qui se sont le plus affrontées » (paires) et « Top villes » (city),
+# dimensions absentes du cube.
+
+def _ratio(num, den, scale=1):
+    """ROUND(scale * num / den, 2) de PostgreSQL (.5 arrondi vers le haut), exact ; scalaires ou tableaux"""
+    num = np.asarray(num, dtype=np.int64)
+    den = np.asarray(den, dtype=np.int64)
+    return (2 * 100 * scale * num + den) // (2 * np.maximum(den, 1)) / 100
+
+
+def _team_rows(cube, values, keep):
+    """(équipe, valeur) des positions retenues, valeur décroissante puis nom"""
+    idx = np.flatnonzero(keep)
+    names, values = cube.team_names[idx], values[idx]
+    order = np.lexsort((names, -values))
+    return list(zip(names[order].tolist(), values[order].tolist()))
+
+
+def _per_team(measure, **filters):
+    def answer(cube):
+        values = cube.rollup(measure, by="team", **filters)
+        return _team_rows(cube, values, values > 0)
+    return answer
+
+
+def _record(measure):
+    def answer(cube):
+        values = cube.rollup(measure, by="team")
+        return _team_rows(cube, values, cube.rollup("scored", by="team") > 0)[:1]
+    return answer
+
+
+def _matches_per_edition(cube):
+    played = cube.rollup("played", by="edition", final=True, side="home")
+    return sorted(((str(e), int(n)) for e, n in zip(cube.editions, played) if n), key=lambda r: (-r[1], r[0]))
+
+
+def _win_rate(cube):
+    wins = cube.rollup("wins", by="team", final=True)
+    played = cube.rollup("played", by="team", final=True)
+    return _team_rows(cube, _ratio(wins, played, 100), played > 0)
+
+
+def _unbeaten(cube):
+    played = cube.rollup("played", by=("edition", "team"), final=True)
+    losses = cube.rollup("losses", by=("edition", "team"), final=True)
+    return sorted((str(cube.editions[e]), str(cube.team_names[t])) for e, t in zip(*np.nonzero((played > 0) & (losses == 0))))
+
+
+def _edition_home_ratio(numerators, scale):
+    def answer(cube):
+        filters = {"by": "edition", "final": True, "side": "home"}
+        played = cube.rollup("played", **filters)
+        num = sum(cube.rollup(m, **filters) for m in numerators)
+        den = played if numerators == ("draws",) else cube.rollup("scored", **filters)
+        ratios = _ratio(num, den, scale)
+        return [(str(e), float(r) if d else None) for e, r, d, p in zip(cube.editions, ratios, den, played) if p]
+    return answer
+
+
+def _average_goals(cube):
+    total = cube.rollup("goals_for", final=True, side="home") + cube.rollup("goals_against", final=True, side="home")
+    return [(float(_ratio(total, cube.rollup("scored", final=True, side="home"))),)]
+
+
+KPI_ANSWERS = {
+    "Nombre total de matchs disputés par Coupe du Monde": _matches_per_edition,
+    "Nombre total de buts marqués toutes éditions confondues":
+        lambda cube: [(int(cube.rollup("goals_for", final=True)),)],
+    "Nombre total de matchs disputés en Coupe du Monde (tournoi final uniquement)":
+        lambda cube: [(int(cube.rollup("played", final=True, side="home")),)],
+    "Moyenne globale des buts par match": _average_goals,
+    "Nombre de matchs joués par équipe": _per_team("played"),
+    "Nombre total de victoires par équipe": _per_team("wins", final=True),
+    "Nombre total de défaites par équipe": _per_team("losses", final=True),
+    "Nombre total de matchs nuls par équipe": _per_team("draws", final=True),
+    "Pourcentage de réussite (taux de victoire)": _win_rate,
+    "Équipe ayant marqué le plus de buts dans un seul match": _record("max_goals_for"),
+    "Équipe ayant encaissé le plus de buts dans un seul match": _record("max_goals_against"),
+    "Équipes invaincues sur une édition (aucune défaite)": _unbeaten,
+    "Équipes ayant perdu le plus de finales": _per_team("losses", round="Final"),
+    "Évolution du nombre moyen de buts par match au fil des éditions":
+        _edition_home_ratio(("goals_for", "goals_against"), 1),
+    "Évolution du taux de matchs nuls par édition": _edition_home_ratio(("draws",), 100),
+}
@@ -0,0 +1,295 @@
+"""
+Magasin binaire des matchs - colonnes numpy.memmap
+==================================================
+
+Chaque recherche ponctuelle (« les matchs de la France en 1998 ») lisait
+un CSV dans pandas ou passait par la base distante. Le magasin stocke la
+V4 (matches_unified_v4.csv + teams_v4.csv) en colonnes binaires de largeur
+fixe, ouvertes en numpy.memmap : l'ouverture ne lit que meta.json, une
+requête ne touche que les pages des colonnes filtrées. Ni pandas ni base.
+
+Dossier <partition>/processed/match_store/, à côté de la V4 :
+
+  - une colonne .npy par champ (COLUMNS), lignes dans l'ordre de la V4
+    (édition croissante) : les codes renvoient à la table des chaînes, les
+    équipes sont des team_id, les dates des entiers AAAAMMJJ (0 : NULL),
+    les scores -1 si NULL, result le team_id gagnant (0 : nul),
+  - strings.bin + string_offsets.npy : table des chaînes (UTF-8 concaténé,
+    décalages) pour les tours, villes, compétitions et noms d'équipe,
+  - team_ids.npy / team_names.npy : dimension teams (team_id -> code du nom),
+  - meta.json : version (même calcul que l'index des équipes), lignes,
+    codes présents dans chaque colonne de chaînes.
+
+Filtres : édition par recherche dichotomique (colonne triée), équipe et
+paire par l'index inversé de pipeline.team_index quand il est de même
+version (sinon masque vectorisé), tour et dates par masque sur les lignes
+retenues.
+
+Usage:
+    build_match_store(matches_v4_csv, teams_v4_csv, processed_dir / STORE_DIR)
+
+    store = MatchStore.open("data/processed/match_store")
+    rows = store.query(team="France", edition=(1998, 2006), round="Final")
+    for match in store.records(rows):
+        print(match["date"], match["home_team"], match["home_result"], ...)
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from pipeline.team_index import INDEX_DIR, TeamIndex, index_version
+
+STORE_DIR = "match_store"
+META_FILE = "meta.json"
+STRINGS_FILE = "strings.bin"
+
+# Colonnes de largeur fixe (une par fichier .npy)
+COLUMNS = {
+    "id_match": np.int32,
+    "home_team_id": np.int16,
+    "away_team_id": np.int16,
+    "home_result": np.int16,   # -1 : NULL
+    "away_result": np.int16,
+    "result": np.int16,        # team_id gagnant, 0 : nul
+    "date": np.int32,          # AAAAMMJJ, 0 : NULL
+    "round": np.int32,         # code de la table des chaînes
+    "city": np.int32,
+    "edition": np.int16,
+    "competition": np.int32,
+}
+STRING_COLUMNS = ("round", "city", "competition")
+NULL_DATE = 0
+NULL_SCORE = -1
+DRAW = 0
+
+
+def parse_date(text):
+    """'AAAA-MM-JJ' -> AAAAMMJJ (0 si vide)"""
+    text = (text or "").strip()
+    if not text:
+        return NULL_DATE
+    year, month, day = text.split("-")
+    return int(year) * 10000 + int(month) * 100 + int(day)
+
+
+def format_date(value):
+    """AAAAMMJJ -> 'AAAA-MM-JJ' ('' si NULL)"""
+    value = int(value)
+    if value == NULL_DATE:
+        return ""
+    return f"{value // 10000:04d}-{value // 100 % 100:02d}-{value % 100:02d}"
+
+
+class _StringTable:
+    """Chaînes distinctes -> codes, dans l'ordre d'apparition"""
+
+    def __init__(self):
+        self.codes = {}
+
+    def code(self, text):
+        return self.codes.setdefault(text, len(self.codes))
+
+    def write(self, directory):
+        encoded = [text.encode("utf-8") for text in self.codes]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+        (directory / STRINGS_FILE).write_bytes(b"".join(encoded))
+        np.save(directory / "string_offsets.npy", offsets, allow_pickle=False)
+
+
+def build_match_store(matches_csv, teams_csv, path):
+    """V4 + dimension teams (CSV, lus avec le module csv) -> dossier du magasin ; renvoie le nombre de lignes"""
+    path = Path(path)
+    strings = _StringTable()
+    columns = {name: [] for name in COLUMNS}
+
+    with open(matches_csv, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            columns["id_match"].append(int(row["id_match"]))
+            columns["home_team_id"].append(int(row["home_team_id"]))
+            columns["away_team_id"].append(int(row["away_team_id"]))
+            columns["home_result"].append(int(row["home_result"]) if row["home_result"] else NULL_SCORE)
+            columns["away_result"].append(int(row["away_result"]) if row["away_result"] else NULL_SCORE)
+            columns["result"].append(DRAW if row["result"] in ("draw", "") else int(row["result"]))
+            columns["date"].append(parse_date(row["date"]))
+            columns["edition"].append(int(row["edition"]))
+            for name in STRING_COLUMNS:
+                columns[name].append(strings.code(row.get(name) or ""))
+
+    with open(teams_csv, newline="", encoding="utf-8") as f:
+        teams = sorted((int(row["team_id"]), row["team_canonical"]) for row in csv.DictReader(f))
+
+    arrays = {name: np.array(values, dtype=COLUMNS[name]) for name, values in columns.items()}
+    if len(arrays["edition"]) and (np.diff(arrays["edition"]) < 0).any():
+        raise ValueError("V4 non triée par édition : relancer l'étape 07")
+
+    tmp = path.with_name(path.name + ".tmp")
+    old = path.with_name(path.name + ".old")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for name, values in arrays.items():
+        np.save(tmp / f"{name}.npy", values, allow_pickle=False)
+    np.save(tmp / "team_ids.npy", np.array([i for i, _ in teams], dtype=np.int16), allow_pickle=False)
+    np.save(tmp / "team_names.npy", np.array([strings.code(n) for _, n in teams], dtype=np.int32),
+            allow_pickle=False)
+    strings.write(tmp)
+    meta = {"version": index_version(matches_csv, teams_csv), "rows": len(arrays["id_match"]),
+            "teams": len(teams), "strings": len(strings.codes),
+            "codes": {name: sorted(set(columns[name])) for name in STRING_COLUMNS}}
+    (tmp / META_FILE).write_text(json.dumps(meta, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+    # Le dossier en place n'est jamais partiel : ancien renommé, nouveau renommé, ancien supprimé
+    shutil.rmtree(old, ignore_errors=True)
+    if path.exists():
+        path.rename(old)
+    tmp.rename(path)
+    shutil.rmtree(old, ignore_errors=True)
+    return meta["rows"]
+
+
+class MatchStore:
+    """Colonnes du magasin ouvertes à la demande en numpy.memmap (lecture seule)"""
+
+    def __init__(self, path, team_index=None):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / META_FILE).read_text(encoding="utf-8"))
+        self.team_index = team_index
+        self._columns = {}
+        self._strings = None
+
+    @classmethod
+    def open(cls, path):
+        """Magasin + index des équipes voisin (reference/team_index) s'il est de même version"""
+        path = Path(path)
+        index_path = path.parent.parent / "reference" / INDEX_DIR
+        team_index = None
+        if (index_path / META_FILE).exists():
+            team_index = TeamIndex.load(index_path)
+            store_version = json.loads((path / META_FILE).read_text(encoding="utf-8"))["version"]
+            if team_index.meta.get("version") != store_version:
+                team_index = None
+        return cls(path, team_index)
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    def column(self, name):
+        """Colonne (memmap), ouverte au premier accès"""
+        if name not in self._columns:
+            self._columns[name] = np.load(self.path / f"{name}.npy", mmap_mode="r", allow_pickle=False)
+        return self._columns[name]
+
+    # --- Table des chaînes ----------------------------------------------------
+
+    def strings(self):
+        """Table des chaînes décodée (liste, indice = code)"""
+        if self._strings is None:
+            blob = self.path / STRINGS_FILE
+            data = np.memmap(blob, dtype=np.uint8, mode="r").tobytes() if blob.stat().st_size else b""
+            offsets = self.column("string_offsets").tolist()
+            self._strings = [data[a:b].decode("utf-8") for a, b in zip(offsets, offsets[1:])]
+        return self._strings
+
+    def code(self, text, column):
+        """Chaîne -> code (KeyError avec les valeurs présentes si absente de la colonne)"""
+        values = {self.strings()[c]: c for c in self.meta["codes"][column]}
+        try:
+            return values[text]
+        except KeyError:
+            raise KeyError(f"{column} inconnu: {text!r} (valeurs: {', '.join(sorted(values))})") from None
+
+    def team_id(self, team):
+        """Nom d'équipe ou team_id -> team_id"""
+        if not isinstance(team, str):
+            return int(team)
+        strings = self.strings()
+        for team_id, name in zip(self.column("team_ids").tolist(), self.column("team_names").tolist()):
+            if strings[name] == team:
+                return team_id
+        raise KeyError(f"Équipe inconnue: {team!r}")
+
+    def team_name(self, team_id):
+        """team_id -> nom d'équipe"""
+        ids = self.column("team_ids")
+        i = int(np.searchsorted(ids, team_id))
+        if i == len(ids) or ids[i] != team_id:
+            return str(team_id)
+        return self.strings()[int(self.column("team_names")[i])]
+
+    # --- Requêtes -------------------------------------------------------------
+
+    def query(self, team=None, opponent=None, edition=None, round=None, date_from=None, date_to=None):
+        """Lignes (positions, ordre de la V4) des matchs retenus par tous les filtres
+
+        team / opponent : nom ou team_id ; opponent seul ou avec team (paire).
+        edition         : année ou (première, dernière) incluses.
+        round           : nom du tour (ex. 'Final').
+        date_from/to    : 'AAAA-MM-JJ' inclus ; exclut les matchs sans date.
+        """
+        rows = None
+        if team is not None or opponent is not None:
+            rows = self._team_rows(team, opponent)
+
+        if edition is not None:
+            first, last = (edition, edition) if isinstance(edition, int) else edition
+            editions = self.column("edition")
+            lo, hi = np.searchsorted(editions, [first, last + 1])   # colonne triée
+            rows = np.arange(lo, hi) if rows is None else rows[(rows >= lo) & (rows < hi)]
+
+        if rows is None:
+            rows = np.arange(len(self))
+        if round is not None:
+            rows = rows[self.column("round")[rows] == self.code(round, "round")]
+        if date_from is not None or date_to is not None:
+            dates = self.column("date")[rows]
+            keep = dates != NULL_DATE
+            if date_from is not None:
+                keep &= dates >= parse_date(date_from)
+            if date_to is not None:
+                keep &= dates <= parse_date(date_to)
+            rows = rows[keep]
+        return rows
+
+    def _team_rows(self, team, opponent):
+        """Lignes d'une équipe ou d'une paire : index des équipes si disponible, sinon masque"""
+        if team is None:
+            team, opponent = opponent, None
+        if self.team_index is not None:
+            if opponent is None:
+                return np.asarray(self.team_index.team_rows(self.team_id(team)), dtype=np.intp)
+            return np.asarray(self.team_index.pair_rows(self.team_id(team), self.team_id(opponent)), dtype=np.intp)
+        home, away = self.column("home_team_id"), self.column("away_team_id")
+        team_id = self.team_id(team)
+        if opponent is None:
+            return np.flatnonzero((home == team_id) | (away == team_id))
+        other = self.team_id(opponent)
+        return np.flatnonzero(((home == team_id) & (away == other)) | ((home == other) & (away == team_id)))
+
+    def records(self, rows):
+        """Lignes -> matchs décodés (dicts, colonnes de la V4)"""
+        strings = self.strings()
+        values = {name: self.column(name)[rows].tolist() for name in COLUMNS}
+        out = []
+        for i in range(len(rows)):
+            home_result, away_result = values["home_result"][i], values["away_result"][i]
+            result = values["result"][i]
+            out.append({
+                "id_match": values["id_match"][i],
+                "edition": values["edition"][i],
+                "date": format_date(values["date"][i]),
+                "round": strings[values["round"][i]],
+                "city": strings[values["city"][i]],
+                "home_team": self.team_name(values["home_team_id"][i]),
+                "away_team": self.team_name(values["away_team_id"][i]),
+                "home_result": None if home_result == NULL_SCORE else home_result,
+                "away_result": None if away_result == NULL_SCORE else away_result,
+                "result": "draw" if result == DRAW else self.team_name(result),
+                "competition": strings[values["competition"][i]],
+            })
+        return out
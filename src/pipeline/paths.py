@@ -0,0 +1,72 @@
+"""
+Répertoire de données du pipeline
+=================================
+
+Par défaut les étapes lisent et écrivent dans data/. La variable
+d'environnement FIFA_DATA_DIR redirige toutes les entrées/sorties des étapes
+06 -> 09 et du setup vers un autre répertoire de même structure
+(processed/, reference/, clean/), par exemple data/sample/ en mode échantillon.
+
+Compétitions : chaque compétition est une partition de même structure.
+La Coupe du Monde masculine (compétition par défaut) reste dans data/, les
+autres vivent dans data/competitions/<clé>/. La variable FIFA_COMPETITION
+choisit la partition active ; chaque artefact ligne à ligne (V3, V4, KPI,
+tables normalisées) porte la colonne `competition`.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+DATA_DIR_ENV = "FIFA_DATA_DIR"
+DEFAULT_DATA_DIR = ROOT / "data"
+
+COMPETITION_ENV = "FIFA_COMPETITION"
+COMPETITION_COLUMN = "competition"
+DEFAULT_COMPETITION = "wc_men"
+COMPETITIONS_DIR = DEFAULT_DATA_DIR / "competitions"
+COMPETITION_KEY_RE = re.compile(r"^[a-z0-9_]{1,32}$")
+
+# Entrée minimale d'une partition : les étapes 06 -> 09 partent de la V2
+PARTITION_INPUT = Path("processed") / "matches_unified_v2.csv"
+
+
+def check_competition(key: str) -> str:
+    """Valider une clé de compétition (minuscules, chiffres, '_' : nom de répertoire et valeur SQL)."""
+    if not COMPETITION_KEY_RE.match(key):
+        raise ValueError(f"Clé de compétition invalide: {key!r} (attendu: [a-z0-9_], 32 caractères max)")
+    return key
+
+
+def competition_key() -> str:
+    """Compétition active (FIFA_COMPETITION ou Coupe du Monde masculine)."""
+    return check_competition(os.environ.get(COMPETITION_ENV, DEFAULT_COMPETITION))
+
+
+def competition_dir(key: str) -> Path:
+    """Répertoire de la partition d'une compétition."""
+    if check_competition(key) == DEFAULT_COMPETITION:
+        return DEFAULT_DATA_DIR
+    return COMPETITIONS_DIR / key
+
+
+def available_competitions() -> list[str]:
+    """Compétitions dont la partition contient une V2 (compétition par défaut en tête)."""
+    keys = [DEFAULT_COMPETITION] if (DEFAULT_DATA_DIR / PARTITION_INPUT).exists() else []
+    if COMPETITIONS_DIR.exists():
+        keys += sorted(
+            p.name for p in COMPETITIONS_DIR.iterdir()
+            if p.is_dir() and p.name != DEFAULT_COMPETITION and COMPETITION_KEY_RE.match(p.name)
+            and (p / PARTITION_INPUT).exists()
+        )
+    return keys
+
+
+def data_dir() -> Path:
+    """Répertoire de données actif (FIFA_DATA_DIR, sinon partition de la compétition active)."""
+    if DATA_DIR_ENV in os.environ:
+        return Path(os.environ[DATA_DIR_ENV])
+    return competition_dir(competition_key())
@@ -0,0 +1,463 @@
+"""
+Backend Polars (lazy) - étapes 06 (résolution), 07, 08 et 09
+============================================================
+
+Réécriture des transformations relationnelles du pipeline sous forme de plans
+de requête Polars paresseux : `scan_csv` + projections/filtres poussés vers
+le scan par l'optimiseur, jointures et tris multi-threadés. Les résultats
+sont collectés puis convertis en DataFrames pandas avec les mêmes types que
+le chemin pandas, qui reste le backend par défaut : les CSV écrits sont
+identiques octet pour octet.
+
+Étape 06 : seule la résolution (ids et noms canoniques par jointure,
+dédoublonnage, résultat) passe par polars ; le nettoyage des noms et le
+référentiel équipes (regex, unicodedata, pycountry) restent des fonctions
+Python ligne à ligne, comme les étapes 03 et 05 (lecture JSON, matching
+Kaggle) : un plan polars n'y ferait qu'appeler les mêmes fonctions.
+
+Prérequis (optionnels) : pip install polars pyarrow
+
+Usage:
+    python src/06_v2-to-v3-clean.py --backend polars
+    python src/07_v3_to_v4.py --backend polars
+    python src/08_v4_to_db.py --backend polars
+    python src/09_tables_construction.py --backend polars
+"""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline.paths import COMPETITION_COLUMN, competition_key
+
+try:
+    import polars as pl
+except ImportError:  # dépendance optionnelle
+    pl = None
+
+# Valeurs lues comme manquantes par pandas.read_csv (na_values par défaut) :
+# on les reproduit pour que les deux backends voient les mêmes NULL.
+PANDAS_NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None",
+    "n/a", "nan", "null",
+]
+
+PLACEHOLDER_DATE_PATTERN = r"^\d{4}-01-01$"
+NON_FINAL_ROUNDS = ["Preliminary round", "Qualification", "Preliminaries"]
+
+# Types des colonnes lues par chaque plan (schema_overrides de scan_csv) :
+# pas d'inférence sur tout le fichier, et un type qui ne dépend pas des
+# premières lignes. Identifiants et scores de la V3 en Float64 (pandas les
+# écrit "12.0" dès qu'une valeur manque), convertis ensuite par les plans ;
+# V4 et KPI sont écrits par les étapes 07 / 08 avec des entiers nullables.
+SCHEMA_INFERENCE_ROWS = 1000   # colonnes non déclarées (non lues par les plans)
+V3_SCHEMA = {
+    "edition": "Utf8", "edition_year": "Float64", "date": "Utf8", "round": "Utf8", "city": "Utf8",
+    "home_team_id": "Float64", "away_team_id": "Float64",
+    "home_team_canonical": "Utf8", "away_team_canonical": "Utf8",
+    "home_result": "Float64", "away_result": "Float64", COMPETITION_COLUMN: "Utf8",
+}
+V4_SCHEMA = {
+    "id_match": "Int64", "home_team_id": "Int64", "away_team_id": "Int64",
+    "home_result": "Int64", "away_result": "Int64", "result": "Utf8", "date": "Utf8", "round": "Utf8",
+    "city": "Utf8", "edition": "Utf8", COMPETITION_COLUMN: "Utf8", "match_uid": "Utf8",
+}
+TEAMS_V4_SCHEMA = {"team_id": "Int64", "team_canonical": "Utf8"}
+KPI_SCHEMA = {
+    "home_team": "Utf8", "away_team": "Utf8", "home_result": "Int64", "away_result": "Int64",
+    "date": "Utf8", "round": "Utf8", "city": "Utf8", "edition": "Int64", "is_final": "Boolean",
+    COMPETITION_COLUMN: "Utf8", "match_uid": "Utf8",
+}
+
+V4_COLUMNS = [
+    "id_match", "home_team_id", "away_team_id", "home_result", "away_result",
+    "result", "date", "round", "city", "edition", COMPETITION_COLUMN, "match_uid",
+]
+
+
+def require_polars() -> None:
+    if pl is None:
+        raise ImportError("Backend polars indisponible : pip install polars pyarrow")
+
+
+def scan(path: Path, schema: dict[str, str] | None = None) -> "pl.LazyFrame":
+    """Scan CSV paresseux, avec la même détection des NULL que pandas.
+
+    schema : types des colonnes lues ({colonne: nom de type polars}) ; les
+    autres sont inférées sur les SCHEMA_INFERENCE_ROWS premières lignes.
+    """
+    require_polars()
+    if not Path(path).exists():
+        raise FileNotFoundError(f"Fichier introuvable: {path}")
+    with open(path, encoding="utf-8") as f:
+        header = f.readline().rstrip("\r\n").split(",")
+    overrides = {name: getattr(pl, dtype) for name, dtype in (schema or {}).items() if name in header}
+    return pl.scan_csv(path, null_values=PANDAS_NA_VALUES, schema_overrides=overrides,
+                       infer_schema_length=SCHEMA_INFERENCE_ROWS)
+
+
+def to_pandas(df: "pl.DataFrame") -> pd.DataFrame:
+    """
+    Conversion vers pandas avec la sémantique de read_csv : entiers sans NULL
+    -> int64, entiers avec NULL -> float64, chaînes -> object.
+    """
+    out = df.to_pandas()
+    for col in out.columns:
+        if str(out[col].dtype) in ("string", "large_string[pyarrow]", "string[pyarrow]"):
+            out[col] = out[col].astype(object)
+    return out
+
+
+def clean_text(expr: "pl.Expr") -> "pl.Expr":
+    """Équivalent de 07.clean_text : NBSP -> espace, espaces compactés, NULL -> ''."""
+    return (
+        expr.cast(pl.Utf8)
+        .str.replace_all("\xa0", " ", literal=True)
+        .str.replace_all(r"\s+", " ")
+        .str.strip_chars()
+        .fill_null("")
+    )
+
+
+def py_str(expr: "pl.Expr") -> "pl.Expr":
+    """str() Python d'une valeur pandas (NaN -> 'nan') pour le calcul de l'UID."""
+    return expr.cast(pl.Utf8).fill_null("nan")
+
+
+def sha1_batch(s: "pl.Series") -> "pl.Series":
+    return pl.Series(
+        [hashlib.sha1(v.encode("utf-8", errors="ignore")).hexdigest() for v in s.to_list()],
+        dtype=pl.Utf8,
+    )
+
+
+# =============================================================================
+# 06 - résolution des équipes (après nettoyage et référentiel)
+# =============================================================================
+MATCH_KEY = ["edition_year", "date", "home_team_id", "away_team_id", "home_result", "away_result", "round"]
+
+
+def resolve_matches_lazy(df: pd.DataFrame, raw_to_id: dict, id_to_canonical: dict) -> tuple[pd.DataFrame, dict]:
+    """Équivalent de 06.resolve_matches sur toute la V2 nettoyée : (lignes retenues, compteurs).
+
+    Polars calcule les lignes retenues et les colonnes dérivées ; elles sont
+    reportées sur le DataFrame pandas, dont les autres colonnes gardent leurs
+    types (edition_year Int64, dates object).
+    """
+    require_polars()
+    ids = {raw: team_id for raw, team_id in raw_to_id.items() if pd.notna(team_id)}
+    mapping = pl.LazyFrame({"_raw": list(ids), "_id": list(ids.values())},
+                           schema={"_raw": pl.Utf8, "_id": pl.Int64})
+    canonical = pl.LazyFrame({"_id": list(id_to_canonical), "_name": list(id_to_canonical.values())},
+                             schema={"_id": pl.Int64, "_name": pl.Utf8})
+
+    def side(name: str) -> "pl.LazyFrame":
+        return (mapping.join(canonical, on="_id", how="left")
+                .rename({"_raw": f"{name}_team_raw", "_id": f"{name}_team_id", "_name": f"{name}_team_canonical"}))
+
+    keys = pl.from_pandas(
+        df[["home_team_raw", "away_team_raw", *[c for c in MATCH_KEY if not c.endswith("_team_id")]]]
+        .reset_index(drop=True)
+    ).lazy().with_row_index("_row")
+    resolved = (
+        keys.join(side("home"), on="home_team_raw", how="left", maintain_order="left")
+        .join(side("away"), on="away_team_raw", how="left", maintain_order="left")
+    )
+
+    home_name = pl.coalesce("home_team_canonical", "home_team_raw")
+    away_name = pl.coalesce("away_team_canonical", "away_team_raw")
+    hg, ag = pl.col("home_result"), pl.col("away_result")
+    result = (
+        pl.when(hg.is_null() | ag.is_null()).then(pl.lit("draw"))
+        .when(hg > ag).then(home_name)
+        .when(hg < ag).then(away_name)
+        .otherwise(pl.lit("draw"))
+    )
+    kept, counts = pl.collect_all([
+        resolved.drop_nulls(["home_team_id", "away_team_id"])
+        .unique(subset=MATCH_KEY, keep="first", maintain_order=True)
+        .select("_row", "home_team_id", "away_team_id", "home_team_canonical", "away_team_canonical",
+                result.alias("result")),
+        resolved.select(
+            unresolved=(pl.col("home_team_id").is_null() | pl.col("away_team_id").is_null()).sum(),
+            resolved=(pl.col("home_team_id").is_not_null() & pl.col("away_team_id").is_not_null()).sum(),
+        ),
+    ])
+
+    out = df.iloc[kept["_row"].to_numpy()].copy()
+    # pandas : Series.map d'un id manquant -> NaN, colonne float64
+    id_dtype = "float64" if counts["unresolved"].item() or len(ids) < len(raw_to_id) else "int64"
+    for column in ["home_team_id", "away_team_id"]:
+        out[column] = kept[column].to_numpy().astype(id_dtype)
+    for column in ["home_team_canonical", "away_team_canonical", "result"]:
+        out[column] = kept[column].to_numpy().astype(object)
+    return out, {"duplicates": int(counts["resolved"].item()) - len(out)}
+
+
+# =============================================================================
+# 07 - V3 -> V4
+# =============================================================================
+def v4_plan(in_v3: Path) -> tuple["pl.LazyFrame", bool]:
+    """Plan lazy V3 -> V4 (avant tri final), avec les drapeaux qualité."""
+    lf = scan(in_v3, V3_SCHEMA)
+    names = lf.collect_schema().names()
+    has_year = "edition_year" in names
+
+    cols = [
+        "edition", "date", "round", "city", "home_team_id", "away_team_id",
+        "home_team_canonical", "away_team_canonical", "home_result", "away_result",
+    ] + (["edition_year"] if has_year else [])
+    competition = (
+        pl.col(COMPETITION_COLUMN).cast(pl.Utf8) if COMPETITION_COLUMN in names
+        else pl.lit(competition_key()).alias(COMPETITION_COLUMN)
+    )
+
+    lf = (
+        lf.select(*cols, competition)
+        .with_columns(
+            [clean_text(pl.col(c)) for c in ["round", "city", "edition", "home_team_canonical", "away_team_canonical"]]
+            + [
+                pl.col("home_team_id").cast(pl.Int64, strict=False),
+                pl.col("away_team_id").cast(pl.Int64, strict=False),
+                pl.col("home_result").cast(pl.Float64, strict=False),
+                pl.col("away_result").cast(pl.Float64, strict=False),
+            ]
+        )
+        .with_columns(
+            _ghost=pl.col("date").is_null() & pl.col("home_result").is_null() & pl.col("away_result").is_null(),
+        )
+        .with_columns(
+            _bad_ids=~pl.col("_ghost") & (pl.col("home_team_id").is_null() | pl.col("away_team_id").is_null()),
+        )
+    )
+    return lf, has_year
+
+
+def build_v4_lazy(in_v3: Path) -> tuple[pd.DataFrame, pd.DataFrame, dict[str, int]]:
+    """Équivalent lazy de 07.build_v4 : (fact V4, dimension teams, compteurs)."""
+    lf, has_year = v4_plan(in_v3)
+
+    counts = lf.select(
+        before=pl.len(),
+        ghost=pl.col("_ghost").sum(),
+        bad_ids=pl.col("_bad_ids").sum(),
+    )
+
+    date_str = pl.col("date").cast(pl.Utf8).str.strip_chars()
+    is_placeholder = date_str.str.contains(PLACEHOLDER_DATE_PATTERN).fill_null(False)
+    parsed = pl.col("date").cast(pl.Utf8).str.strptime(pl.Date, "%Y-%m-%d", strict=False)
+
+    hg, ag = pl.col("home_result"), pl.col("away_result")
+    result = (
+        pl.when(hg.is_null() | ag.is_null()).then(pl.lit("draw"))
+        .when(hg > ag).then(pl.col("home_team_id").cast(pl.Utf8))
+        .when(hg < ag).then(pl.col("away_team_id").cast(pl.Utf8))
+        .otherwise(pl.lit("draw"))
+    )
+
+    uid_raw = pl.concat_str(
+        [
+            py_str(pl.col("edition")), py_str(pl.col("date")),
+            py_str(pl.col("home_team_id")), py_str(pl.col("away_team_id")),
+            py_str(pl.col("home_result")), py_str(pl.col("away_result")),
+            py_str(pl.col("round")), py_str(pl.col("city")),
+        ],
+        separator="|",
+    )
+
+    sort_key = "edition_year" if has_year else "edition"
+    matches = (
+        lf.filter(~pl.col("_ghost") & ~pl.col("_bad_ids"))
+        .with_columns(date_is_placeholder=is_placeholder)
+        .with_columns(
+            date=pl.when(pl.col("date_is_placeholder")).then(None).otherwise(parsed).dt.strftime("%Y-%m-%d"),
+        )
+        .with_columns(result=result)
+        .with_columns(match_uid=uid_raw.map_batches(sha1_batch, return_dtype=pl.Utf8))
+        .unique(subset=["match_uid"], keep="first", maintain_order=True)
+        .with_columns(_date_sort=pl.col("date").str.strptime(pl.Date, "%Y-%m-%d", strict=False))
+        .sort(
+            [sort_key, "_date_sort", "round", "home_team_id", "away_team_id"],
+            nulls_last=True,
+            maintain_order=True,
+        )
+        .with_row_index("id_match", offset=1)
+        .with_columns(pl.col("id_match").cast(pl.Int64))
+    )
+
+    teams = (
+        pl.concat(
+            [
+                matches.select(team_id="home_team_id", team_canonical="home_team_canonical"),
+                matches.select(team_id="away_team_id", team_canonical="away_team_canonical"),
+            ]
+        )
+        .drop_nulls(["team_id", "team_canonical"])
+        .unique(subset=["team_id"], keep="first", maintain_order=True)
+        .sort("team_id", maintain_order=True)
+    )
+
+    placeholder = matches.select(placeholder=pl.col("date_is_placeholder").sum())
+
+    # Un seul passage : les sous-plans communs (scan, nettoyage) sont mutualisés
+    df_matches, df_teams, df_counts, df_ph = pl.collect_all(
+        [matches.select(V4_COLUMNS), teams, counts, placeholder]
+    )
+
+    df_out = to_pandas(df_matches)
+    for col in ["home_result", "away_result", "home_team_id", "away_team_id"]:
+        df_out[col] = df_out[col].astype("Int64")
+
+    stats = {k: int(v) for k, v in df_counts.row(0, named=True).items()}
+    stats["placeholder"] = int(df_ph.item())
+    return df_out, to_pandas(df_teams), stats
+
+
+# =============================================================================
+# 08 - V4 -> matches_final_kpi
+# =============================================================================
+def final_kpi_plan(in_matches_v4: Path, in_teams_v4: Path) -> "pl.LazyFrame":
+    teams = scan(in_teams_v4, TEAMS_V4_SCHEMA).select(
+        pl.col("team_id").cast(pl.Int64), pl.col("team_canonical").cast(pl.Utf8)
+    ).unique(subset=["team_id"], keep="last", maintain_order=True)
+
+    def names(alias: str) -> "pl.LazyFrame":
+        return teams.rename({"team_id": f"_{alias}_id", "team_canonical": alias})
+
+    result = pl.col("result").cast(pl.Utf8)
+    is_id = result.str.contains(r"^\d+$").fill_null(False)
+
+    return (
+        scan(in_matches_v4, V4_SCHEMA)
+        .select(["id_match", "home_team_id", "away_team_id", "home_result", "away_result",
+                 "result", "date", "round", "city", "edition", COMPETITION_COLUMN, "match_uid"])
+        .with_columns(_result_id=pl.when(is_id).then(result.cast(pl.Int64, strict=False)))
+        .join(names("home_team"), left_on="home_team_id", right_on="_home_team_id", how="left", maintain_order="left")
+        .join(names("away_team"), left_on="away_team_id", right_on="_away_team_id", how="left", maintain_order="left")
+        .join(names("_result_name"), left_on="_result_id", right_on="__result_name_id", how="left", maintain_order="left")
+        .with_columns(
+            result=pl.when(is_id).then(pl.col("_result_name").fill_null("Unknown")).otherwise(result),
+            edition=pl.col("edition").cast(pl.Utf8).str.split("-").list.first(),
+            is_final=~pl.col("round").is_in(NON_FINAL_ROUNDS).fill_null(False),
+        )
+        .select(["id_match", "home_team", "away_team", "home_result", "away_result",
+                 "result", "date", "round", "city", "edition", "is_final", COMPETITION_COLUMN, "match_uid"])
+    )
+
+
+def build_final_kpi_lazy(in_matches_v4: Path, in_teams_v4: Path) -> pd.DataFrame:
+    """Équivalent lazy de 08.build_final_kpi."""
+    return to_pandas(final_kpi_plan(in_matches_v4, in_teams_v4).collect())
+
+
+# =============================================================================
+# 09 - matches_final_kpi -> 5 tables normalisées
+# =============================================================================
+def build_tables_lazy(in_matches_kpi: Path) -> dict[str, pd.DataFrame]:
+    """Équivalent lazy de 09.build_tables.
+
+    Le CSV est lu une fois et teams_reference calculée une fois : collect_all
+    ne mutualise pas ces sous-plans entre les cinq tables, qui les
+    recalculaient chacune.
+    """
+    kpi_df = (
+        scan(in_matches_kpi, KPI_SCHEMA)
+        .select(["home_team", "away_team", "home_result", "away_result", "date", "round", "city", "edition",
+                 "is_final", COMPETITION_COLUMN, "match_uid"])
+        .with_row_index("id_match", offset=1)
+        .with_columns(pl.col("id_match").cast(pl.Int64))
+        .collect()
+    )
+    kpi = kpi_df.lazy()
+    # Une partition = une compétition (même règle que 09.partition_key)
+    competition = (kpi_df[COMPETITION_COLUMN][0] if len(kpi_df) else None) or competition_key()
+
+    teams_reference = (
+        pl.concat([kpi_df.select(Team_name="home_team"), kpi_df.select(Team_name="away_team")])
+        .drop_nulls()
+        .unique()
+        .sort("Team_name")
+        .with_row_index("id_team", offset=1)
+        .with_columns(pl.col("id_team").cast(pl.Int64), pl.lit(competition).alias(COMPETITION_COLUMN))
+        .lazy()
+    )
+
+    def ids(alias: str) -> "pl.LazyFrame":
+        return teams_reference.select(pl.col("id_team").alias(alias), pl.col("Team_name").alias(f"_{alias}_name"))
+
+    with_ids = (
+        kpi.join(ids("_home_id"), left_on="home_team", right_on="__home_id_name", how="left", maintain_order="left")
+        .join(ids("_away_id"), left_on="away_team", right_on="__away_id_name", how="left", maintain_order="left")
+    )
+
+    hs, as_ = pl.col("home_result"), pl.col("away_result")
+    result = (
+        pl.when(hs.is_null() | as_.is_null()).then(0)
+        .when(hs > as_).then(pl.col("_home_id").fill_null(0))
+        .when(as_ > hs).then(pl.col("_away_id").fill_null(0))
+        .otherwise(0)
+        .cast(pl.Int64)
+    )
+
+    matches_normalized = with_ids.select(
+        "id_match", result.alias("result"), "date", "round", "city", "edition", "is_final", COMPETITION_COLUMN,
+        "match_uid",
+    )
+
+    def stats(side: str, scored: str, conceded: str) -> "pl.LazyFrame":
+        return (
+            with_ids.select(
+                "id_match",
+                pl.col(f"_{side}_id").alias("id_team"),
+                pl.col(scored).alias("Number_of_goals_scored"),
+                pl.col(conceded).alias("Number_of_goals_conceded"),
+                COMPETITION_COLUMN,
+                "match_uid",
+            )
+            .drop_nulls(["id_team"])
+        )
+
+    home_stats = stats("home", "home_result", "away_result")
+    away_stats = stats("away", "away_result", "home_result")
+
+    def side(stats_lf: "pl.LazyFrame", is_home: bool) -> "pl.LazyFrame":
+        scored, conceded = pl.col("Number_of_goals_scored"), pl.col("Number_of_goals_conceded")
+        return stats_lf.select(
+            "id_match",
+            "id_team",
+            pl.lit(is_home).alias("is_home"),
+            scored.alias("goals_for"),
+            conceded.alias("goals_against"),
+            (scored - conceded).alias("goal_diff"),
+            COMPETITION_COLUMN,
+            "match_uid",
+        )
+
+    diff = pl.col("goal_diff")
+    team_match = (
+        pl.concat([side(home_stats, True), side(away_stats, False)])
+        .sort("id_match", maintain_order=True)
+        .with_columns(
+            outcome=pl.when(diff > 0).then(pl.lit("W"))
+            .when(diff == 0).then(pl.lit("D"))
+            .when(diff < 0).then(pl.lit("L"))
+        )
+        .select("id_match", "id_team", "is_home", "goals_for", "goals_against", "goal_diff", "outcome",
+                COMPETITION_COLUMN, "match_uid")
+    )
+
+    frames = pl.collect_all(
+        [
+            teams_reference.select("id_team", "Team_name", COMPETITION_COLUMN),
+            matches_normalized,
+            home_stats,
+            away_stats,
+            team_match,
+        ]
+    )
+    names = ["teams_reference", "matches_normalized", "home_stats", "away_stats", "team_match"]
+    return {name: to_pandas(frame) for name, frame in zip(names, frames)}
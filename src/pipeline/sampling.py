@@ -0,0 +1,118 @@
+"""
+Échantillon stratifié de matches_unified_v2 - mode développement rapide
+=======================================================================
+
+Pour itérer sur une règle de nettoyage de l'étape 06 sans relancer tout
+l'historique : on tire un échantillon déterministe de V2, stratifié par
+(édition, round nettoyé), en gardant au moins une ligne par strate.
+
+Les lignes « à risque » sont toujours incluses :
+  - variantes brutes signalées dans qa_team_collisions.csv (équipes à
+    plusieurs orthographes : chaque variante différente du nom canonique),
+  - équipes de unknown_teams.csv (toutes leurs lignes).
+
+Les référentiels QA sont lus (lecture seule) dans la partition de production
+de la compétition (data/ ou data/competitions/<clé>/).
+
+Usage:
+    from pipeline.sampling import stratified_sample
+
+    sample, stats = stratified_sample(pd.read_csv(IN_V2), frac=0.05, seed=42)
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline.paths import DEFAULT_DATA_DIR
+from pipeline.stages import load_stage
+
+# Référentiels relatifs à la partition source
+IN_QA = Path("reference") / "qa_team_collisions.csv"
+IN_UNKNOWN = Path("reference") / "unknown_teams.csv"
+IN_ALIASES = Path("reference") / "team_aliases.csv"
+IN_DIM = Path("clean") / "dim_teams.csv"
+
+
+def _read_optional(path: Path) -> pd.DataFrame:
+    """CSV de référence, ou DataFrame vide si absent / vide (premier run)."""
+    try:
+        return pd.read_csv(path, dtype=str)
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        return pd.DataFrame()
+
+
+def flagged_variants(source: Path = DEFAULT_DATA_DIR) -> tuple[set[str], set[str]]:
+    """
+    Noms bruts à toujours inclure : (variantes en collision, équipes inconnues).
+    """
+    qa = _read_optional(source / IN_QA)
+    aliases = _read_optional(source / IN_ALIASES)
+    dim = _read_optional(source / IN_DIM)
+    unknown = _read_optional(source / IN_UNKNOWN)
+
+    collisions: set[str] = set()
+    if len(qa) and len(aliases):
+        multi = qa.loc[qa["n_variants"].astype(int) > 1, "team_id"]
+        cand = aliases[aliases["team_id"].isin(multi)]
+        if len(dim):
+            canonical = dict(zip(dim["team_id"], dim["team_canonical"]))
+            cand = cand[cand["team_raw"] != cand["team_id"].map(canonical)]
+        collisions = set(cand["team_raw"])
+
+    unknowns = set(unknown["team_raw"]) if len(unknown) else set()
+    return collisions, unknowns
+
+
+def stratified_sample(
+    df: pd.DataFrame,
+    frac: float = 0.05,
+    seed: int = 42,
+    max_rows_per_flag: int = 5,
+    source: Path = DEFAULT_DATA_DIR,
+) -> tuple[pd.DataFrame, dict[str, int]]:
+    """
+    Échantillon déterministe de V2 (ordre d'origine conservé).
+
+    - strates (édition, round nettoyé) : `frac` des lignes, minimum 1,
+    - variantes en collision : jusqu'à `max_rows_per_flag` lignes chacune,
+    - équipes inconnues : toutes leurs lignes.
+    """
+    stage06 = load_stage("06_v2-to-v3-clean")
+    rng = np.random.default_rng(seed)
+
+    year = stage06.extract_year_from_edition_label(df["edition"].astype(str))
+    rnd = df["round"].map(stage06.clean_round)
+    strata = year.astype(str) + "|" + rnd
+
+    keep = np.zeros(len(df), dtype=bool)
+    for _, idx in df.groupby(strata.values, sort=True).indices.items():
+        n = max(1, int(round(len(idx) * frac)))
+        keep[rng.choice(idx, size=min(n, len(idx)), replace=False)] = True
+    n_strata_rows = int(keep.sum())
+
+    # Même correspondance que 06 : noms bruts après hard fixes
+    home = df["home_team"].replace(stage06.MANUAL_CORRECTIONS).astype(str)
+    away = df["away_team"].replace(stage06.MANUAL_CORRECTIONS).astype(str)
+    collisions, unknowns = flagged_variants(source)
+
+    for raw in sorted(collisions):
+        idx = np.flatnonzero(((home == raw) | (away == raw)).values)
+        if len(idx) > max_rows_per_flag:
+            idx = np.sort(rng.choice(idx, size=max_rows_per_flag, replace=False))
+        keep[idx] = True
+    keep |= (home.isin(unknowns) | away.isin(unknowns)).values
+
+    sample = df.loc[keep].reset_index(drop=True)
+    stats = {
+        "rows_total": len(df),
+        "strata": int(strata.nunique()),
+        "rows_strata": n_strata_rows,
+        "flag_collisions": len(collisions),
+        "flag_unknown": len(unknowns),
+        "rows_sample": len(sample),
+    }
+    return sample, stats
@@ -0,0 +1,122 @@
+"""
+Sharding par édition - exécution parallèle des étapes 06 et 07
+==============================================================
+
+Une fois les IDs d'équipes connus, nettoyage, dédoublonnage et calcul du
+résultat sont indépendants d'une édition à l'autre. Ce module découpe un
+DataFrame par `edition_year`, traite chaque shard dans un pool de processus
+(avec un index d'équipes partagé en lecture seule) puis refusionne les shards
+dans l'ordre d'origine des lignes : la sortie est identique au passage série.
+
+Usage:
+    from pipeline.sharding import run_sharded, get_shared
+
+    def clean_shard(df):
+        raw_to_id = get_shared()["raw_to_id"]
+        ...
+        return df, {"removed": n}
+
+    df, stats = run_sharded(clean_shard, df, workers=4, shared={"raw_to_id": raw_to_id})
+"""
+
+from __future__ import annotations
+
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+SHARD_KEY = "edition_year"
+ROW_ORDER = "_row_order"
+
+ShardResult = tuple[pd.DataFrame, dict[str, int]]
+
+# Index partagé (lecture seule) : rempli une fois par processus via l'initializer
+_SHARED: dict = {}
+
+
+def init_worker(shared: dict) -> None:
+    _SHARED.clear()
+    _SHARED.update(shared)
+
+
+def get_shared() -> dict:
+    """Accès à l'index partagé depuis une fonction de shard."""
+    return _SHARED
+
+
+def resolve_workers(workers: int) -> int:
+    """0 ou négatif -> un worker par cœur disponible."""
+    if workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def split_by_edition(df: pd.DataFrame, key: str = SHARD_KEY) -> list[pd.DataFrame]:
+    """Découper par édition, en marquant l'ordre d'origine des lignes."""
+    if key not in df.columns:
+        raise KeyError(f"Clé de sharding absente: {key} (colonnes: {df.columns.tolist()})")
+
+    df = df.copy()
+    df[ROW_ORDER] = np.arange(len(df))
+    return [shard for _, shard in df.groupby(key, sort=True, dropna=False)]
+
+
+def merge_shards(results: list[ShardResult]) -> ShardResult:
+    """Fusion déterministe : concaténation puis tri stable sur l'ordre d'origine.
+
+    run_sharded fournit toujours au moins un shard (vide pour une partition
+    sans édition) : les colonnes de la sortie sont celles produites par `func`.
+    """
+    stats: Counter = Counter()
+    frames = []
+    for frame, shard_stats in results:
+        frames.append(frame)
+        stats.update(shard_stats)
+
+    merged = pd.concat(frames, ignore_index=True)
+    merged = (
+        merged.sort_values(ROW_ORDER, kind="mergesort")
+        .drop(columns=[ROW_ORDER])
+        .reset_index(drop=True)
+    )
+    return merged, dict(stats)
+
+
+def run_sharded(
+    func: Callable[[pd.DataFrame], ShardResult],
+    df: pd.DataFrame,
+    workers: int = 1,
+    shared: dict | None = None,
+    key: str = SHARD_KEY,
+) -> ShardResult:
+    """
+    Appliquer `func` à chaque shard d'édition puis refusionner.
+
+    `func` doit être définie au niveau module (picklable) et renvoyer
+    (DataFrame, compteurs). Avec workers=1 tout tourne dans le processus
+    courant, ce qui sert de référence pour le mode série.
+    """
+    shared = shared or {}
+    shards = split_by_edition(df, key)
+    if not shards:
+        # Partition vide : un shard vide, pour obtenir les colonnes produites par `func`
+        shards = [df.assign(**{ROW_ORDER: np.arange(len(df))})]
+    workers = min(resolve_workers(workers), max(len(shards), 1))
+
+    if workers == 1:
+        init_worker(shared)
+        results = [func(shard) for shard in shards]
+    else:
+        # Les plus grosses éditions d'abord pour équilibrer la charge du pool
+        order = sorted(range(len(shards)), key=lambda i: len(shards[i]), reverse=True)
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(shared,)) as pool:
+            done = list(pool.map(func, [shards[i] for i in order]))
+        results = [None] * len(shards)
+        for i, res in zip(order, done):
+            results[i] = res
+
+    return merge_shards(results)
@@ -0,0 +1,45 @@
+"""
+Chargement des scripts numérotés du pipeline comme modules
+==========================================================
+
+Les étapes (`06_v2-to-v3-clean.py`, `07_v3_to_v4.py`, ...) ne sont pas
+importables directement (nom commençant par un chiffre). `load_stage` les
+charge via importlib pour réutiliser leurs fonctions depuis les runners et
+les benchmarks.
+
+Usage:
+    from pipeline.stages import load_stage
+
+    stage07 = load_stage("07_v3_to_v4")
+    df_out, teams, stats = stage07.build_v4(df)
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+from types import ModuleType
+
+SRC = Path(__file__).resolve().parents[1]
+
+
+def load_stage(name: str) -> ModuleType:
+    """Charger `src/<name>.py` (une seule fois par processus)."""
+    module_name = "stage_" + name.split("_", 1)[0]
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    path = SRC / f"{name}.py"
+    if not path.exists():
+        raise FileNotFoundError(f"Étape introuvable: {path}")
+
+    if str(SRC) not in sys.path:
+        sys.path.insert(0, str(SRC))
+
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    # Enregistré avant exécution : requis pour pickler ses fonctions (pool de processus)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,237 @@
+"""
+Classements des groupes - calcul vectorisé
+==========================================
+
+Les matchs de poule (round 'Group') de la V4 ne portent ni lettre de
+groupe ni numéro de phase. Seules les éditions de GROUP_STAGE_FORMATS sont
+classées : tournois finaux à une seule phase de poules en round-robin, au
+format déclaré (nombre de groupes, équipes par groupe). Qualifications,
+deux phases de poules (1974-1982), barrages de groupe (1954-1958) et poule
+finale (1950) ne le sont pas, pas plus que les compétitions sans format
+déclaré : leurs éditions ne produisent aucune ligne (undeclared_editions
+les liste, l'étape 07b les signale).
+
+Un groupe est retrouvé comme composante connexe du graphe des rencontres
+de poule d'une édition (équipes = sommets, matchs = arêtes), toutes
+éditions traitées ensemble par propagation vectorisée du plus petit label,
+puis vérifié contre le format : une composante trop grande, une rencontre
+répétée ou plus de composantes que de groupes lèvent ValueError (groupes
+fusionnés ou coupés). Les groupes d'une édition sont nommés A, B, ... dans
+l'ordre de leur premier match (pas la lettre officielle).
+
+Puis, en une passe pour toutes les éditions :
+  - bilan par (édition, groupe, équipe) : un groupby sur la forme longue
+    (une ligne par équipe et par match),
+  - points : 2 par victoire avant 1994, 3 ensuite ; 1 par nul,
+  - départage sur tableaux triés (np.lexsort) : points, différence de buts
+    (quotient de buts avant 1970), buts marqués, puis à partir de 1994
+    confrontations directes entre équipes encore à égalité (points,
+    différence, buts marqués sur leurs seuls matchs, un niveau), enfin nom
+    (à défaut du tirage au sort) ; le rang est la position dans le groupe trié,
+  - qualified : l'équipe joue un match à élimination directe (tour hors
+    'Group' et 'Preliminary round') de la même édition - meilleurs
+    troisièmes compris, sans règle de qualification par édition.
+
+Limites des données : un groupe dont des matchs manquent dans la V4 est
+classé sur les matchs présents ; fair-play non départagé.
+
+Usage:
+    standings = group_standings(matches_v4, teams_v4)
+    standings[standings["qualified"]]      # qui est sorti de quel groupe
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+GROUP_ROUND = "Group"
+NON_KNOCKOUT_ROUNDS = {GROUP_ROUND, "Preliminary round"}
+THREE_POINTS_FROM = 1994    # victoire à 3 points à partir de cette édition
+GOAL_DIFFERENCE_FROM = 1970  # quotient de buts (goal average) avant cette édition
+HEAD_TO_HEAD_FROM = 1994     # confrontations directes après les buts marqués
+
+# Éditions classées : {compétition: {édition: (équipes de chaque groupe, ...)}}
+GROUP_STAGE_FORMATS = {
+    "wc_men": {
+        1930: (4, 3, 3, 3),
+        **{edition: (4,) * 4 for edition in (1962, 1966, 1970)},
+        **{edition: (4,) * 6 for edition in (1986, 1990, 1994)},
+        **{edition: (4,) * 8 for edition in range(1998, 2023, 4)},
+    },
+}
+
+STANDINGS_COLUMNS = [
+    "competition", "edition", "group_name", "rank", "Team_name",
+    "played", "wins", "draws", "losses", "goals_for", "goals_against", "goal_diff", "points", "qualified",
+]
+
+
+def components(left, right):
+    """Arêtes (left[i], right[i]) entre sommets 0..n-1 -> plus petit sommet de la composante de chaque sommet"""
+    n = int(max(left.max(initial=-1), right.max(initial=-1))) + 1
+    labels = np.arange(n)
+    while True:
+        low = np.minimum(labels[left], labels[right])
+        new = labels.copy()
+        np.minimum.at(new, left, low)
+        np.minimum.at(new, right, low)
+        new = new[new]          # saut de pointeurs : convergence en O(log diamètre) passes
+        if np.array_equal(new, labels):
+            return labels
+        labels = new
+
+
+def group_names(count):
+    """0, 1, ... -> 'A', 'B', ... ('G27' au-delà de Z)"""
+    return np.array([chr(ord("A") + i) if i < 26 else f"G{i + 1}" for i in range(count)])
+
+
+def _declared(group: pd.DataFrame) -> np.ndarray:
+    """Matchs 'Group' -> masque des matchs d'une édition de GROUP_STAGE_FORMATS"""
+    declared = [(competition, edition) for competition, formats in GROUP_STAGE_FORMATS.items()
+                for edition in formats]
+    return pd.MultiIndex.from_arrays([group["competition"], group["edition"]]).isin(declared)
+
+
+def group_stage_matches(matches: pd.DataFrame) -> pd.DataFrame:
+    """Matchs 'Group' des éditions de GROUP_STAGE_FORMATS (les autres sont ignorés)"""
+    group = matches[matches["round"] == GROUP_ROUND]
+    return group[_declared(group)]
+
+
+def undeclared_editions(matches: pd.DataFrame) -> list[tuple[str, int]]:
+    """(compétition, édition) ayant des matchs 'Group' mais pas de format déclaré : non classées"""
+    group = matches[matches["round"] == GROUP_ROUND]
+    skipped = group.loc[~_declared(group), ["competition", "edition"]].drop_duplicates()
+    return sorted((str(c), int(e)) for c, e in skipped.itertuples(index=False))
+
+
+def expected_matches(competition, edition):
+    """Matchs de poule d'une édition classée (round-robin de chaque groupe du format)"""
+    return sum(n * (n - 1) // 2 for n in GROUP_STAGE_FORMATS[competition][edition])
+
+
+def check_groups(group_matches: pd.DataFrame, component) -> None:
+    """Composantes (une par match) -> ValueError si elles ne sont pas les groupes du format déclaré"""
+    home = group_matches["home_team_id"].to_numpy()
+    away = group_matches["away_team_id"].to_numpy()
+    edition = pd.MultiIndex.from_arrays([group_matches["competition"], group_matches["edition"]])
+    matches = pd.DataFrame({"component": component, "low": np.minimum(home, away), "high": np.maximum(home, away)})
+    sides = pd.DataFrame({"component": np.tile(component, 2), "team": np.concatenate([home, away])})
+    teams = sides.drop_duplicates().groupby("component").size()
+
+    errors = []
+    for competition, year in edition.unique():
+        in_edition = np.asarray(edition == (competition, year))
+        sizes = GROUP_STAGE_FORMATS[competition][year]
+        groups, size = len(sizes), max(sizes)
+        found = np.unique(component[in_edition])
+        label = f"{competition} {year}"
+        if len(found) > groups:
+            errors.append(f"{label}: {len(found)} composantes pour {groups} groupes (groupe coupé)")
+        if teams[found].max() > size:
+            errors.append(f"{label}: composante de {teams[found].max()} équipes, groupes de {size} au plus")
+        if matches[in_edition].duplicated().any():
+            errors.append(f"{label}: rencontre répétée dans un groupe (pas un round-robin)")
+    if errors:
+        raise ValueError("Groupes non reconstituables :\n  - " + "\n  - ".join(errors))
+
+
+def assign_groups(group_matches: pd.DataFrame) -> pd.Series:
+    """Matchs de poule (group_stage_matches) -> lettre du groupe de chaque match, composantes vérifiées"""
+    keys = [group_matches["competition"], group_matches["edition"]]
+    home = pd.MultiIndex.from_arrays([*keys, group_matches["home_team_id"]])
+    away = pd.MultiIndex.from_arrays([*keys, group_matches["away_team_id"]])
+    codes, _ = pd.factorize(home.append(away))
+    n = len(group_matches)
+    labels = components(codes[:n], codes[n:])
+    component = labels[codes[:n]]
+    check_groups(group_matches, component)
+
+    # Ordre des groupes d'une édition : premier id_match de la composante
+    first = pd.Series(group_matches["id_match"].to_numpy()).groupby(component).transform("min")
+    order = pd.DataFrame({"competition": group_matches["competition"].to_numpy(),
+                          "edition": group_matches["edition"].to_numpy(), "first": first})
+    position = order.groupby(["competition", "edition"])["first"].rank(method="dense").astype(int).to_numpy() - 1
+    return pd.Series(group_names(position.max() + 1 if n else 0)[position], index=group_matches.index)
+
+
+def direct_results(table: pd.DataFrame, long: pd.DataFrame, tiebreak) -> np.ndarray:
+    """Points, différence et buts marqués de chaque équipe sur ses seuls matchs contre les équipes
+    à égalité avec elle (même groupe, points, tiebreak, buts marqués) -> tableau (équipes, 3)
+
+    Éditions avant HEAD_TO_HEAD_FROM : zéros (critère non appliqué).
+    """
+    keys = ["competition", "edition", "group_name"]
+    tied = pd.factorize(pd.MultiIndex.from_arrays(
+        [*(table[key] for key in keys), table["points"], tiebreak, table["goals_for"]]))[0]
+    teams = pd.MultiIndex.from_frame(table[keys + ["team_id"]])
+    team = teams.get_indexer(pd.MultiIndex.from_frame(long[keys + ["team_id"]]))
+    opponent = teams.get_indexer(pd.MultiIndex.from_arrays([*(long[key] for key in keys), long["opponent_id"]]))
+    direct = (tied[team] == tied[opponent]) & (long["edition"].to_numpy() >= HEAD_TO_HEAD_FROM)
+
+    results = np.zeros((len(table), 3))
+    np.add.at(results, team[direct], long[["points", "goal_diff", "goals_for"]].to_numpy(dtype=float)[direct])
+    return results
+
+
+def group_standings(matches: pd.DataFrame, teams: pd.DataFrame) -> pd.DataFrame:
+    """V4 + dimension teams -> classement de chaque groupe de chaque édition (STANDINGS_COLUMNS)"""
+    group = group_stage_matches(matches).copy()
+    if group.empty:   # partition sans édition déclarée
+        return pd.DataFrame(columns=STANDINGS_COLUMNS)
+    group["group_name"] = assign_groups(group)
+
+    # Forme longue : une ligne par équipe et par match de poule
+    home_goals = group["home_result"].to_numpy(dtype=float)
+    away_goals = group["away_result"].to_numpy(dtype=float)
+    scored = ~(np.isnan(home_goals) | np.isnan(away_goals))
+    long = pd.DataFrame({
+        "competition": np.tile(group["competition"].to_numpy(), 2),
+        "edition": np.tile(group["edition"].to_numpy(), 2),
+        "group_name": np.tile(group["group_name"].to_numpy(), 2),
+        "team_id": np.concatenate([group["home_team_id"].to_numpy(), group["away_team_id"].to_numpy()]),
+        "opponent_id": np.concatenate([group["away_team_id"].to_numpy(), group["home_team_id"].to_numpy()]),
+        "goals_for": np.nan_to_num(np.concatenate([home_goals, away_goals])).astype(int),
+        "goals_against": np.nan_to_num(np.concatenate([away_goals, home_goals])).astype(int),
+        "scored": np.tile(scored, 2),
+    })
+    long["played"] = 1
+    long["wins"] = long["scored"] & (long["goals_for"] > long["goals_against"])
+    long["draws"] = long["scored"] & (long["goals_for"] == long["goals_against"])
+    long["losses"] = long["scored"] & (long["goals_for"] < long["goals_against"])
+    long["goal_diff"] = long["goals_for"] - long["goals_against"]
+    long["points"] = np.where(long["edition"] >= THREE_POINTS_FROM, 3, 2) * long["wins"] + long["draws"]
+
+    keys = ["competition", "edition", "group_name", "team_id"]
+    table = long.groupby(keys, sort=False)[
+        ["played", "wins", "draws", "losses", "goals_for", "goals_against", "goal_diff", "points"]].sum().reset_index()
+    names = teams.set_index("team_id")["team_canonical"]
+    table["Team_name"] = table["team_id"].map(names).fillna(table["team_id"].astype(str))
+
+    # Départage : quotient de buts avant 1970 (encaissés nuls : +inf), différence ensuite
+    with np.errstate(divide="ignore", invalid="ignore"):
+        average = np.where(table["goals_against"] > 0, table["goals_for"] / table["goals_against"],
+                           np.where(table["goals_for"] > 0, np.inf, 0.0))
+    tiebreak = np.where(table["edition"] < GOAL_DIFFERENCE_FROM, average, table["goal_diff"])
+    head_to_head = direct_results(table, long, tiebreak)
+    order = np.lexsort((
+        table["Team_name"].to_numpy(), *(-head_to_head[:, ::-1].T),
+        -table["goals_for"].to_numpy(), -tiebreak, -table["points"].to_numpy(),
+        table["group_name"].to_numpy(), table["edition"].to_numpy(), table["competition"].to_numpy(),
+    ))
+    table = table.iloc[order].reset_index(drop=True)
+    group_id = pd.factorize(pd.MultiIndex.from_frame(table[["competition", "edition", "group_name"]]))[0]
+    starts = np.flatnonzero(np.r_[True, group_id[1:] != group_id[:-1]])
+    table["rank"] = np.arange(len(table)) - np.repeat(starts, np.diff(np.r_[starts, len(table)])) + 1
+
+    # Qualifiés : présents dans un tour à élimination directe de la même édition
+    knockout = matches[~matches["round"].isin(NON_KNOCKOUT_ROUNDS)]
+    advanced = pd.MultiIndex.from_arrays([
+        np.concatenate([knockout["competition"], knockout["competition"]]),
+        np.concatenate([knockout["edition"], knockout["edition"]]),
+        np.concatenate([knockout["home_team_id"], knockout["away_team_id"]]),
+    ])
+    table["qualified"] = pd.MultiIndex.from_frame(table[["competition", "edition", "team_id"]]).isin(advanced)
+    return table[STANDINGS_COLUMNS]
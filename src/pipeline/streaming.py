@@ -0,0 +1,174 @@
+"""
+Streaming par édition - extract / transform / load en recouvrement
+==================================================================
+
+Mode asyncio de `run_setup.py --stream` : au lieu d'attendre tous les CSV de
+data/clean/ puis de charger les tables une à une, les éditions circulent en
+lots dans des files bornées :
+
+    extracteur (V4 lu par édition) -> [file] -> transformation 08 + 09
+        (processus dédié) -> [file] -> chargeur BDD (thread)
+
+Le chargement d'une édition recouvre la transformation de la suivante ; les
+files bornées (`queue_size`) limitent le nombre de lots en mémoire. Le temps
+total tend vers celui de la phase la plus lente au lieu de la somme.
+
+Les étapes 03 à 07 restent des passes globales (index équipes, dédoublonnage
+et id_match sur tout l'historique) : le flux démarre sur leur sortie V4.
+
+Usage:
+    python src/run_setup.py --stream --queue-size 2
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator
+
+import pandas as pd
+
+from database.checksums import client_checksums
+from database.setup_database import add_edition
+from pipeline.paths import COMPETITION_COLUMN, data_dir
+from pipeline.sharding import init_worker, get_shared
+from pipeline.stages import load_stage
+
+IN_MATCHES_V4 = data_dir() / "processed" / "matches_unified_v4.csv"
+IN_TEAMS_V4 = data_dir() / "reference" / "teams_v4.csv"
+
+STREAM_TABLES = ['matches_normalized', 'home_stats', 'away_stats', 'team_match']
+
+_DONE = object()
+
+
+def iter_edition_batches(path: Path, key: str = "edition", chunksize: int = 5000) -> Iterator[pd.DataFrame]:
+    """
+    Lire un CSV trié par édition en lots d'une édition complète, sans jamais
+    charger le fichier entier (lecture par chunks + report de la dernière édition).
+    """
+    pending = None
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        if pending is not None:
+            chunk = pd.concat([pending, chunk], ignore_index=True)
+        last = chunk[key].iloc[-1]
+        tail = chunk[key] == last
+        for _, batch in chunk.loc[~tail].groupby(key, sort=False):
+            yield batch.reset_index(drop=True)
+        pending = chunk.loc[tail].reset_index(drop=True)
+    if pending is not None and len(pending):
+        yield pending
+
+
+def build_references(in_matches_v4: Path = IN_MATCHES_V4, in_teams_v4: Path = IN_TEAMS_V4) -> dict:
+    """
+    Référentiels globaux calculés avant le flux (lecture de 3 colonnes seulement) :
+    dimension teams V4 et teams_reference de l'étape 09 (IDs triés par nom).
+    """
+    stage09 = load_stage("09_tables_construction")
+
+    teams_v4 = pd.read_csv(in_teams_v4)
+    team_map = pd.Series(teams_v4.team_canonical.values, index=teams_v4.team_id).to_dict()
+    ids = pd.read_csv(in_matches_v4, usecols=["home_team_id", "away_team_id", COMPETITION_COLUMN])
+    names = pd.DataFrame({
+        'home_team': ids['home_team_id'].map(team_map),
+        'away_team': ids['away_team_id'].map(team_map),
+        COMPETITION_COLUMN: ids[COMPETITION_COLUMN],
+    })
+    with contextlib.redirect_stdout(io.StringIO()):
+        teams_reference = stage09.create_teams_reference(names)
+    return {"teams_v4": teams_v4, "teams_reference": teams_reference}
+
+
+def transform_batch(batch: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """08 + 09 sur une édition (exécuté dans le processus de transformation)."""
+    stage08 = load_stage("08_v4_to_db")
+    stage09 = load_stage("09_tables_construction")
+    refs = get_shared()
+    teams_reference = refs["teams_reference"]
+    start_id = int(batch['id_match'].iloc[0])
+
+    # Les étapes 08/09 sont verbeuses : silence dans le worker uniquement
+    with contextlib.redirect_stdout(io.StringIO()):
+        kpi = stage08.build_final_kpi(batch, refs["teams_v4"])
+        home_stats = stage09.create_home_stats(kpi, teams_reference, start_id)
+        away_stats = stage09.create_away_stats(kpi, teams_reference, start_id)
+        return {
+            'matches_normalized': stage09.create_matches_table(kpi, teams_reference, start_id),
+            'home_stats': home_stats,
+            'away_stats': away_stats,
+            'team_match': stage09.create_team_match(home_stats, away_stats),
+        }
+
+
+async def stream_load(db_manager, queue_size: int = 2, in_matches_v4: Path = IN_MATCHES_V4,
+                      in_teams_v4: Path = IN_TEAMS_V4, schema: str | None = None,
+                      checksums: dict[str, pd.DataFrame] | None = None) -> dict[str, int]:
+    """Orchestrer extract -> transform -> load par édition, files bornées.
+
+    `schema` : charger dans les tables de ce schéma (staging) plutôt que les tables en service.
+    `checksums` : dict rempli avec les sommes de contrôle client des lignes chargées
+    ({table: DataFrame edition, rows, checksum}), calculées lot par lot.
+    """
+    def target(table_name: str) -> str:
+        return f"{schema}.{table_name}" if schema else table_name
+
+    refs = build_references(in_matches_v4, in_teams_v4)
+    counts = {'teams_reference': db_manager.append_rows(target('teams_reference'), refs["teams_reference"])}
+    counts.update({table: 0 for table in STREAM_TABLES})
+    sums = {'teams_reference': [client_checksums('teams_reference', refs["teams_reference"])]} \
+        if checksums is not None else None
+
+    extracted: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    transformed: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    loop = asyncio.get_running_loop()
+    busy = {"extract": 0.0, "transform": 0.0, "load": 0.0}
+
+    async def extractor() -> None:
+        batches = iter_edition_batches(in_matches_v4)
+        while True:
+            t0 = time.perf_counter()
+            batch = await asyncio.to_thread(next, batches, None)
+            busy["extract"] += time.perf_counter() - t0
+            if batch is None:
+                break
+            await extracted.put(batch)
+        await extracted.put(_DONE)
+
+    async def transformer(pool: ProcessPoolExecutor) -> None:
+        while (batch := await extracted.get()) is not _DONE:
+            t0 = time.perf_counter()
+            tables = await loop.run_in_executor(pool, transform_batch, batch)
+            busy["transform"] += time.perf_counter() - t0
+            await transformed.put((batch['edition'].iloc[0], tables))
+        await transformed.put(_DONE)
+
+    async def loader() -> None:
+        while (item := await transformed.get()) is not _DONE:
+            edition, tables = item
+            tables = add_edition(tables)
+            t0 = time.perf_counter()
+            for table_name in STREAM_TABLES:
+                counts[table_name] += await asyncio.to_thread(
+                    db_manager.append_rows, target(table_name), tables[table_name])
+                if sums is not None:
+                    sums.setdefault(table_name, []).append(
+                        await asyncio.to_thread(client_checksums, table_name, tables[table_name]))
+            busy["load"] += time.perf_counter() - t0
+            print(f" édition {edition}: {len(tables['matches_normalized'])} matchs chargés")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=1, initializer=init_worker, initargs=(refs,)) as pool:
+        await asyncio.gather(extractor(), transformer(pool), loader())
+    elapsed = time.perf_counter() - start
+    if sums is not None:
+        # Un lot = une édition : concaténation sans regroupement
+        checksums.update({table: pd.concat(frames, ignore_index=True) for table, frames in sums.items()})
+
+    print(f"\n Streaming terminé en {elapsed:.2f}s "
+          f"(extract {busy['extract']:.2f}s | transform {busy['transform']:.2f}s | load {busy['load']:.2f}s)")
+    return counts
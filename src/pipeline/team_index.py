@@ -0,0 +1,256 @@
+"""
+Index équipe -> matchs et matrice des confrontations (CSR)
+==========================================================
+
+« Tous les matchs de la France » ou « équipes qui se sont le plus
+affrontées » parcouraient toute la table de faits (kpi.sql, pandas). Deux
+structures creuses, construites depuis la V4 (matches_unified_v4.csv +
+teams_v4.csv) par l'étape 07c, répondent en O(résultat) :
+
+  - index inversé : pour chaque équipe, les lignes de la table de faits où
+    elle joue (domicile ou extérieur), dans l'ordre des id_match,
+  - matrice équipe x équipe au format CSR (indptr / indices triés) : pour
+    chaque paire jouée, du point de vue de l'équipe en ligne, matchs,
+    victoires, nuls, défaites, buts marqués, buts encaissés ; et les lignes
+    des matchs de la paire (même découpage CSR par entrée de la matrice).
+
+La matrice est symétrique (les deux sens sont stockés) : une paire se lit
+dans la ligne de l'une ou l'autre équipe, sans transposition.
+
+Enregistrement à côté de teams_v4.csv : un dossier reference/team_index/
+de fichiers .npy (un par tableau) et meta.json (version = sha1 des deux
+CSV sources). Les .npy se chargent en np.memmap : ouvrir l'index ne lit
+rien, une requête ne touche que les quelques pages de son résultat.
+
+Usage:
+    index = build_team_index(matches_v4, teams_v4)
+    write_team_index(index, reference_dir / INDEX_DIR, version)
+
+    index = TeamIndex.load("data/reference/team_index")     # memmap
+    index.team_rows("France")                 # lignes de la V4 (tableau)
+    index.team_matches("France")              # id_match
+    index.head_to_head("France", "Germany")   # {'matches': ..., 'wins': ...}
+    index.pair_matches("France", "Germany")   # id_match de la paire
+    index.most_played_pairs(10)               # [(équipe 1, équipe 2, matchs)]
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+INDEX_DIR = "team_index"
+META_FILE = "meta.json"
+
+# Statistiques d'une paire, du point de vue de l'équipe en ligne (colonnes de pair_stats)
+PAIR_STATS = ("matches", "wins", "draws", "losses", "goals_for", "goals_against")
+
+# Tableaux enregistrés (un .npy chacun)
+ARRAYS = (
+    "team_ids",            # int32 (T,)    : team_id de teams_v4, trié
+    "team_names",          # str (T,)      : team_canonical
+    "match_ids",           # int32 (N,)    : id_match de chaque ligne de la V4
+    "team_offsets",        # int64 (T+1,)  : index inversé, début des lignes de chaque équipe
+    "team_match_rows",     # int32 (2N,)   : lignes de la V4, par équipe puis id_match
+    "pair_offsets",        # int64 (T+1,)  : CSR indptr
+    "pair_opponents",      # int32 (P,)    : CSR indices (position de l'adversaire), triés par ligne
+    "pair_stats",          # int32 (P, 6)  : PAIR_STATS
+    "pair_match_offsets",  # int64 (P+1,)  : début des matchs de chaque paire
+    "pair_match_rows",     # int32 (2N,)   : lignes de la V4, par paire puis id_match
+)
+
+SOURCE_FILES = ("matches_unified_v4.csv", "teams_v4.csv")
+
+
+class TeamIndex:
+    """Index inversé équipe -> lignes et matrice CSR des confrontations (tableaux numpy ou memmap)"""
+
+    def __init__(self, arrays, meta=None):
+        missing = [name for name in ARRAYS if name not in arrays]
+        if missing:
+            raise KeyError(f"Tableaux manquants dans l'index: {missing}")
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self.meta = meta or {}
+        self._names = None   # nom -> position, construit à la demande
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Index enregistré par write_team_index (memmap en lecture seule par défaut)"""
+        path = Path(path)
+        mode = "r" if mmap else None
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode=mode, allow_pickle=False) for name in ARRAYS}
+        meta = json.loads((path / META_FILE).read_text(encoding="utf-8"))
+        return cls(arrays, meta)
+
+    # --- Positions ----------------------------------------------------------
+
+    def position(self, team):
+        """Nom (team_canonical) ou team_id -> position dans l'index"""
+        if isinstance(team, str):
+            if self._names is None:
+                self._names = {name: i for i, name in enumerate(self.team_names.tolist())}
+            try:
+                return self._names[team]
+            except KeyError:
+                raise KeyError(f"Équipe absente de l'index: {team!r}") from None
+        i = int(np.searchsorted(self.team_ids, team))
+        if i == len(self.team_ids) or self.team_ids[i] != team:
+            raise KeyError(f"team_id absent de l'index: {team!r}")
+        return i
+
+    def _pair(self, team_1, team_2):
+        """Entrée de la matrice (team_1, team_2), None si les équipes ne se sont jamais rencontrées"""
+        i, j = self.position(team_1), self.position(team_2)
+        start, end = int(self.pair_offsets[i]), int(self.pair_offsets[i + 1])
+        k = start + int(np.searchsorted(self.pair_opponents[start:end], j))
+        return k if k < end and self.pair_opponents[k] == j else None
+
+    # --- Équipe ---------------------------------------------------------------
+
+    def team_rows(self, team):
+        """Lignes de la V4 où joue l'équipe (vue sur l'index, ordre des id_match)"""
+        i = self.position(team)
+        return self.team_match_rows[self.team_offsets[i]:self.team_offsets[i + 1]]
+
+    def team_matches(self, team):
+        """id_match des matchs de l'équipe"""
+        return self.match_ids[self.team_rows(team)]
+
+    def opponents(self, team):
+        """[(adversaire, {statistiques})] de l'équipe, par nom d'adversaire"""
+        i = self.position(team)
+        start, end = int(self.pair_offsets[i]), int(self.pair_offsets[i + 1])
+        names = self.team_names[self.pair_opponents[start:end]].tolist()
+        stats = self.pair_stats[start:end].tolist()
+        return sorted((name, dict(zip(PAIR_STATS, row))) for name, row in zip(names, stats))
+
+    # --- Paire ----------------------------------------------------------------
+
+    def head_to_head(self, team_1, team_2):
+        """Bilan de team_1 contre team_2 ({PAIR_STATS}, à zéro s'ils ne se sont jamais rencontrés)"""
+        k = self._pair(team_1, team_2)
+        if k is None:
+            return dict.fromkeys(PAIR_STATS, 0)
+        return dict(zip(PAIR_STATS, self.pair_stats[k].tolist()))
+
+    def pair_rows(self, team_1, team_2):
+        """Lignes de la V4 des matchs entre les deux équipes (ordre des id_match)"""
+        k = self._pair(team_1, team_2)
+        if k is None:
+            return self.pair_match_rows[:0]
+        return self.pair_match_rows[self.pair_match_offsets[k]:self.pair_match_offsets[k + 1]]
+
+    def pair_matches(self, team_1, team_2):
+        """id_match des matchs entre les deux équipes"""
+        return self.match_ids[self.pair_rows(team_1, team_2)]
+
+    def most_played_pairs(self, limit=10):
+        """[(équipe 1, équipe 2, matchs)] des paires les plus jouées (équipe 1 : plus petit team_id)"""
+        rows = np.repeat(np.arange(len(self.team_ids)), np.diff(self.pair_offsets))
+        upper = np.flatnonzero(rows < self.pair_opponents)
+        counts = self.pair_stats[upper, 0]
+        names_1 = self.team_names[rows[upper]]
+        names_2 = self.team_names[self.pair_opponents[upper]]
+        order = np.lexsort((names_2, names_1, -counts))[:limit]
+        return list(zip(names_1[order].tolist(), names_2[order].tolist(), counts[order].tolist()))
+
+
+
+def index_version(matches_path, teams_path):
+    """Version de l'index : préfixe du sha1 des deux CSV sources (V4 et dimension teams)"""
+    digest = hashlib.sha1()
+    for path in (matches_path, teams_path):
+        digest.update(hashlib.sha1(Path(path).read_bytes()).digest())
+    return digest.hexdigest()[:16]
+
+
+def build_team_index(matches, teams):
+    """Fact V4 + dimension teams (DataFrames de l'étape 07) -> TeamIndex en mémoire"""
+    team_ids = np.sort(teams["team_id"].to_numpy(dtype=np.int32))
+    names = np.array(teams.set_index("team_id").loc[team_ids, "team_canonical"].tolist(), dtype=str)
+    n_teams, n_rows = len(team_ids), len(matches)
+
+    home_ids = matches["home_team_id"].to_numpy(dtype=np.int32)
+    away_ids = matches["away_team_id"].to_numpy(dtype=np.int32)
+    unknown = np.setdiff1d(np.concatenate([home_ids, away_ids]), team_ids)
+    if len(unknown):
+        raise ValueError(f"team_id absents de la dimension teams: {unknown[:10].tolist()}")
+    home = np.searchsorted(team_ids, home_ids)
+    away = np.searchsorted(team_ids, away_ids)
+
+    # Résultat de la V4 : id de l'équipe gagnante ou 'draw'
+    result = matches["result"].astype(str).to_numpy()
+    home_win = result == home_ids.astype(str)
+    away_win = result == away_ids.astype(str)
+    draw = ~(home_win | away_win)
+    home_goals = matches["home_result"].fillna(0).to_numpy(dtype=np.int32)
+    away_goals = matches["away_result"].fillna(0).to_numpy(dtype=np.int32)
+
+    # Forme longue : une ligne par équipe et par match
+    rows = np.tile(np.arange(n_rows, dtype=np.int32), 2)
+    team = np.concatenate([home, away])
+    opponent = np.concatenate([away, home])
+    stats = np.column_stack([
+        np.ones(2 * n_rows, dtype=np.int32),
+        np.concatenate([home_win, away_win]),
+        np.concatenate([draw, draw]),
+        np.concatenate([away_win, home_win]),
+        np.concatenate([home_goals, away_goals]),
+        np.concatenate([away_goals, home_goals]),
+    ]).astype(np.int32)
+
+    # Index inversé : lignes triées par équipe puis par ligne
+    order = np.lexsort((rows, team))
+    team_offsets = np.concatenate([[0], np.cumsum(np.bincount(team, minlength=n_teams))])
+
+    # Matrice CSR : lignes triées par (équipe, adversaire, ligne), une entrée par paire
+    pair_order = np.lexsort((rows, opponent, team))
+    key = team[pair_order].astype(np.int64) * n_teams + opponent[pair_order]
+    starts = np.flatnonzero(np.concatenate([[True], key[1:] != key[:-1]])) if len(key) else np.zeros(0, np.intp)
+    pair_team = team[pair_order][starts]
+    pair_stats = (np.add.reduceat(stats[pair_order], starts, axis=0) if len(starts)
+                  else np.zeros((0, len(PAIR_STATS)), dtype=np.int32))
+
+    return TeamIndex({
+        "team_ids": team_ids,
+        "team_names": names,
+        "match_ids": matches["id_match"].to_numpy(dtype=np.int32),
+        "team_offsets": team_offsets.astype(np.int64),
+        "team_match_rows": rows[order],
+        "pair_offsets": np.concatenate([[0], np.cumsum(np.bincount(pair_team, minlength=n_teams))]).astype(np.int64),
+        "pair_opponents": opponent[pair_order][starts].astype(np.int32),
+        "pair_stats": pair_stats.astype(np.int32),
+        "pair_match_offsets": np.concatenate([starts, [len(pair_order)]]).astype(np.int64),
+        "pair_match_rows": rows[pair_order],
+    })
+
+
+def write_team_index(index, path, version):
+    """Écrire un .npy par tableau + meta.json dans un dossier temporaire, puis le substituer ; renvoie la taille"""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    old = path.with_name(path.name + ".old")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for name in ARRAYS:
+        np.save(tmp / f"{name}.npy", np.ascontiguousarray(getattr(index, name)), allow_pickle=False)
+    meta = {
+        "version": version,
+        "teams": len(index.team_ids),
+        "matches": len(index.match_ids),
+        "pairs": len(index.pair_opponents) // 2,
+    }
+    (tmp / META_FILE).write_text(json.dumps(meta, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+    # Le dossier en place n'est jamais partiel : ancien renommé, nouveau renommé, ancien supprimé
+    shutil.rmtree(old, ignore_errors=True)
+    if path.exists():
+        path.rename(old)
+    tmp.rename(path)
+    shutil.rmtree(old, ignore_errors=True)
+    return sum(f.stat().st_size for f in path.iterdir())
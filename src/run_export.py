@@ -0,0 +1,67 @@
+"""
+Export / restauration de la base PostgreSQL
+===========================================
+
+Exporte les tables chargées (un fichier par table + manifest.json) pour les
+sauvegardes et pour alimenter des copies locales, ou recharge un export.
+
+  - csv.gz  : COPY ... TO STDOUT, CSV avec en-tête compressé à la volée,
+  - parquet : lots Arrow typés lus par curseur serveur (pip install pyarrow).
+
+Les tables sont exportées en parallèle dans un même instantané : l'export
+reste cohérent pendant un chargement. La restauration recrée les tables,
+recharge les fichiers par COPY (row_hash conservés), reconstruit clés,
+index et vues KPI.
+
+Usage:
+    python src/run_export.py --out backups/2024-06
+    python src/run_export.py --out backups/wc_men --format parquet --competition wc_men
+    python src/run_export.py --restore backups/2024-06
+"""
+
+import argparse
+import time
+
+from database.setup_database import EXPORT_FORMATS, DatabaseManager
+from pipeline.paths import check_competition
+
+
+def export(db_manager, out, fmt, competitions, workers):
+    print(f"\n EXPORT -> {out} ({fmt})")
+    print("=" * 40)
+    start = time.perf_counter()
+    counts = db_manager.export_tables(out, fmt=fmt, competitions=competitions, workers=workers)
+    for table_name, n in counts.items():
+        print(f" {table_name:<20} {n:>8} lignes")
+    print(f"\n Export terminé en {time.perf_counter() - start:.2f}s")
+
+
+def restore(db_manager, directory):
+    print(f"\n RESTAURATION <- {directory}")
+    print("=" * 40)
+    start = time.perf_counter()
+    counts = db_manager.restore_tables(directory)
+    print(f"\n Restauration terminée en {time.perf_counter() - start:.2f}s "
+          f"({counts.get('matches_normalized', 0)} matchs)")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export / restauration de la base PostgreSQL FIFA World Cup")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--out", metavar="RÉPERTOIRE", help="Exporter les tables dans ce répertoire")
+    action.add_argument("--restore", metavar="RÉPERTOIRE", help="Recharger un export (tables recréées)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv.gz", help="Format d'export")
+    parser.add_argument("--competition", nargs="+", type=check_competition, metavar="KEY",
+                        help="Exporter uniquement ces compétitions")
+    parser.add_argument("--workers", type=int, help="Tables exportées en parallèle (défaut : pool)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    db_manager = DatabaseManager()
+    db_manager.connect_database()
+    if args.out:
+        export(db_manager, args.out, args.format, args.competition, args.workers)
+    else:
+        restore(db_manager, args.restore)
@@ -0,0 +1,96 @@
+"""
+Requêtes KPI en local - base embarquée DuckDB / SQLite
+=====================================================
+
+Charge les tables normalisées (<partition>/clean/*_normalized.csv) dans une
+base locale sans serveur puis exécute les requêtes de db/kpi.sql : itération
+rapide sur les KPI sans PostgreSQL ni .env.
+
+Usage:
+    python src/run_local.py                           # DuckDB si installé, sinon SQLite, en mémoire
+    python src/run_local.py --backend sqlite
+    python src/run_local.py --query victoires buts    # requêtes dont le nom contient ces mots
+    python src/run_local.py --db data/fifa_local.duckdb --views
+    python src/run_local.py --competition wc_women
+"""
+
+import argparse
+import time
+
+from database.embedded import EmbeddedDatabaseManager, default_backend, duckdb
+from database.kpi_queries import load_kpi_queries
+from pipeline.paths import available_competitions, check_competition
+
+
+def main(backend=None, db_path=":memory:", query_filter=None, views=False, competitions=None, rows=5):
+    """Charger la base locale puis exécuter les requêtes KPI (toutes ou filtrées)"""
+    print(" BASE LOCALE - REQUÊTES KPI")
+    print("=" * 40)
+
+    db = EmbeddedDatabaseManager(db_path, backend or default_backend())
+    try:
+        db.connect_database()
+
+        keys = competitions or available_competitions()
+        print(f" Compétitions: {', '.join(keys)}")
+        start = time.perf_counter()
+        db.create_simple_tables()
+        counts = db.load_clean_tables(keys)
+        db.build_post_load_objects()
+        print(f" Chargement: {counts['teams_reference']} équipes, {counts['matches_normalized']} matchs, "
+              f"{counts['team_match']} équipe x match en {time.perf_counter() - start:.2f}s")
+
+        if views:
+            print("\n VUES KPI")
+            print("=" * 40)
+            for view, (_, elapsed) in db.refresh_kpi_views().items():
+                print(f" {view:<22} {elapsed * 1000:8.1f} ms")
+
+        queries = load_kpi_queries()
+        if query_filter:
+            words = [word.lower() for word in query_filter]
+            queries = [(name, sql) for name, sql in queries if any(word in name.lower() for word in words)]
+
+        print(f"\n REQUÊTES KPI ({len(queries)})")
+        print("=" * 40)
+        errors = 0
+        for name, result in db.run_kpi_queries(queries).items():
+            if isinstance(result, str):
+                errors += 1
+                print(f"\n {name}\n   {result}")
+                continue
+            df, elapsed = result
+            print(f"\n {name} - {len(df)} lignes en {elapsed * 1000:.1f} ms")
+            print(df.head(rows).to_string(index=False))
+
+        print(f"\n {len(queries) - errors}/{len(queries)} requêtes exécutées ({db.backend})")
+        if errors:
+            exit(1)
+    finally:
+        db.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Requêtes KPI sur une base locale embarquée")
+    parser.add_argument("--backend", choices=["duckdb", "sqlite"],
+                        help="Moteur embarqué (défaut : duckdb si installé, sinon sqlite)")
+    parser.add_argument("--db", default=":memory:", metavar="CHEMIN",
+                        help="Fichier de la base locale (défaut : en mémoire)")
+    parser.add_argument("--query", nargs="+", metavar="MOT",
+                        help="Exécuter seulement les requêtes dont le nom contient un de ces mots")
+    parser.add_argument("--views", action="store_true",
+                        help="Créer aussi les vues KPI de db/kpi_views.sql (en tables)")
+    parser.add_argument("--competition", nargs="+", type=check_competition, metavar="KEY",
+                        help="Charger uniquement ces compétitions")
+    parser.add_argument("--rows", type=int, default=5,
+                        help="Lignes affichées par requête")
+    args = parser.parse_args()
+    if args.backend == "duckdb" and duckdb is None:
+        parser.error("--backend duckdb : module duckdb absent (pip install duckdb)")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(backend=args.backend, db_path=args.db, query_filter=args.query, views=args.views,
+         competitions=args.competition, rows=args.rows)
@@ -0,0 +1,94 @@
+"""
+Recherche de matchs - magasin binaire memmap
+============================================
+
+Répond aux recherches courantes (équipe, confrontation, édition, tour,
+période) depuis <partition>/processed/match_store/ (pipeline.match_store,
+écrit par l'étape 07c) : colonnes numpy.memmap, sans pandas ni base.
+
+Usage:
+    python src/run_matches.py --team France --edition 1998
+    python src/run_matches.py --team France --opponent Germany
+    python src/run_matches.py --edition 1990 2002 --round Final
+    python src/run_matches.py --from 2022-12-01 --to 2022-12-31
+    python src/run_matches.py --build          # reconstruire depuis la V4
+"""
+
+import argparse
+import sys
+import time
+
+from pipeline.match_store import STORE_DIR, MatchStore, build_match_store
+from pipeline.paths import data_dir
+
+DATA = data_dir()
+IN_MATCHES_V4 = DATA / "processed" / "matches_unified_v4.csv"
+IN_TEAMS_V4 = DATA / "reference" / "teams_v4.csv"
+STORE = DATA / "processed" / STORE_DIR
+
+
+def print_matches(matches):
+    for m in matches:
+        home = "-" if m["home_result"] is None else m["home_result"]
+        away = "-" if m["away_result"] is None else m["away_result"]
+        print(f" {m['id_match']:>5}  {m['edition']}  {m['date'] or '?':<10}  {m['round']:<22} "
+              f"{m['home_team']:>24} {home}-{away} {m['away_team']:<24} {m['city']}")
+
+
+def main(filters, limit=20, build=False):
+    if build:
+        start = time.perf_counter()
+        rows = build_match_store(IN_MATCHES_V4, IN_TEAMS_V4, STORE)
+        print(f" Magasin {STORE}: {rows} matchs en {time.perf_counter() - start:.2f}s")
+        if not any(value is not None for value in filters.values()):
+            return
+
+    start = time.perf_counter()
+    store = MatchStore.open(STORE)
+    try:
+        rows = store.query(**filters)
+    except KeyError as e:
+        print(f" {e.args[0]}")
+        sys.exit(1)
+    matches = store.records(rows[:limit] if limit else rows)
+    elapsed = time.perf_counter() - start
+
+    print_matches(matches)
+    shown = f" ({len(matches)} affichés)" if len(matches) < len(rows) else ""
+    index = ""
+    if filters["team"] is not None or filters["opponent"] is not None:
+        index = " (index des équipes)" if store.team_index is not None else " (parcours, index absent ou périmé)"
+    print(f"\n {len(rows)} matchs{shown} en {elapsed * 1000:.1f} ms{index}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Recherche de matchs dans le magasin memmap")
+    parser.add_argument("--team", help="Équipe (nom de teams_v4 ou team_id)")
+    parser.add_argument("--opponent", help="Adversaire : confrontations avec --team")
+    parser.add_argument("--edition", type=int, nargs="+", metavar="ANNÉE",
+                        help="Édition, ou première et dernière éditions incluses")
+    parser.add_argument("--round", help="Tour (ex. Final, 'Round of 16')")
+    parser.add_argument("--from", dest="date_from", metavar="AAAA-MM-JJ", help="Date minimale incluse")
+    parser.add_argument("--to", dest="date_to", metavar="AAAA-MM-JJ", help="Date maximale incluse")
+    parser.add_argument("--limit", type=int, default=20, help="Matchs affichés (0 = tous)")
+    parser.add_argument("--build", action="store_true",
+                        help="Reconstruire le magasin depuis matches_unified_v4.csv et teams_v4.csv")
+    args = parser.parse_args()
+    if args.edition is not None and len(args.edition) > 2:
+        parser.error("--edition : une année, ou deux (première et dernière)")
+    return args
+
+
+def team_arg(value):
+    """team_id numérique ou nom"""
+    return int(value) if value is not None and value.isdigit() else value
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    edition = None if args.edition is None else (args.edition[0], args.edition[-1])
+    filters = {
+        "team": team_arg(args.team), "opponent": team_arg(args.opponent), "edition": edition,
+        "round": args.round, "date_from": args.date_from, "date_to": args.date_to,
+    }
+    main(filters, limit=args.limit, build=args.build)
@@ -0,0 +1,206 @@
+"""
+Runner du pipeline de transformation (étapes 06 -> 10)
+======================================================
+
+Enchaîne les étapes 06 -> 07 -> 07b -> 07c -> 08 -> 09 -> 10 (chacune dans
+son propre processus, comme un lancement manuel) et s'arrête à la première erreur.
+L'étape 07b calcule les classements des groupes (group_standings.csv),
+l'étape 07c l'index des équipes et le magasin memmap des matchs.
+L'étape 10 précalcule les agrégats du notebook KPI (kpi_aggregates.parquet).
+
+Compétitions (--competition) : chaque compétition est une partition
+indépendante (data/ pour la Coupe du Monde masculine, data/competitions/<clé>/
+pour les autres). Les chaînes 06 -> 10 de plusieurs compétitions tournent en
+parallèle (--jobs) ; rafraîchir une compétition ne retraite pas les autres.
+
+Mode échantillon (--sample) : tire un échantillon stratifié de
+matches_unified_v2.csv (édition x round + lignes signalées par la QA
+équipes), l'écrit dans data/sample/<clé>/processed/ puis exécute toutes les
+étapes avec FIFA_DATA_DIR=data/sample/<clé>. Les artefacts de production
+(data/) ne sont pas modifiés et aucun chargement en base n'est fait.
+
+Les étapes 01 -> 05 (extraction brute et enrichissement) ne sont pas
+rejouées : chaque partition part de sa V2.
+
+Usage:
+    python src/run_pipeline.py
+    python src/run_pipeline.py --sample
+    python src/run_pipeline.py --sample --frac 0.1 --seed 7
+    python src/run_pipeline.py --workers 4 --backend polars
+    python src/run_pipeline.py --competition all --jobs 3
+    python src/run_pipeline.py --competition wc_women
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline.paths import (
+    COMPETITION_ENV,
+    DATA_DIR_ENV,
+    DEFAULT_DATA_DIR,
+    PARTITION_INPUT,
+    available_competitions,
+    check_competition,
+    competition_dir,
+    competition_key,
+)
+from pipeline.sampling import stratified_sample
+
+SRC = Path(__file__).resolve().parent
+SAMPLE_DIR = DEFAULT_DATA_DIR / "sample"
+
+# (script, options transmises)
+STAGES = [
+    ("06_v2-to-v3-clean.py", ["workers", "backend"]),
+    ("07_v3_to_v4.py", ["workers", "backend"]),
+    ("07b_group_standings.py", []),
+    ("07c_match_index.py", []),
+    ("08_v4_to_db.py", ["backend"]),
+    ("09_tables_construction.py", ["backend", "yes"]),
+    ("10_kpi_aggregates.py", []),
+]
+
+
+def prepare_sample(source: Path, target: Path, frac: float, seed: int) -> None:
+    """Écrire le V2 échantillonné de la partition `source` dans `target`/processed/."""
+    print(" ÉCHANTILLON STRATIFIÉ")
+    print("=" * 40)
+    for sub in ("processed", "reference", "clean"):
+        (target / sub).mkdir(parents=True, exist_ok=True)
+
+    df = pd.read_csv(source / PARTITION_INPUT)
+    sample, stats = stratified_sample(df, frac=frac, seed=seed, source=source)
+    sample.to_csv(target / PARTITION_INPUT, index=False)
+
+    print(f" {stats['rows_sample']}/{stats['rows_total']} lignes "
+          f"({stats['strata']} strates -> {stats['rows_strata']} lignes, "
+          f"{stats['flag_collisions']} variantes en collision, {stats['flag_unknown']} équipes inconnues)")
+    print(f" -> {target / PARTITION_INPUT}")
+
+
+def stage_args(options: list[str], args: argparse.Namespace) -> list[str]:
+    argv = []
+    if "workers" in options:
+        argv += ["--workers", str(args.workers)]
+    if "backend" in options:
+        argv += ["--backend", args.backend]
+    if "yes" in options:
+        argv.append("--yes")
+    return argv
+
+
+def run_stages(args: argparse.Namespace, env: dict, capture: bool = False) -> tuple[bool, str]:
+    """Enchaîner 06 -> 10 ; `capture` regroupe la sortie (chaînes en parallèle)."""
+    log = []
+
+    def emit(line: str) -> None:
+        if capture:
+            log.append(line)
+        else:
+            print(line, flush=True)
+
+    for script, options in STAGES:
+        emit(f"\n ÉTAPE {script}")
+        emit("=" * 40)
+        t0 = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, str(SRC / script), *stage_args(options, args)],
+            env=env, capture_output=capture, text=True,
+        )
+        if capture:
+            log.append(result.stdout + result.stderr)
+        if result.returncode != 0:
+            emit(f" Échec de {script} (code {result.returncode})")
+            return False, "\n".join(log)
+        emit(f" {script} terminé en {time.perf_counter() - t0:.2f}s")
+    return True, "\n".join(log)
+
+
+def run_competition(key: str, target: Path, args: argparse.Namespace, capture: bool) -> tuple[bool, str, float]:
+    """Chaîne complète d'une compétition, isolée par son environnement."""
+    env = os.environ.copy()
+    env[COMPETITION_ENV] = key
+    env[DATA_DIR_ENV] = str(target)
+
+    start = time.perf_counter()
+    success, log = run_stages(args, env, capture=capture)
+    return success, log, time.perf_counter() - start
+
+
+def resolve_competitions(requested: list[str] | None) -> list[str]:
+    if not requested:
+        return [competition_key()]
+    if requested == ["all"]:
+        return available_competitions()
+    return [check_competition(key) for key in requested]
+
+
+def main(args: argparse.Namespace) -> bool:
+    start = time.perf_counter()
+    keys = resolve_competitions(args.competition)
+    if not keys:
+        print(" Aucune compétition disponible")
+        return False
+
+    targets = {}
+    for key in keys:
+        if args.sample:
+            targets[key] = Path(args.sample_dir).resolve() / key
+            prepare_sample(competition_dir(key), targets[key], args.frac, args.seed)
+        else:
+            targets[key] = competition_dir(key)
+
+    jobs = min(max(args.jobs, 1), len(keys))
+    if jobs > 1:
+        print(f"\n {len(keys)} compétitions, {jobs} chaînes en parallèle: {', '.join(keys)}")
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {key: pool.submit(run_competition, key, targets[key], args, jobs > 1) for key in keys}
+        for key, future in futures.items():
+            success, log, elapsed = future.result()
+            results[key] = success
+            if log:
+                print(f"\n COMPÉTITION {key}")
+                print("=" * 40)
+                print(log)
+            print(f"\n [{key}] {'OK' if success else 'ÉCHEC'} en {elapsed:.2f}s -> {targets[key]}")
+
+    success = all(results.values())
+    if success:
+        print(f"\n Pipeline terminé en {time.perf_counter() - start:.2f}s")
+    return success
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Enchaîner les étapes 06 -> 10")
+    parser.add_argument("--competition", nargs="+", metavar="KEY",
+                        help="Compétitions à traiter ('all' = toutes les partitions disponibles)")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Chaînes de compétitions exécutées en parallèle")
+    parser.add_argument("--sample", action="store_true",
+                        help="Mode dev : échantillon stratifié, sorties dans --sample-dir/<clé>")
+    parser.add_argument("--sample-dir", default=str(SAMPLE_DIR),
+                        help="Répertoire des sorties du mode échantillon (défaut: data/sample)")
+    parser.add_argument("--frac", type=float, default=0.05,
+                        help="Fraction tirée par strate édition x round (minimum 1 ligne)")
+    parser.add_argument("--seed", type=int, default=42, help="Graine du tirage (déterministe)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Workers des étapes shardées 06/07 (0 = un par cœur)")
+    parser.add_argument("--backend", choices=["pandas", "polars"], default="pandas",
+                        help="Moteur de transformation des étapes 07 -> 09")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    success = main(parse_args())
+    sys.exit(0 if success else 1)
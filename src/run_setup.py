@@ -7,31 +7,78 @@ par 09_tables_construction.py dans la base PostgreSQL.
 
 Usage:
     python src/run_setup.py
+    python src/run_setup.py --stream --queue-size 2
+    python src/run_setup.py --competition wc_women    # recharge une seule compétition
+    python src/run_setup.py --concurrent              # tables en parallèle (pool)
+    python src/run_setup.py --swap                    # staging UNLOGGED puis bascule atomique
+    python src/run_setup.py --incremental             # delta seulement (match_uid + row_hash)
+    python src/run_setup.py --competition wc_men --edition 2022   # une édition (partitions)
 
-Tables chargées depuis data/clean/:
+Après chargement : clés primaires/étrangères, index puis ANALYZE, avec le
+temps de construction et le plan (EXPLAIN) de chaque requête KPI avant/après.
+Dernière étape : vues matérialisées KPI (db/kpi_views.sql) créées ou
+rafraîchies en CONCURRENTLY (lectures des tableaux de bord non bloquées),
+puis fonctions KPI paramétrées par équipe / paire (db/kpi_functions.sql) et
+classements des groupes (<partition>/clean/group_standings.csv, étape 07b)
+dans la table group_standings.
+
+Sans --competition, les tables sont recréées et toutes les compétitions
+disponibles (data/ puis data/competitions/<clé>/) sont chargées. Avec
+--competition, seules les lignes de ces compétitions sont remplacées : clés
+et index restent en place (créés s'ils manquent), seules les partitions
+rechargées sont analysées, les autres compétitions ne sont pas retraitées.
+
+Avec --swap, les tables en service ne sont ni vidées ni verrouillées pendant
+le chargement : tout est construit dans le schéma fifa_staging (tables
+UNLOGGED, autres compétitions recopiées, clés et index), puis mis en service
+par une transaction de renommage de schéma. Les lecteurs ne sont bloqués que
+pendant cette transaction.
+
+Avec --incremental, rien n'est recréé : les lignes nouvelles, modifiées
+(row_hash) et supprimées de chaque compétition sont calculées côté client
+puis appliquées par INSERT ... ON CONFLICT et DELETE ciblés (voir
+database/incremental.py). Les tables doivent avoir été créées par un
+chargement complet du schéma courant (colonnes match_uid / row_hash).
+
+Les tables par match sont partitionnées par compétition puis par édition.
+Avec --edition, seules les partitions de cette édition sont remplacées :
+chargées à part puis échangées par DETACH / ATTACH PARTITION dans une
+transaction courte (ids conservés, nouvelles équipes ajoutées).
+
+Tables chargées depuis <partition>/clean/:
     - teams_reference_normalized.csv
     - matches_normalized.csv
     - home_stats_normalized.csv
     - away_stats_normalized.csv
+    - team_match_normalized.csv
 """
 
+import argparse
+import asyncio
+from collections import Counter
 import pandas as pd
 from pathlib import Path
-from database.setup_database import DatabaseManager
+from sqlalchemy import text
+from database.setup_database import STAGING_SCHEMA, STANDINGS_FILE, DatabaseManager, add_edition, staging_table
+from database.checksums import client_checksums, compare_checksums, server_checksums
+from database.incremental import STATE_COLUMNS, plan_delta, plan_edition, remap_ids
+from database.kpi_queries import explain_queries, load_kpi_queries
+from pipeline.paths import available_competitions, check_competition, competition_dir, data_dir
 
-def load_normalized_tables():
-    """Charger les 4 tables normalisées depuis data/clean/"""
+def load_normalized_tables(data_path=None):
+    """Charger les tables normalisées depuis <partition>/clean/"""
     print(" CHARGEMENT TABLES NORMALISÉES")
     print("=" * 40)
 
-    data_path = Path("data/clean")
+    data_path = Path(data_path) if data_path else data_dir() / "clean"
 
     # Dictionnaire des fichiers à charger
     files_to_load = {
         'teams_reference': 'teams_reference_normalized.csv',
         'matches_normalized': 'matches_normalized.csv',
         'home_stats': 'home_stats_normalized.csv',
-        'away_stats': 'away_stats_normalized.csv'
+        'away_stats': 'away_stats_normalized.csv',
+        'team_match': 'team_match_normalized.csv'
     }
 
     loaded_data = {}
@@ -54,34 +101,152 @@ def validate_database(db_manager):
     print("\n VALIDATION FINALE")
     print("=" * 40)
 
-    queries = {
-        "Équipes": "SELECT COUNT(*) FROM teams_reference",
-        "Matchs": "SELECT COUNT(*) FROM matches_normalized",
-        "Stats home": "SELECT COUNT(*) FROM home_stats",
-        "Stats away": "SELECT COUNT(*) FROM away_stats"
+    tables = {
+        "Équipes": "teams_reference",
+        "Matchs": "matches_normalized",
+        "Stats home": "home_stats",
+        "Stats away": "away_stats",
+        "Équipe x match": "team_match"
     }
+    # Un seul aller-retour : les 4 COUNT en sous-requêtes scalaires
+    query = "SELECT " + ", ".join(f"(SELECT COUNT(*) FROM {table})" for table in tables.values())
 
     try:
         with db_manager.engine.connect() as conn:
-            for name, query in queries.items():
-                from sqlalchemy import text
-                count = conn.execute(text(query)).scalar()
-                print(f" {name}: {count}")
+            counts = conn.execute(text(query)).one()
+        for name, count in zip(tables, counts):
+            print(f" {name}: {count}")
         return True
     except Exception as e:
         print(f" Erreur validation: {e}")
         return False
 
-def main():
+def source_checksums(db_manager, normalized_data, remap=False):
+    """Sommes de contrôle client des tables sources -> {compétition: {table: DataFrame}}
+
+    remap  : ids des sources ramenés aux ids en base (chargements incrémental / édition)
+    """
+    checksums = {}
+    for key, tables in normalized_data.items():
+        if remap:
+            tables = remap_ids(tables, db_manager.fetch_state(key, STATE_COLUMNS))
+        checksums[key] = {table_name: client_checksums(table_name, df) for table_name, df in tables.items()}
+    return checksums
+
+def verify_checksums(db_manager, checksums, edition=None):
+    """Sommes de contrôle par édition : client (source_checksums ou lots streamés) vs base
+
+    Un parcours par table côté base.
+    edition: ne comparer que cette édition (rechargement d'une seule édition)
+    """
+    print("\n VÉRIFICATION PAR SOMMES DE CONTRÔLE")
+    print("=" * 40)
+
+    ok = True
+    with db_manager.engine.connect() as conn:
+        for key, tables in checksums.items():
+            for table_name, client in tables.items():
+                editions = [edition] if edition and table_name != 'teams_reference' else None
+                bad = compare_checksums(client, server_checksums(conn, table_name, key), editions)
+                if bad.empty:
+                    print(f"✅ {table_name} [{key}]: sommes de contrôle identiques")
+                    continue
+                ok = False
+                print(f"❌ {table_name} [{key}]: {len(bad)} édition(s) différente(s)")
+                for row in bad.itertuples():
+                    print(f"     édition {row.edition or '-'}: {row.rows_source} lignes source, "
+                          f"{row.rows_base} en base, somme {'identique' if row.checksum_ok else 'différente'}")
+    return ok
+
+def post_load(db_manager, schema=None):
+    """Étape post-chargement : clés, index, ANALYZE + plans des requêtes KPI avant/après"""
+    print("\n POST-CHARGEMENT : CLÉS, INDEX, ANALYZE")
+    print("=" * 40)
+
+    queries = load_kpi_queries()
+    before = explain_queries(db_manager.engine, queries, schema=schema)
+    timings = db_manager.build_post_load_objects(schema=schema)
+    for name, seconds in timings.items():
+        print(f" {name}: {seconds:.3f}s")
+    print(f" Total: {sum(timings.values()):.3f}s")
+    after = explain_queries(db_manager.engine, queries, schema=schema)
+
+    print("\n PLANS KPI (coût estimé avant -> après)")
+    print("=" * 40)
+    for name, _ in queries:
+        if isinstance(before[name], str) or isinstance(after[name], str):
+            print(f" - {name}: {after[name]}")
+            continue
+        (cost_before, nodes_before), (cost_after, nodes_after) = before[name], after[name]
+        print(f" - {name}: {cost_before:.1f} -> {cost_after:.1f}")
+        if nodes_before != nodes_after:
+            print(f"     avant: {', '.join(nodes_before)}")
+            print(f"     après: {', '.join(nodes_after)}")
+    return timings
+
+def refresh_views(db_manager, schema=None):
+    """Dernière étape : vues matérialisées KPI créées ou rafraîchies"""
+    print("\n VUES MATÉRIALISÉES KPI")
+    print("=" * 40)
+    timings = db_manager.refresh_kpi_views(schema=schema)
+    for view, (action, seconds) in timings.items():
+        print(f" {view}: {action} en {seconds:.3f}s")
+    return timings
+
+def incremental_load(db_manager, competition, tables):
+    """Delta d'une compétition (nouvelles / modifiées / supprimées) appliqué en une transaction"""
+    state = db_manager.fetch_state(competition, STATE_COLUMNS)
+    deltas, stats = plan_delta(tables, state)
+    db_manager.apply_delta(competition, deltas)
+
+    for table_name, s in stats.items():
+        print(f"✅ {table_name} [{competition}]: {s['inserted']} insérées, {s['updated']} modifiées, "
+              f"{s['deleted']} supprimées, {s['unchanged']} inchangées")
+    return {table_name: len(upserts) + len(deleted) for table_name, (upserts, deleted) in deltas.items()}
+
+def edition_load(db_manager, competition, tables, edition):
+    """Une édition d'une compétition : nouvelles équipes upsertées, partitions de l'édition échangées"""
+    state = db_manager.fetch_state(competition, STATE_COLUMNS)
+    teams_delta, edition_tables = plan_edition(tables, state, edition)
+    db_manager.apply_delta(competition, teams_delta)
+    loaded = db_manager.replace_edition(competition, edition, edition_tables)
+
+    print(f"✅ teams_reference [{competition}]: {len(teams_delta['teams_reference'][0])} équipes ajoutées ou modifiées")
+    for table_name, n in loaded.items():
+        print(f"✅ {table_name} [{competition} {edition}]: {n} lignes (partition remplacée)")
+    return {'teams_reference': len(teams_delta['teams_reference'][0]), **loaded}
+
+def load_standings(db_manager, keys):
+    """Classements des groupes (<partition>/clean/group_standings.csv, étape 07b) -> table group_standings"""
+    for key in keys:
+        path = competition_dir(key) / "clean" / STANDINGS_FILE
+        if not path.exists():
+            print(f" Classements des groupes ({key}): {STANDINGS_FILE} absent (étape 07b non exécutée)")
+            continue
+        print(f" Classements des groupes ({key}): {db_manager.load_group_standings(path, key)} lignes")
+
+def main(stream=False, queue_size=2, competitions=None, concurrent=False, skip_post_load=False, swap=False,
+         incremental=False, edition=None):
     """Orchestrateur principal - Version optimisée"""
     print(" SETUP BASE FIFA WORLD CUP - TABLES PRÉEXISTANTES")
     print("=" * 55)
 
+    keys = competitions or available_competitions()
+    # Remplacement par compétition, clés et index en place
+    partial = bool(competitions) and not (swap or incremental or edition)
+    print(f" Compétitions: {', '.join(keys)}")
+
     # Charger toutes les tables normalisées déjà créées
-    normalized_data = load_normalized_tables()
-    if normalized_data is None:
-        print(" Impossible de charger les tables normalisées")
-        exit(1)
+    # (en mode streaming, les lots sont produits à la volée depuis la V4)
+    normalized_data = {}
+    if not stream:
+        for key in keys:
+            normalized_data[key] = load_normalized_tables(competition_dir(key) / "clean")
+            if normalized_data[key] is None:
+                print(f" Impossible de charger les tables normalisées ({key})")
+                exit(1)
+            # Clé de partition des tables par match
+            normalized_data[key] = add_edition(normalized_data[key])
 
     # Setup base de données
     print("\n SETUP BASE DE DONNÉES")
@@ -93,19 +258,95 @@ def main():
         # Connexion
         db_manager.connect_database()
 
-        # Créer structure
-        db_manager.create_simple_tables()
+        if incremental or edition:
+            # Tables conservées ; clés uniques nécessaires aux ON CONFLICT
+            db_manager.create_simple_tables(drop=False)
+            db_manager.build_post_load_objects(only_missing=True)
+        elif swap:
+            # Tables en service intactes : chargement dans le schéma de staging
+            db_manager.create_staging_tables()
+            if competitions:
+                kept = db_manager.copy_live_rows(exclude=keys)
+                print(f" Compétitions conservées recopiées: {sum(kept.values())} lignes")
+        elif partial:
+            # Autres compétitions intactes : ni DROP, ni reconstruction de leurs clés et index
+            db_manager.create_simple_tables(drop=False)
+            db_manager.build_post_load_objects(only_missing=True)
+        else:
+            db_manager.create_simple_tables(drop=True)
+            # Clés et index retirés pendant le chargement, recréés ensuite
+            db_manager.drop_post_load_objects()
 
-        # Charger chaque table
-        counts = {}
-        for table_name, df in normalized_data.items():
-            counts[table_name] = db_manager.load_single_table(table_name, df)
+        def target(table_name):
+            return staging_table(table_name) if swap else table_name
 
-        # Validation finale
-        if validate_database(db_manager):
+        # Charger chaque compétition indépendamment
+        counts = Counter()
+        streamed = {}   # sommes de contrôle des lots streamés, par compétition
+        for key in keys:
+            print(f"\n COMPÉTITION {key}")
+            if edition:
+                counts.update(edition_load(db_manager, key, normalized_data[key], edition))
+            elif incremental:
+                counts.update(incremental_load(db_manager, key, normalized_data[key]))
+            elif stream:
+                from pipeline.streaming import stream_load
+                partition = competition_dir(key)
+                if not swap:
+                    db_manager.delete_competition(key)
+                streamed[key] = {}
+                counts.update(asyncio.run(stream_load(
+                    db_manager, queue_size=queue_size,
+                    in_matches_v4=partition / "processed" / "matches_unified_v4.csv",
+                    in_teams_v4=partition / "reference" / "teams_v4.csv",
+                    schema=STAGING_SCHEMA if swap else None,
+                    checksums=streamed[key],
+                )))
+            elif concurrent:
+                # Tables indépendantes : une connexion du pool chacune
+                loaded = db_manager.load_tables_concurrently(
+                    {target(table_name): df for table_name, df in normalized_data[key].items()}, key,
+                    keys_in_place=partial)
+                counts.update(dict(zip(normalized_data[key], loaded.values())))
+            else:
+                if partial:
+                    # FK en place : lignes supprimées des tables filles vers teams_reference
+                    db_manager.delete_competition(key)
+                for table_name, df in normalized_data[key].items():
+                    counts[table_name] += db_manager.replace_competition(target(table_name), key, df)
+
+        if partial and not skip_post_load:
+            print(f"\n ANALYZE des partitions rechargées: {db_manager.analyze_competitions(keys):.3f}s")
+        elif not (skip_post_load or incremental or edition):
+            post_load(db_manager, schema=STAGING_SCHEMA if swap else None)
+
+        # Vues KPI : en staging avant la bascule (mises en service avec les tables)
+        refresh_views(db_manager, schema=STAGING_SCHEMA if swap else None)
+
+        if swap:
+            print("\n BASCULE STAGING -> SERVICE")
+            print("=" * 40)
+            print(f" Tables mises en service en {db_manager.swap_staging() * 1000:.1f} ms (verrou lecteurs)")
+
+        # Fonctions KPI par équipe / paire (corps lus à l'exécution : créées hors staging)
+        print(f" Fonctions KPI: {', '.join(db_manager.create_kpi_functions())}")
+
+        # Classements des groupes : table dérivée remplacée par compétition (hors staging)
+        load_standings(db_manager, keys)
+
+        # Nouvelle version des données : résultats de DatabaseManager.query en cache périmés
+        print(f" Version des données: {db_manager.bump_data_version()}")
+
+        # Validation finale (sommes de contrôle : tables sources, ou lots calculés pendant le streaming)
+        checksums = streamed if stream else source_checksums(db_manager, normalized_data,
+                                                             remap=incremental or bool(edition))
+        verified = verify_checksums(db_manager, checksums, edition=edition)
+        if validate_database(db_manager) and verified:
             print("\n SETUP TERMINÉ AVEC SUCCÈS !")
-            print(f" Chargement: {counts['teams_reference']} équipes, {counts['matches_normalized']} matchs")
-            print(f" Stats: {counts['home_stats']} home + {counts['away_stats']} away")
+            print(f" {'Lignes modifiées' if incremental or edition else 'Chargement'}: "
+                  f"{counts['teams_reference']} équipes, {counts['matches_normalized']} matchs")
+            print(f" Stats: {counts['home_stats']} home + {counts['away_stats']} away, "
+                  f"{counts['team_match']} équipe x match")
             print(" Base PostgreSQL prête pour requêtes KPI !")
         else:
             print("  Setup terminé mais validation échouée")
@@ -114,5 +355,33 @@ def main():
         print(f" Erreur setup: {e}")
         exit(1)
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Setup base PostgreSQL FIFA World Cup")
+    parser.add_argument("--stream", action="store_true",
+                        help="Mode streaming asyncio : transformation 08/09 et chargement par édition en recouvrement")
+    parser.add_argument("--queue-size", type=int, default=2,
+                        help="Taille des files bornées entre phases (mode streaming)")
+    parser.add_argument("--concurrent", action="store_true",
+                        help="Charger les tables en parallèle sur des connexions du pool")
+    parser.add_argument("--skip-post-load", action="store_true",
+                        help="Ne pas créer clés/index ni lancer ANALYZE après chargement")
+    parser.add_argument("--swap", action="store_true",
+                        help="Charger dans un schéma de staging UNLOGGED puis basculer (lecteurs non bloqués)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Appliquer seulement le delta (nouvelles / modifiées / supprimées) par match_uid")
+    parser.add_argument("--competition", nargs="+", type=check_competition, metavar="KEY",
+                        help="Recharger uniquement ces compétitions (les autres restent en base)")
+    parser.add_argument("--edition", type=int, metavar="ANNÉE",
+                        help="Recharger une seule édition (échange de partitions DETACH / ATTACH)")
+    args = parser.parse_args()
+    if args.incremental and (args.stream or args.swap or args.concurrent):
+        parser.error("--incremental ne se combine pas avec --stream, --swap ou --concurrent")
+    if args.edition and (args.stream or args.swap or args.concurrent or args.incremental):
+        parser.error("--edition ne se combine pas avec --stream, --swap, --concurrent ou --incremental")
+    return args
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(stream=args.stream, queue_size=args.queue_size, competitions=args.competition,
+         concurrent=args.concurrent, skip_post_load=args.skip_post_load, swap=args.swap,
+         incremental=args.incremental, edition=args.edition)
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Les scripts s'exécutent depuis src/ (python src/xx.py) : mêmes imports pour les tests
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
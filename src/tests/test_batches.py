@@ -0,0 +1,72 @@
+from collections import namedtuple
+from datetime import date
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from database.batches import arrow_batch, frame_batch
+from database.setup_database import DatabaseManager
+
+Column = namedtuple("Column", "name type_code")
+
+# edition varchar, goals integer, ratio numeric, date date
+DESCRIPTION = [Column("edition", 1043), Column("goals", 23), Column("ratio", 1700), Column("date", 1082)]
+ROWS = [("2018", 4, Decimal("2.50"), date(2018, 7, 15)), ("2022", None, None, None)]
+
+
+def test_frame_batch_types_come_from_postgres():
+    df = frame_batch(ROWS, DESCRIPTION)
+    assert df.dtypes.astype(str).tolist() == ["string", "Int32", "float64", "datetime64[ns]"]
+    assert df["goals"].isna().tolist() == [False, True]
+    assert df["ratio"].iloc[0] == 2.5
+
+
+def test_empty_and_null_batches_keep_dtypes():
+    full = frame_batch(ROWS, DESCRIPTION).dtypes
+    assert frame_batch([], DESCRIPTION).dtypes.equals(full)
+    assert frame_batch([(None, None, None, None)], DESCRIPTION).dtypes.equals(full)
+
+
+def test_arrow_batch_schema():
+    pytest.importorskip("pyarrow")
+    # json : type inconnu -> texte
+    batch = arrow_batch([(*row, {"a": 1}) for row in ROWS], DESCRIPTION + [Column("other", 114)])
+    assert [str(t) for t in batch.schema.types] == ["string", "int32", "double", "date32[day]", "string"]
+    assert batch.num_rows == 2 and arrow_batch([], DESCRIPTION).num_rows == 0
+
+
+class FakeCursor:
+    """Curseur serveur : fetchmany sur une liste de lignes"""
+
+    description = [Column("id_match", 23)]
+
+    def __init__(self, n):
+        self.rows = [(i,) for i in range(n)]
+        self.fetches = 0
+
+    def execute(self, sql, params):
+        pass
+
+    def fetchmany(self, size):
+        self.fetches += 1
+        out, self.rows = self.rows[:size], self.rows[size:]
+        return out
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.mark.parametrize("n, sizes", [(0, [0]), (5, [5]), (10, [5, 5]), (11, [5, 5, 1])])
+def test_cursor_batches_sizes(n, sizes):
+    manager = DatabaseManager.__new__(DatabaseManager)
+    manager.engine = create_engine("postgresql://")
+    cursor = FakeCursor(n)
+    raw = type("Raw", (), {"cursor": lambda self, name: cursor})()
+    batches = list(manager._cursor_batches(raw, "SELECT id_match FROM matches_normalized", None, 5, arrow=False))
+    assert [len(batch) for batch in batches] == sizes
+    assert all(isinstance(batch, pd.DataFrame) for batch in batches)
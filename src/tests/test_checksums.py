@@ -0,0 +1,48 @@
+import hashlib
+
+import pandas as pd
+
+from database.checksums import HASH_HEX_DIGITS, NO_EDITION, client_checksums, compare_checksums
+
+TEAM_MATCH = pd.DataFrame({
+    "id_match": [1, 1, 2, 2],
+    "id_team": [10, 20, 30, 10],
+    "is_home": [True, False, True, False],
+    "goals_for": [2.0, 1.0, None, None],
+    "goals_against": [1.0, 2.0, None, None],
+    "goal_diff": [1.0, -1.0, None, None],
+    "outcome": ["W", "L", None, None],
+    "edition": [2018, 2018, 2022, 2022],
+    "competition": "wc_men",
+    "match_uid": ["a", "a", "b", "b"],
+})
+
+
+def test_row_text_matches_postgres_cast():
+    # Texte attendu de la ligne côté serveur : "col"::text, NULL -> \N, séparateur \x1f
+    sums = client_checksums("team_match", TEAM_MATCH.iloc[:1])
+    row = "\x1f".join(["1", "10", "true", "2", "1", "1", "W", "2018", "wc_men", "a"])
+    assert sums["checksum"].tolist() == [int(hashlib.md5(row.encode()).hexdigest()[:HASH_HEX_DIGITS], 16)]
+
+
+def test_checksums_ignore_row_order():
+    sums = client_checksums("team_match", TEAM_MATCH)
+    assert sums["edition"].tolist() == ["2018", "2022"] and sums["rows"].tolist() == [2, 2]
+    shuffled = client_checksums("team_match", TEAM_MATCH.iloc[[3, 1, 0, 2]].reset_index(drop=True))
+    assert compare_checksums(sums, shuffled).empty
+
+
+def test_compare_reports_changed_and_missing_editions():
+    source = client_checksums("team_match", TEAM_MATCH)
+    loaded = client_checksums("team_match", TEAM_MATCH.iloc[:2].assign(goals_for=[3.0, 1.0]))
+    bad = compare_checksums(source, loaded)
+    assert bad["edition"].tolist() == ["2018", "2022"]
+    assert bad["checksum_ok"].tolist() == [False, False]
+    assert bad["rows_base"].isna().tolist() == [False, True]
+    # Rechargement d'une seule édition : les autres ne sont pas comparées
+    assert compare_checksums(source, loaded, editions=[2022])["edition"].tolist() == ["2022"]
+
+
+def test_unpartitioned_table_is_one_group():
+    teams = pd.DataFrame({"id_team": [10, 20], "Team_name": ["France", "Croatia"], "competition": "wc_men"})
+    assert client_checksums("teams_reference", teams)["edition"].tolist() == [NO_EDITION]
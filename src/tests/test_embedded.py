@@ -0,0 +1,27 @@
+import pytest
+
+from database.embedded import EmbeddedDatabaseManager, positional_sql
+
+
+def test_named_params_become_positional():
+    sql, values = positional_sql(
+        "SELECT ':skip', \"a:b\", x::text FROM t WHERE competition = :c AND (edition = :e OR :e IS NULL)",
+        {"c": "wc_men", "e": "2018"})
+    assert sql == "SELECT ':skip', \"a:b\", x::text FROM t WHERE competition = ? AND (edition = ? OR ? IS NULL)"
+    assert values == ("wc_men", "2018", "2018")
+    with pytest.raises(KeyError):
+        positional_sql("SELECT :missing", {})
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "duckdb"])
+def test_query_takes_named_params_like_postgres(backend):
+    if backend == "duckdb":
+        pytest.importorskip("duckdb")
+    db = EmbeddedDatabaseManager(backend=backend)
+    db.connect_database()
+    db.execute("CREATE TABLE t (competition VARCHAR, edition VARCHAR)")
+    db.execute("INSERT INTO t VALUES ('wc_men', '2018'), ('wc_men', '2022'), ('wc_women', '2019')")
+    df = db.query("SELECT edition FROM t WHERE competition = :c ORDER BY edition", {"c": "wc_men"})
+    assert df["edition"].tolist() == ["2018", "2022"]
+    assert db.query("SELECT COUNT(*) AS n FROM t")["n"].tolist() == [3]
+    db.close()
@@ -0,0 +1,89 @@
+import pandas as pd
+
+from database.incremental import STATE_COLUMNS, diff_table, plan_delta, plan_edition
+from database.setup_database import add_edition, with_row_hash
+
+MATCHES = [
+    # (match_uid, edition, domicile, extérieur, buts domicile, buts extérieur)
+    ("a", 2018, "France", "Croatia", 4, 2),
+    ("b", 2018, "Belgium", "England", 2, 0),
+    ("c", 2022, "Argentina", "France", 3, 3),
+    ("d", 2022, "Croatia", "Morocco", 2, 1),
+]
+
+
+def normalized(matches):
+    """Matchs -> tables normalisées, ids recalculés comme à chaque run de l'étape 09"""
+    names = sorted({team for match in matches for team in match[2:4]})
+    team_id = {name: i + 1 for i, name in enumerate(names)}
+    rows = sorted(matches, key=lambda m: (m[1], m[0]))
+    teams = pd.DataFrame({"id_team": list(team_id.values()), "Team_name": names, "competition": "wc_men"})
+    games, home, away, team_match = [], [], [], []
+    for id_match, (uid, edition, h, a, hg, ag) in enumerate(rows, start=1):
+        result = team_id[h] if hg > ag else team_id[a] if ag > hg else 0
+        games.append((id_match, result, edition, "wc_men", uid))
+        home.append((id_match, team_id[h], hg, ag, "wc_men", uid))
+        away.append((id_match, team_id[a], ag, hg, "wc_men", uid))
+        team_match += [(id_match, team_id[h], True, hg, "wc_men", uid), (id_match, team_id[a], False, ag, "wc_men", uid)]
+    stats = ["id_match", "id_team", "Number_of_goals_scored", "Number_of_goals_conceded", "competition", "match_uid"]
+    return add_edition({
+        "teams_reference": teams,
+        "matches_normalized": pd.DataFrame(games, columns=["id_match", "result", "edition", "competition", "match_uid"]),
+        "home_stats": pd.DataFrame(home, columns=stats),
+        "away_stats": pd.DataFrame(away, columns=stats),
+        "team_match": pd.DataFrame(team_match, columns=["id_match", "id_team", "is_home", "goals_for",
+                                                        "competition", "match_uid"]),
+    })
+
+
+def state_of(tables):
+    """État en base après chargement des tables (row_hash calculé au chargement, edition en VARCHAR)"""
+    state = {}
+    for table_name, df in tables.items():
+        df = with_row_hash(df)[STATE_COLUMNS[table_name]]
+        state[table_name] = df.assign(edition=df["edition"].astype(str)) if "edition" in df else df
+    return state
+
+
+def test_unchanged_partition_has_empty_delta():
+    tables = normalized(MATCHES)
+    deltas, stats = plan_delta(tables, state_of(tables))
+    assert all(upserts.empty and deleted.empty for upserts, deleted in deltas.values())
+    assert stats["matches_normalized"] == {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 4}
+
+
+def test_delta_ignores_renumbered_ids():
+    state = state_of(normalized(MATCHES))
+    # Nouveau match en tête de 2018 (tous les id_match décalés), nouvelle équipe
+    # (ids d'équipes décalés), score corrigé en 2022, match "b" retiré
+    changed = [("0", 2018, "Australia", "Denmark", 1, 1), *MATCHES[:1], ("c", 2022, "Argentina", "France", 3, 2),
+               MATCHES[3]]
+    deltas, stats = plan_delta(normalized(changed), state)
+
+    assert stats["matches_normalized"] == {"inserted": 1, "updated": 1, "deleted": 1, "unchanged": 2}
+    assert stats["teams_reference"] == {"inserted": 2, "updated": 0, "deleted": 2, "unchanged": 4}
+    upserts, deleted = deltas["matches_normalized"]
+    assert sorted(upserts["match_uid"]) == ["0", "c"]
+    assert deleted["match_uid"].tolist() == ["b"]
+    # Ids déjà en base conservés, nouvelles clés à partir de max + 1
+    assert dict(zip(upserts["match_uid"], upserts["id_match"])) == {"0": 5, "c": 3}
+    # team_match : seule la ligne de la France (buts marqués corrigés) change
+    assert stats["team_match"] == {"inserted": 2, "updated": 1, "deleted": 2, "unchanged": 5}
+
+
+def test_diff_table_compares_edition_as_text():
+    new = pd.DataFrame({"match_uid": ["a", "b"], "edition": [2018, 2022], "goals": [1, 2]})
+    existing = with_row_hash(new).assign(edition=["2018", "2022"])
+    upserts, deleted, stats = diff_table(new, existing, ["match_uid", "edition"])
+    assert upserts.empty and deleted.empty and stats["unchanged"] == 2
+
+
+def test_plan_edition_keeps_other_editions():
+    state = state_of(normalized(MATCHES))
+    changed = [*MATCHES[:3], ("d", 2022, "Croatia", "Morocco", 0, 0), ("e", 2022, "Japan", "Spain", 2, 1)]
+    teams_delta, edition_tables = plan_edition(normalized(changed), state, 2022)
+
+    upserts, deleted = teams_delta["teams_reference"]
+    assert sorted(upserts["Team_name"]) == ["Japan", "Spain"] and deleted.empty
+    assert edition_tables["matches_normalized"]["match_uid"].tolist() == ["c", "d", "e"]
+    assert set(edition_tables["home_stats"]["edition"]) == {2022}
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.kpi_cube import KPI_ANSWERS, KpiCube, build_cube
+
+TEAMS = pd.DataFrame({"id_team": [1, 2, 3], "Team_name": ["Brazil", "France", "Italy"]})
+
+MATCHES = [
+    # (id_match, édition, tour, tournoi final, domicile, extérieur, buts domicile, buts extérieur)
+    (1, 2018, "Qualification", False, 1, 3, 5, 0),
+    (2, 2018, "Group", True, 1, 2, 2, 2),
+    (3, 2018, "Final", True, 2, 3, 4, 1),
+    (4, 2022, "Group", True, 3, 1, 0, 1),
+    (5, 2022, "Final", True, 2, 1, None, None),
+]
+
+
+def tables(matches):
+    """Matchs -> (matches, team_match) au format des tables normalisées"""
+    games = pd.DataFrame([m[:4] for m in matches], columns=["id_match", "edition", "round", "is_final"])
+    rows = []
+    for id_match, _, _, _, home, away, hg, ag in matches:
+        for team, is_home, gf, ga in ((home, True, hg, ag), (away, False, ag, hg)):
+            outcome = None if gf is None else "W" if gf > ga else "L" if gf < ga else "D"
+            rows.append((id_match, team, is_home, gf, ga, outcome))
+    team_match = pd.DataFrame(rows, columns=["id_match", "id_team", "is_home", "goals_for", "goals_against", "outcome"])
+    return games, team_match.astype({"goals_for": float, "goals_against": float})
+
+
+@pytest.fixture
+def cube():
+    return build_cube(*tables(MATCHES), TEAMS)[0]
+
+
+def test_rollup_by_team_and_edition(cube):
+    assert cube.rollup("played", by="team").tolist() == [0, 4, 3, 3]
+    # Tournoi final : qualification exclue ; match 5 joué sans score
+    assert cube.rollup("wins", by="team", final=True).tolist() == [0, 1, 1, 0]
+    assert cube.rollup("scored", by="team", final=True).tolist() == [0, 2, 2, 2]
+    assert cube.rollup("goals_for", by="edition", final=True).tolist() == [9, 1]
+    assert int(cube.rollup("played", final=True, side="home")) == 4
+
+
+def test_rollup_by_two_axes_keeps_order(cube):
+    by_team = cube.rollup("goals_for", by=("team", "edition"))
+    assert by_team.shape == (4, 2)
+    assert np.array_equal(by_team, cube.rollup("goals_for", by=("edition", "team")).T)
+    assert by_team[cube.team_id("Brazil")].tolist() == [7, 1]
+
+
+def test_max_measures_roll_up_by_max(cube):
+    assert cube.rollup("max_goals_for", by="team").tolist() == [0, 5, 4, 1]
+    assert cube.rollup("max_goals_for", by="team", final=True).tolist() == [0, 2, 4, 1]
+    assert int(cube.rollup("max_goals_against", edition=2022)) == 1
+
+
+def test_rollup_is_memoized_and_read_only(cube):
+    wins = cube.rollup("wins", by="team", final=True)
+    assert cube.rollup("wins", by="team", final=True) is wins
+    with pytest.raises(ValueError):
+        wins[0] = 1
+
+
+def test_select_by_team_name(cube):
+    france = cube.select(team="France", final=True)
+    assert france.team_names.tolist() == ["France"]
+    assert france.rounds.tolist() == ["Group", "Final"]
+    assert france.rollup("played", by="edition").tolist() == [2, 1]
+    with pytest.raises(KeyError, match="Spain"):
+        cube.select(team="Spain")
+
+
+def test_kpi_answers(cube):
+    assert KPI_ANSWERS["Nombre total de victoires par équipe"](cube) == [("Brazil", 1), ("France", 1)]
+    assert KPI_ANSWERS["Équipes ayant perdu le plus de finales"](cube) == [("Italy", 1)]
+    assert KPI_ANSWERS["Équipe ayant marqué le plus de buts dans un seul match"](cube) == [("Brazil", 5)]
+
+
+def test_incremental_build_reuses_unchanged_editions(cube, tmp_path):
+    cube.save(tmp_path / "cube.npz")
+    previous = KpiCube.load(tmp_path / "cube.npz")
+    # 2022 : score du match 5 renseigné ; 2026 ajoutée
+    changed = [*MATCHES[:4], (5, 2022, "Final", True, 2, 1, 3, 1), (6, 2026, "Group", True, 3, 2, 1, 0)]
+    rebuilt, stats = build_cube(*tables(changed), TEAMS, previous=previous)
+
+    assert stats == {"computed": [2022, 2026], "reused": [2018], "removed": []}
+    full, _ = build_cube(*tables(changed), TEAMS)
+    assert np.array_equal(rebuilt.values, full.values)
@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+
+from pipeline.match_store import STORE_DIR, MatchStore, build_match_store
+from pipeline.team_index import INDEX_DIR, build_team_index, index_version, write_team_index
+
+TEAMS = pd.DataFrame({"team_id": [1, 2, 3], "team_canonical": ["Brazil", "France", "Italy"]})
+
+MATCHES = pd.DataFrame([
+    # (id_match, édition, date, tour, ville, domicile, extérieur, buts domicile, buts extérieur, résultat)
+    (1, 1998, "1998-06-10", "Group", "Paris", 1, 2, 2, 1, "1"),
+    (2, 1998, "1998-07-12", "Final", "Saint-Denis", 2, 1, 3, 0, "2"),
+    (3, 2006, "2006-07-01", "Quarter-finals", "Frankfurt", 1, 2, 0, 1, "2"),
+    (4, 2006, "2006-07-09", "Final", "Berlin", 3, 2, 1, 1, "draw"),
+    (5, 2006, "", "Group", "", 3, 1, None, None, "draw"),
+], columns=["id_match", "edition", "date", "round", "city", "home_team_id", "away_team_id",
+            "home_result", "away_result", "result"]).astype({"home_result": "Int64", "away_result": "Int64"}).assign(
+    competition="wc_men")
+
+
+@pytest.fixture(params=[True, False], ids=["index", "masque"])
+def store(request, tmp_path):
+    """Magasin dans <partition>/processed, avec ou sans index des équipes voisin"""
+    matches_csv, teams_csv = tmp_path / "processed" / "matches_unified_v4.csv", tmp_path / "reference" / "teams_v4.csv"
+    for df, path in ((MATCHES, matches_csv), (TEAMS, teams_csv)):
+        path.parent.mkdir(exist_ok=True)
+        df.to_csv(path, index=False)
+    build_match_store(matches_csv, teams_csv, tmp_path / "processed" / STORE_DIR)
+    if request.param:
+        write_team_index(build_team_index(MATCHES, TEAMS), tmp_path / "reference" / INDEX_DIR,
+                         index_version(matches_csv, teams_csv))
+    store = MatchStore.open(tmp_path / "processed" / STORE_DIR)
+    assert (store.team_index is not None) == request.param
+    return store
+
+
+def ids(store, **filters):
+    return store.column("id_match")[store.query(**filters)].tolist()
+
+
+def test_team_and_pair_filters(store):
+    assert ids(store, team="France") == [1, 2, 3, 4]
+    assert ids(store, opponent="Italy") == [4, 5]
+    assert ids(store, team="Brazil", opponent="France") == [1, 2, 3]
+    assert ids(store, team=3, opponent="France") == [4]
+    assert ids(store, team="Brazil", opponent="Brazil") == []
+
+
+def test_edition_round_and_date_filters(store):
+    assert ids(store, edition=2006) == [3, 4, 5]
+    assert ids(store, edition=(1990, 2002)) == [1, 2]
+    assert ids(store, team="France", edition=2006, round="Final") == [4]
+    # Filtre de date : le match sans date est exclu
+    assert ids(store, date_from="1998-07-01") == [2, 3, 4]
+    assert ids(store, team="Brazil", date_to="2006-07-01") == [1, 2, 3]
+    assert ids(store) == [1, 2, 3, 4, 5]
+
+
+def test_unknown_values_raise(store):
+    with pytest.raises(KeyError, match="Semi-finals"):
+        store.query(round="Semi-finals")
+    with pytest.raises(KeyError, match="Germany"):
+        store.query(team="Germany")
+
+
+def test_records_decode_columns(store):
+    final, missing = store.records(store.query(round="Final", edition=2006).tolist() + [4])
+    assert final == {"id_match": 4, "edition": 2006, "date": "2006-07-09", "round": "Final", "city": "Berlin",
+                     "home_team": "Italy", "away_team": "France", "home_result": 1, "away_result": 1,
+                     "result": "draw", "competition": "wc_men"}
+    assert (missing["home_result"], missing["city"], missing["result"]) == (None, "", "draw")
+
+
+def test_unsorted_v4_is_rejected(tmp_path):
+    matches_csv, teams_csv = tmp_path / "matches.csv", tmp_path / "teams.csv"
+    MATCHES.iloc[::-1].to_csv(matches_csv, index=False)
+    TEAMS.to_csv(teams_csv, index=False)
+    with pytest.raises(ValueError, match="non triée"):
+        build_match_store(matches_csv, teams_csv, tmp_path / STORE_DIR)
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.sharding import run_sharded
+from pipeline.stages import load_stage
+
+pytest.importorskip("polars")
+from pipeline.polars_backend import build_tables_lazy, resolve_matches_lazy  # noqa: E402
+
+# V2 nettoyée (sortie de 06.clean_matches) : un doublon, une équipe inconnue
+CLEANED = pd.DataFrame({
+    "home_team_raw": ["France", "France", "Brasil", "Atlantis", "Italy"],
+    "away_team_raw": ["Brasil", "Brasil", "Italy", "France", "France"],
+    "edition_year": pd.array([1998, 1998, 2002, 2002, 2006], dtype="Int64"),
+    "date": ["1998-07-12", "1998-07-12", np.nan, "2002-06-01", "2006-07-09"],
+    "home_result": [3.0, 3.0, 1.0, 0.0, np.nan],
+    "away_result": [0.0, 0.0, 1.0, 2.0, np.nan],
+    "round": ["Final", "Final", "Group", "Group", "Final"],
+})
+SHARED = {
+    "raw_to_id": {"France": 2, "Brasil": 1, "Italy": 3, "Atlantis": np.nan},
+    "id_to_canonical": {1: "Brazil", 2: "France", 3: "Italy"},
+}
+
+
+def test_resolve_matches_same_as_pandas():
+    stage06 = load_stage("06_v2-to-v3-clean")
+    expected, expected_stats = run_sharded(stage06.resolve_matches, CLEANED.copy(), shared=SHARED)
+    resolved, stats = resolve_matches_lazy(CLEANED.copy(), **SHARED)
+    assert stats == expected_stats == {"duplicates": 1}
+    pd.testing.assert_frame_equal(resolved.reset_index(drop=True), expected)
+    assert resolved["result"].tolist() == ["France", "draw", "draw"]
+
+
+def test_build_tables_same_as_pandas(tmp_path):
+    stage09 = load_stage("09_tables_construction")
+    kpi = pd.DataFrame({
+        "home_team": ["France", "Brazil", "Italy"], "away_team": ["Brazil", "Italy", "France"],
+        "home_result": pd.array([3, 1, None], dtype="Int64"), "away_result": pd.array([0, 1, None], dtype="Int64"),
+        "result": ["France", "draw", "draw"], "date": ["1998-07-12", None, "2006-07-09"],
+        "round": ["Final", "Group", "Final"], "city": ["Saint-Denis", "Ulsan", "Berlin"],
+        "edition": [1998, 2002, 2006], "is_final": True, "competition": "wc_men", "match_uid": ["a", "b", "c"],
+    })
+    kpi.to_csv(tmp_path / "kpi.csv", index=False)
+    expected = stage09.build_tables(pd.read_csv(tmp_path / "kpi.csv"))
+    tables = build_tables_lazy(tmp_path / "kpi.csv")
+    assert tables.keys() == expected.keys()
+    for name, df in tables.items():
+        assert df.to_csv(index=False) == expected[name].to_csv(index=False), name
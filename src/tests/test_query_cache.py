@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+
+from database import query_cache
+from database.query_cache import QueryCache, cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Horloge du cache avancée à la main"""
+    now = [1000.0]
+    monkeypatch.setattr(query_cache.time, "time", lambda: now[0])
+    return now
+
+
+def frame(value):
+    return pd.DataFrame({"value": [value]})
+
+
+def test_key_ignores_comments_whitespace_and_semicolon():
+    sql = "SELECT *\n  FROM team_match -- toutes les lignes\nWHERE edition = :e;"
+    assert cache_key(sql, {"e": "2018"}, 3) == cache_key("SELECT * FROM team_match WHERE edition = :e", {"e": "2018"}, 3)
+    assert cache_key(sql, {"e": "2018"}, 3) != cache_key(sql, {"e": "2022"}, 3)
+    # Rechargement : nouvelle version des données, nouvelle clé
+    assert cache_key(sql, {"e": "2018"}, 3) != cache_key(sql, {"e": "2018"}, 4)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = QueryCache(ttl=60)
+    cache.put("k", frame(1))
+    clock[0] += 60
+    assert cache.get("k")["value"].tolist() == [1]
+    clock[0] += 1
+    assert cache.get("k") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_read_entry_is_evicted():
+    cache = QueryCache(max_entries=2)
+    cache.put("a", frame(1))
+    cache.put("b", frame(2))
+    cache.get("a")
+    cache.put("c", frame(3))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_results_are_copies():
+    cache = QueryCache()
+    df = frame(1)
+    cache.put("k", df)
+    df.loc[0, "value"] = 2
+    cached = cache.get("k")
+    cached.loc[0, "value"] = 3
+    assert cache.get("k")["value"].tolist() == [1]
+
+
+def test_disk_cache_is_shared_and_bounded(tmp_path, clock):
+    QueryCache(max_entries=2, directory=tmp_path).put("k", frame(1))
+    # Autre processus / session : lu depuis le disque
+    assert QueryCache(directory=tmp_path).get("k")["value"].tolist() == [1]
+
+    cache = QueryCache(max_entries=2, directory=tmp_path)
+    for key in ("a", "b"):
+        clock[0] += 1
+        cache.put(key, frame(key))
+    assert len(list(tmp_path.glob("*.pkl"))) == 2
+
+    clock[0] += 3601
+    assert QueryCache(ttl=3600, directory=tmp_path).get("b") is None
+    assert not (tmp_path / "b.pkl").exists()
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from pipeline.sampling import IN_ALIASES, IN_DIM, IN_QA, IN_UNKNOWN, stratified_sample
+
+
+def v2(rows):
+    """(domicile, extérieur, round, édition) -> V2 minimale"""
+    df = pd.DataFrame(rows, columns=["home_team", "away_team", "round", "edition"])
+    df.insert(0, "id_match", range(1, len(df) + 1))
+    return df
+
+
+# 1998 : 40 matchs de groupe et une finale ; 2002 : 20 matchs de groupe
+MATCHES = v2([("Spain", "Italy", "GROUP_A", "1998")] * 40 + [("Brazil", "France", "FINAL", "1998")]
+             + [("Spain", "Italy", "Group B", "FIFA World Cup 2002")] * 20)
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Partition avec référentiels QA : Germany en deux orthographes, Atlantis inconnue"""
+    references = {
+        IN_QA: "team_id,n_variants,variants\n5,2,Germany\n",
+        IN_ALIASES: "team_raw,team_clean,alias_key,canonical_key,team_id\n"
+                    "Germany,Germany,germany,germany,5\nGermany FR,Germany FR,germany fr,germany,5\n",
+        IN_DIM: "team_canonical,team_clean_example,canonical_key,iso2,iso3,team_id\nGermany,Germany,germany,DE,DEU,5\n",
+        IN_UNKNOWN: "team_raw,team_clean,alias_key\nAtlantis,Atlantis,atlantis\n",
+    }
+    for path, content in references.items():
+        (tmp_path / path).parent.mkdir(exist_ok=True)
+        (tmp_path / path).write_text(content, encoding="utf-8")
+    return tmp_path
+
+
+def test_one_row_per_stratum_at_least(tmp_path):
+    sample, stats = stratified_sample(MATCHES, frac=0.1, source=tmp_path)
+    # Strates (année, round nettoyé) : 1998|Group 4 lignes, 1998|Final 1, 2002|Group 2
+    assert stats["strata"] == 3 and stats["rows_strata"] == 7 == len(sample)
+    assert sample["round"].value_counts().to_dict() == {"GROUP_A": 4, "FINAL": 1, "Group B": 2}
+    assert sample["id_match"].is_monotonic_increasing
+
+
+def test_sample_is_deterministic(tmp_path):
+    first, _ = stratified_sample(MATCHES, frac=0.2, seed=7, source=tmp_path)
+    again, _ = stratified_sample(MATCHES, frac=0.2, seed=7, source=tmp_path)
+    assert first["id_match"].tolist() == again["id_match"].tolist()
+
+
+def test_flagged_rows_are_always_included(source):
+    matches = pd.concat([MATCHES, v2([("Germany FR", "Spain", "GROUP_A", "1998")] * 8
+                                     + [("Germany", "Italy", "GROUP_A", "1998")] * 3
+                                     + [("Atlantis", "Spain", "GROUP_A", "1998")] * 6)], ignore_index=True)
+    sample, stats = stratified_sample(matches, frac=0.01, max_rows_per_flag=5, source=source)
+    assert (stats["flag_collisions"], stats["flag_unknown"]) == (1, 1)
+    # Variante non canonique : au moins max_rows_per_flag lignes ; équipe inconnue : toutes
+    assert (sample["home_team"] == "Germany FR").sum() >= 5
+    assert (sample["home_team"] == "Atlantis").sum() == 6
@@ -0,0 +1,48 @@
+import pandas as pd
+
+from pipeline.sharding import ROW_ORDER, get_shared, merge_shards, run_sharded
+
+
+def double_goals(df):
+    df = df.copy()
+    df["goals"] = df["goals"] * 2
+    return df, {"rows": len(df)}
+
+
+def test_sharded_equals_serial_row_order():
+    df = pd.DataFrame({"edition_year": [2022, 1930, 2022, 1930, 1998], "goals": [1, 2, 3, 4, 5]})
+    merged, stats = run_sharded(double_goals, df, workers=1)
+    expected, _ = double_goals(df)
+    pd.testing.assert_frame_equal(merged, expected.reset_index(drop=True))
+    assert stats == {"rows": 5}
+
+
+def scale_goals(df):
+    # Facteur lu dans l'index partagé : transmis aux workers par l'initializer
+    df = df.copy()
+    df["goals"] = df["goals"] * get_shared()["factor"]
+    return df, {"rows": len(df), "editions": 1}
+
+
+def test_process_pool_equals_serial():
+    df = pd.DataFrame({"edition_year": [2022, 1930, 2022, 1930, 1998, 2022] * 50, "goals": range(300)})
+    serial = run_sharded(scale_goals, df, workers=1, shared={"factor": 3})
+    pooled = run_sharded(scale_goals, df, workers=2, shared={"factor": 3})
+    pd.testing.assert_frame_equal(pooled[0], serial[0])
+    assert pooled[1] == serial[1] == {"rows": 300, "editions": 3}
+    assert pooled[0]["goals"].tolist() == [3 * g for g in range(300)]
+
+
+def test_merge_restores_row_order():
+    shards = [(pd.DataFrame({"goals": [2, 4], ROW_ORDER: [1, 3]}), {"rows": 2}),
+              (pd.DataFrame({"goals": [1, 3], ROW_ORDER: [0, 2]}), {"rows": 2})]
+    merged, stats = merge_shards(shards)
+    assert merged["goals"].tolist() == [1, 2, 3, 4] and merged.columns.tolist() == ["goals"]
+    assert stats == {"rows": 4}
+
+
+def test_empty_partition_runs_func_once():
+    df = pd.DataFrame({"edition_year": pd.Series(dtype=int), "goals": pd.Series(dtype=int)})
+    merged, stats = run_sharded(double_goals, df, workers=4)
+    assert merged.empty and merged.columns.tolist() == ["edition_year", "goals"]
+    assert stats == {"rows": 0}
@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+
+from pipeline.standings import GROUP_STAGE_FORMATS, group_standings, undeclared_editions
+
+TEAMS = pd.DataFrame({"team_id": [1, 2, 3, 4, 5, 6, 7, 8],
+                      "team_canonical": ["Argentina", "Bulgaria", "Greece", "Nigeria",
+                                         "Brazil", "Cameroon", "Russia", "Sweden"]})
+
+
+def matches(rows, edition=2022, competition="wc_men"):
+    """(home, away, buts home, buts away[, round]) -> V4 minimale"""
+    df = pd.DataFrame([row if len(row) == 5 else (*row, "Group") for row in rows],
+                      columns=["home_team_id", "away_team_id", "home_result", "away_result", "round"])
+    df.insert(0, "id_match", range(1, len(df) + 1))
+    return df.assign(edition=edition, competition=competition)
+
+
+def ranking(standings, group="A"):
+    return standings[standings["group_name"] == group]["Team_name"].tolist()
+
+
+def test_head_to_head_breaks_tie_on_goals():
+    # 1994 groupe F : Nigeria, Bulgarie et Argentine à 6 points ; Bulgarie et
+    # Argentine aussi à égalité de différence et de buts, Bulgarie 2-0 Argentine
+    group = matches([
+        (4, 2, 3, 0), (1, 3, 4, 0), (1, 4, 2, 1), (2, 3, 4, 0), (4, 3, 2, 0), (2, 1, 2, 0),
+        (4, 1, 1, 2, "Round of 16"), (2, 5, 1, 0, "Round of 16"),
+    ], edition=1994)
+    standings = group_standings(group, TEAMS)
+    assert ranking(standings) == ["Nigeria", "Bulgaria", "Argentina", "Greece"]
+    assert standings["points"].tolist() == [6, 6, 6, 0]
+    assert standings["qualified"].tolist() == [True, True, True, False]
+
+
+def test_no_head_to_head_before_1994():
+    # Même groupe en 1990 : 2 points par victoire, égalité départagée par le nom
+    standings = group_standings(matches([
+        (4, 2, 3, 0), (1, 3, 4, 0), (1, 4, 2, 1), (2, 3, 4, 0), (4, 3, 2, 0), (2, 1, 2, 0),
+    ], edition=1990), TEAMS)
+    assert ranking(standings) == ["Nigeria", "Argentina", "Bulgaria", "Greece"]
+    assert standings["points"].tolist() == [4, 4, 4, 0]
+
+
+def test_groups_named_by_first_match():
+    standings = group_standings(matches([(5, 8, 1, 1), (1, 2, 0, 1), (6, 7, 1, 6), (5, 6, 3, 0)]), TEAMS)
+    assert ranking(standings, "A") == ["Brazil", "Russia", "Sweden", "Cameroon"]
+    assert ranking(standings, "B") == ["Bulgaria", "Argentina"]
+
+
+def test_undeclared_editions_are_not_ranked():
+    group = pd.concat([matches([(1, 2, 1, 0)], edition=1974), matches([(3, 4, 0, 0)], edition=2022)])
+    assert 1974 not in GROUP_STAGE_FORMATS["wc_men"]
+    assert group_standings(group, TEAMS)["edition"].unique().tolist() == [2022]
+
+
+@pytest.mark.parametrize("rows, message", [
+    # Composante de 5 équipes : deux groupes reliés
+    ([(1, 2, 1, 0), (2, 3, 1, 0), (3, 4, 1, 0), (4, 5, 1, 0)], "composante de 5"),
+    # Rencontre jouée deux fois : barrage, pas un round-robin
+    ([(1, 2, 1, 0), (2, 1, 1, 0)], "rencontre répétée"),
+])
+def test_inconsistent_groups_raise(rows, message):
+    with pytest.raises(ValueError, match=message):
+        group_standings(matches(rows), TEAMS)
+
+
+def test_split_group_raises():
+    # 1962 : 4 groupes, 5 composantes
+    rows = [(1, 2, 1, 0), (3, 4, 1, 0), (5, 6, 1, 0), (7, 8, 1, 0), (9, 10, 0, 0)]
+    with pytest.raises(ValueError, match="5 composantes pour 4 groupes"):
+        group_standings(matches(rows, edition=1962), TEAMS)
+
+
+def test_undeclared_competition_is_skipped():
+    # Compétition sans format déclaré : signalée, aucune ligne, les autres classées
+    women = matches([(1, 2, 1, 0), (2, 1, 1, 0)], edition=2019, competition="wc_women")
+    assert group_standings(women, TEAMS).empty
+    both = pd.concat([women, matches([(3, 4, 0, 0)])])
+    assert group_standings(both, TEAMS)["competition"].unique().tolist() == ["wc_men"]
+    assert undeclared_editions(both) == [("wc_women", 2019)]
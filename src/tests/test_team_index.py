@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+from pipeline.team_index import PAIR_STATS, TeamIndex, build_team_index, write_team_index
+
+TEAMS = pd.DataFrame({"team_id": [30, 10, 20, 40], "team_canonical": ["Italy", "Brazil", "France", "Spain"]})
+
+MATCHES = pd.DataFrame([
+    # (id_match, domicile, extérieur, buts domicile, buts extérieur, résultat)
+    (1, 10, 20, 2, 1, "10"),
+    (2, 20, 30, 0, 0, "draw"),
+    (3, 20, 10, 3, 0, "20"),
+    (4, 30, 10, 1, 1, "draw"),
+    (5, 10, 20, None, None, "draw"),
+], columns=["id_match", "home_team_id", "away_team_id", "home_result", "away_result", "result"])
+
+
+@pytest.fixture
+def index():
+    return build_team_index(MATCHES, TEAMS)
+
+
+def test_team_matches(index):
+    assert index.team_matches("Brazil").tolist() == [1, 3, 4, 5]
+    assert index.team_matches(20).tolist() == [1, 2, 3, 5]
+    assert index.team_matches("Spain").tolist() == []
+
+
+def test_head_to_head_from_both_sides(index):
+    brazil = index.head_to_head("Brazil", "France")
+    assert brazil == {"matches": 3, "wins": 1, "draws": 1, "losses": 1, "goals_for": 2, "goals_against": 4}
+    france = index.head_to_head("France", "Brazil")
+    assert (france["wins"], france["losses"], france["goals_for"]) == (1, 1, 4)
+    assert index.pair_matches("France", "Brazil").tolist() == [1, 3, 5]
+
+
+def test_teams_that_never_met(index):
+    assert index.head_to_head("Brazil", "Spain") == dict.fromkeys(PAIR_STATS, 0)
+    assert index.pair_matches("Brazil", "Spain").tolist() == []
+
+
+def test_opponents_and_most_played_pairs(index):
+    assert [name for name, _ in index.opponents("Brazil")] == ["France", "Italy"]
+    assert index.opponents("Spain") == []
+    assert index.most_played_pairs(2) == [("Brazil", "France", 3), ("Brazil", "Italy", 1)]
+
+
+def test_unknown_team_raises(index):
+    with pytest.raises(KeyError, match="Germany"):
+        index.team_matches("Germany")
+    with pytest.raises(KeyError):
+        index.team_matches(99)
+    with pytest.raises(ValueError, match="99"):
+        build_team_index(MATCHES.assign(away_team_id=[20, 30, 10, 10, 99]), TEAMS)
+
+
+def test_written_index_loads_as_memmap(index, tmp_path):
+    write_team_index(index, tmp_path / "team_index", "v1")
+    loaded = TeamIndex.load(tmp_path / "team_index")
+    assert loaded.meta == {"version": "v1", "teams": 4, "matches": 5, "pairs": 3}
+    assert loaded.head_to_head("Italy", "France") == index.head_to_head("Italy", "France")
+    assert loaded.most_played_pairs() == index.most_played_pairs()
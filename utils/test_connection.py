@@ -3,45 +3,46 @@ Test rapide connexion PostgreSQL Render
 =======================================
 
 Script pour vérifier que les credentials .env fonctionnent
+(même DatabaseManager et même pool de connexions que le setup)
 
 Usage:
     python scripts/test_connection.py
 """
 
 import os
+import sys
 from pathlib import Path
-from sqlalchemy import create_engine, text
-from dotenv import load_dotenv
+from sqlalchemy import text
 
 # Chemin vers .env
 ROOT = Path(__file__).resolve().parents[1]
 ENV_FILE = ROOT /".env"
 
+sys.path.insert(0, str(ROOT / "src"))
+from database.setup_database import DatabaseManager  # noqa: E402
+
 def test_connection():
     """Tester connexion PostgreSQL Render"""
 
     print("🔧 TEST CONNEXION POSTGRESQL RENDER")
     print("=" * 50)
 
-    # Charger .env
-    if not ENV_FILE.exists():
-        print(f" Fichier .env introuvable: {ENV_FILE}")
-        return False
+    db = DatabaseManager()
 
-    load_dotenv(ENV_FILE)
-    print(f" Fichier .env chargé: {ENV_FILE}")
-
-    # Connexion via URL complète
-    db_url = os.getenv("RENDER_DATABASE_URL")
-    if not db_url or "VOTRE_MOT_DE_PASSE" in db_url:
-        print(" RENDER_DATABASE_URL manquante ou non configurée dans .env")
+    # Charger .env (variables d'environnement déjà définies acceptées)
+    if not ENV_FILE.exists() and not os.getenv("RENDER_DATABASE_URL"):
+        print(f" Fichier .env introuvable: {ENV_FILE}")
         return False
 
     try:
         print(" Tentative connexion...")
-        engine = create_engine(db_url)
+        db.connect_database()
+        db_url = db.engine.url.render_as_string(hide_password=False)
+        if "VOTRE_MOT_DE_PASSE" in db_url:
+            print(" RENDER_DATABASE_URL non configurée dans .env")
+            return False
 
-        with engine.connect() as conn:
+        with db.engine.connect() as conn:
             result = conn.execute(text("SELECT version()"))
             version = result.scalar()
             print(f" CONNEXION RÉUSSIE !")